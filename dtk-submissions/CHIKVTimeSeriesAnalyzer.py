@@ -160,7 +160,15 @@ class CHIKVTimeSeriesAnalyzer(BaseComparisonAnalyzer):
         self.subplot = self.figure.add_subplot(111)
         self.subplot.plot(self.reference["Reported Cases"])
 
-        self.result = self.data.groupby(level='sample').apply(self.compare)
+        #Compute the likelihood of all the samples at once (one row per sample, one column per week)
+        inf_samples = self.data['Infections'].unstack('week')
+        pop_samples = self.data['Population'].unstack('week')
+        for sample_infections in inf_samples.values:
+            self.subplot.plot(sample_infections.tolist())
+        self.result = pd.Series(LL_calculators_dengue.betaBinomial_dengue_samples(self.reference["Reported Cases"],
+                                                                                  inf_samples.values,
+                                                                                  pop_samples.values),
+                                index=inf_samples.index)
         #       self.result = self.data.apply(self.compare)
         logger.debug(self.result)
 
@@ -123,38 +123,40 @@ def betaBinomial_dengue_modified(raw_data, sim_data, pop_data):
     return logLik
 
 def betaBinomial_dengue_simple(raw_data, sim_data, pop_data):
-	##Initial data processing
-	#raw_data is provided as a list of lists if multiple years are included, but sim_data
-	#	is just a list.  Here we convert raw_data to a single list, if necessary.
+    ##Same log-likelihood as betaBinomial_dengue_modified for a single univariate series, computed with
+    ##	array operations (see betaBinomial_dengue_samples)
+    if len(raw_data) != len(sim_data):
+        raise RuntimeError("raw_data and sim_data[1] must have the same length to use betaBinomial_dengue.")
 
-    empiricalSeries = raw_data
-    simSeries = sim_data
-    popSeries = pop_data
+    return float(betaBinomial_dengue_samples(raw_data, sim_data, pop_data))
 
-    if len(empiricalSeries) != len(simSeries):
-        raise RuntimeError("raw_data and sim_data[1] must have the same length to use betaBinomial_dengue.")
 
-    ##Implement the log-likelihood calculations.  The assumption is that popSeries provides the
-	##	the number of trials, simSeries provides the number of successes in the simulation, and raw_data
-	##	provides the number of successes in the empirical data.
-    logLik = 0
-    for i in range(0,len(empiricalSeries)):
-        #Get the current alpha and beta hyperparameters
-        n = int(popSeries[i])
-        x_hat = int(simSeries[i])
-        x = int(empiricalSeries[i])
-        tempAlpha = 1 + x_hat
-        #print "Alpha at " + str(i) + ": " + str(tempAlpha)
-        tempBeta = 1 + n - x_hat
-		#print "Beta at " + str(i) + ": " + str(tempBeta)
+##GOAL: Vectorized version of betaBinomial_dengue_simple computing the log-likelihood of all the samples at once.
+##	logCombination and betaln are expressed with gammaln so the cost no longer depends on the number of cases.
+##INPUT
+#raw_data = list or array (int); the empirical number of successes for each time step
+#sim_data = list or 2D array; the simulated number of successes, one row per sample (or a single series)
+#pop_data = list or 2D array; the simulated number of trials, same shape as sim_data
+##OUTPUT
+#float or array of floats; the log-likelihood of each sample
+def betaBinomial_dengue_samples(raw_data, sim_data, pop_data):
+    from calibtool.LL_calculators import beta_binomial_vectorized
 
-		#NOTE: betaln actually gives the naturual log of the beta function's absolute value, but this should
-		#	not matter too much (I think) because the calls to beta should return positive values anyway.
-		#	The comparable scenario arises in dirichlet_dengue with gammaln
-		#print "logLik at " + str(i) + ": " + str(math.log(comb(n,x)) + betaln(x + tempAlpha,n - x + tempBeta) - betaln(tempAlpha,tempBeta)) + "\n\n"
-        logLik += logCombination(n,x) + betaln(x + tempAlpha,n - x + tempBeta) - betaln(tempAlpha,tempBeta)
+    #Same truncation to integers as the int() calls of the loop version
+    empiricalSeries = np.trunc(np.asarray(raw_data, dtype=np.float64))
+    simSeries = np.trunc(np.asarray(sim_data, dtype=np.float64))
+    popSeries = np.trunc(np.asarray(pop_data, dtype=np.float64))
 
-    return logLik
+    if empiricalSeries.shape[-1] != simSeries.shape[-1] or simSeries.shape != popSeries.shape:
+        raise RuntimeError("raw_data, sim_data and pop_data must have the same length to use betaBinomial_dengue.")
+
+    #Same checks as logCombination
+    if (empiricalSeries < 0).any() or (popSeries < 0).any():
+        raise ValueError("logCombination can only handle non-negative arguments")
+    if (empiricalSeries > popSeries).any():
+        raise ValueError("In logCombination n must be larger than x")
+
+    return beta_binomial_vectorized(empiricalSeries, simSeries, popSeries)
 
 
 
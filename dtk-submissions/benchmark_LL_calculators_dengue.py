@@ -0,0 +1,73 @@
+##GOAL: Compare the time spent computing the beta-binomial log-likelihood of one calibration iteration with the
+##	original week-by-week loop (betaBinomial_dengue_simple before vectorization, one sample at a time through
+##	groupby().apply as in CHIKVTimeSeriesAnalyzer.finalize) and with the vectorized betaBinomial_dengue_samples.
+##USAGE
+#python benchmark_LL_calculators_dengue.py [department] [number of samples]
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+from scipy.special import betaln
+
+import LL_calculators_dengue
+from LL_calculators_dengue import logCombination
+
+
+def betaBinomial_dengue_loop(raw_data, sim_data, pop_data):
+    #Original implementation, kept as the reference for the timing and the results
+    logLik = 0
+    for i in range(0, len(raw_data)):
+        n = int(pop_data[i])
+        x_hat = int(sim_data[i])
+        x = int(raw_data[i])
+        tempAlpha = 1 + x_hat
+        tempBeta = 1 + n - x_hat
+        logLik += logCombination(n, x) + betaln(x + tempAlpha, n - x + tempBeta) - betaln(tempAlpha, tempBeta)
+    return logLik
+
+
+def simulated_iteration(reported_cases, population, n_samples, seed=0):
+    #Build the same sample/week table as CHIKVTimeSeriesAnalyzer.combine
+    rng = np.random.RandomState(seed)
+    n_weeks = len(reported_cases)
+    scale = rng.uniform(0.2, 5, size=(n_samples, 1))
+    infections = rng.poisson(np.maximum(np.asarray(reported_cases, dtype=np.float64), 1) * scale)
+    populations = np.full((n_samples, n_weeks), float(population))
+    index = pd.MultiIndex.from_product([range(n_samples), range(n_weeks)], names=['sample', 'week'])
+    return pd.DataFrame({'Infections': infections.ravel(), 'Population': populations.ravel()}, index=index)
+
+
+def main(department='Antioquia', n_samples=100, population=6.5e6):
+    input_file = os.path.join(os.path.dirname(os.path.realpath(__file__)), '..', 'inputs',
+                              '%s_2013-2016_timeseries.json' % department)
+    with open(input_file) as data_file:
+        reported_cases = json.load(data_file)['weekly_reported_cases']['Reported Cases']
+
+    data = simulated_iteration(reported_cases, population, n_samples)
+
+    start = time.time()
+    before = data.groupby(level='sample').apply(
+        lambda sample: betaBinomial_dengue_loop(reported_cases, sample['Infections'].values.tolist(),
+                                                sample['Population'].values.tolist()))
+    time_before = time.time() - start
+
+    start = time.time()
+    inf_samples = data['Infections'].unstack('week')
+    pop_samples = data['Population'].unstack('week')
+    after = pd.Series(LL_calculators_dengue.betaBinomial_dengue_samples(reported_cases, inf_samples.values,
+                                                                        pop_samples.values),
+                      index=inf_samples.index)
+    time_after = time.time() - start
+
+    print("%s: %d samples x %d weeks (%d reported cases)" % (department, n_samples, len(reported_cases),
+                                                             sum(reported_cases)))
+    print("Loop:       %.3fs" % time_before)
+    print("Vectorized: %.3fs (x%.0f)" % (time_after, time_before / max(time_after, 1e-9)))
+    print("Max relative difference: %.2e" % np.max(np.abs((after.values - before.values) / before.values)))
+
+
+if __name__ == '__main__':
+    main(*(sys.argv[1:2]), *(int(a) for a in sys.argv[2:3]))
@@ -4,7 +4,6 @@
 # or via the calibtool.py script: 'calibtool run example_calibration.py'
 import math
 import os
-import json
 import sys
 
 from calibtool.CalibManager import CalibManager
@@ -13,14 +12,15 @@ from calibtool.plotters.LikelihoodPlotter import LikelihoodPlotter
 from scipy.special import gammaln
 
 #sys.path.append(os.path.abspath('Single_Node_Sites'))
-from outbreakindividualdengue import add_OutbreakIndivisualDengue
+from dtk.interventions.importation_sampler import ImportationSampler
+from dtk.interventions.outbreakindividualdengue import add_OutbreakIndividualDengue_series
+from dtk.tools.demographics.DemographicsFile import DemographicsFile
 from dtk.utils.core.DTKConfigBuilder import DTKConfigBuilder
 from dtk.vector.study_sites import configure_site
 from scipy.stats import uniform
 from simtools.SetupParser import SetupParser
 from ColombiaChikvTSSite_SingleNode import ColombiaTSSite
 import numpy as np
-import scipy as sp
 
 site_name = sys.argv[1]
 
@@ -28,21 +28,6 @@ SetupParser.default_block = "HPC"
 #with SetupParser.TemporarySetup("LOCAL") as setp:
 #    input_dir = setp.get('input_root')
 
-# @@ should be imported from elsewhere. PENDING until decided on structure for this.
-def foi_time(times, widths, heights, days_sim, node_cnt):
-
-    foi_out = [np.repeat(0, repeats=len(days_sim)) for ii in range(0,node_cnt)]
-
-    for ss in range(0, node_cnt):
-        for yy in range(0, len(times[ss])):
-            times[ss][yy] = times[ss][yy]*len(days_sim)
-            foi_out[ss] = \
-                foi_out[ss] + \
-                heights[ss][yy] * \
-                sp.stats.norm(times[ss][yy], widths[ss][yy]).pdf(days_sim)
-
-    return foi_out
-
 cb = DTKConfigBuilder.from_defaults('DENGUE_SIM')  # should be from_files (check what cls means)
 #configure_site(cb, 'Puerto_Rico')
 cb.set_param('Koppen_Filename',"")
@@ -60,14 +45,10 @@ cb.set_param('Demographics_Filenames',[demo_file_name])
 
 ## Get node ids
 demographics_path = os.path.join(climate_file_path, cb.get_param('Demographics_Filenames')[0])
-fp = open(demographics_path,'rb')
-demog = json.load(fp)
-node_cnt = demog['Metadata']['NodeCount']
-node_ids = []
-node_pop = []
-for i in range(0,len(demog['Nodes'])):
-    node_ids.append(demog['Nodes'][i]['NodeID'])
-    node_pop.append(demog['Nodes'][i]['NodeAttributes']['InitialPopulation'])
+demog = DemographicsFile.index(demographics_path)
+node_cnt = demog.metadata['NodeCount']
+node_ids = demog.node_ids.tolist()
+node_pop = demog.populations.tolist()
 
 cb.enable('Spatial_Output')
 cb.set_param('Spatial_Output_Channels',["New_Reported_Infections","Population"])
@@ -145,6 +126,8 @@ params.append(create_param('Temporary_Habitat_Decay_Factor', 0.05, 0.005, 0.1))
 #Code written so multiple introductions can be simulated
 intro_cnt=1
 days_import = range(1,sim_length)
+#Every node gets importations, they stay in their node
+sampler = ImportationSampler(node_ids, scaled_pop, node_cnt)
 for i in range(0, node_cnt):
     for j in range(0, intro_cnt):
         ## First case in Colombia reported in week 74 (day 511 or later)
@@ -168,26 +151,19 @@ def sample_point_fn(cb, params_dict):
     par_times_import = []
     par_widths_import = []
     par_heights_import = []
-    for i in range(0, node_cnt):
+    #Parameters ordered as the sampler importation nodes
+    for i in sampler.import_indices:
         par_times_import.append([(params_dict['Import_Times_%s_%s' % (i,str(yy))]) for yy in range(0, intro_cnt)])
         par_widths_import.append([(params_dict['Import_Widths_%s_%s' % (i,str(yy))]) for yy in range(0, intro_cnt)])
         par_heights_import.append([(params_dict['Import_Heights_%s_%s' % (i,str(yy))]) for yy in range(0, intro_cnt)])
 
-    # generate time-varying force of infection patterns by serotype
-    foi_times = foi_time(par_times_import, par_widths_import, par_heights_import, days_import, node_cnt)
-
     # simulate importations from the force of importation patterns
-    importations = []
-
-    for i in range(0, len(foi_times)):
-        importations.append(np.random.poisson(foi_times[i]))
+    ##The draws only depend on the sample point and the replicate (Run_Number) so they can be reproduced
+    import_matrix = sampler.sample(par_times_import, par_widths_import, par_heights_import, days_import,
+                                   distribute=False, seed=ImportationSampler.seed_from_params(params_dict, cb.get_param('Run_Number')))
 
     #Importations are a proportion of (scaled) population = number of importations[node][time] / population_size[node]
-    for tt in range(0, sim_length - 1):
-        for node_id in range(node_cnt):
-            if importations[node_id][tt] > 0.0:
-                add_OutbreakIndivisualDengue(cb, tt, {}, importations[node_id][tt] / scaled_pop[node_id], 'Strain_1',
-                                             [node_ids[node_id]])
+    add_OutbreakIndividualDengue_series(cb, import_matrix, node_ids, scaled_pop, 'Strain_1')
 
     return params_dict
 
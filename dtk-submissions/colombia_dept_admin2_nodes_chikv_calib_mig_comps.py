@@ -4,7 +4,6 @@
 # or via the calibtool.py script: 'calibtool run example_calibration.py'
 import math
 import os
-import json
 import sys
 
 from calibtool.CalibManager import CalibManager
@@ -13,14 +12,15 @@ from calibtool.plotters.LikelihoodPlotter import LikelihoodPlotter
 from scipy.special import gammaln
 
 #sys.path.append(os.path.abspath('Single_Node_Sites'))
-from outbreakindividualdengue import add_OutbreakIndivisualDengue
+from dtk.interventions.importation_sampler import ImportationSampler
+from dtk.interventions.outbreakindividualdengue import add_OutbreakIndividualDengue_series
+from dtk.tools.demographics.DemographicsFile import DemographicsFile
 from dtk.utils.core.DTKConfigBuilder import DTKConfigBuilder
 from dtk.vector.study_sites import configure_site
 from scipy.stats import uniform
 from simtools.SetupParser import SetupParser
 from ColombiaChikvTSSite_Department_admin2_nodes import ColombiaTSSite
 import numpy as np
-import scipy as sp
 
 site_name = sys.argv[1]
 
@@ -28,21 +28,6 @@ SetupParser.default_block = "HPC"
 with SetupParser.TemporarySetup("LOCAL") as setp:
     input_dir = setp.get('input_root')
 
-# @@ should be imported from elsewhere. PENDING until decided on structure for this.
-def foi_time(times, widths, heights, days_sim, node_cnt):
-
-    foi_out = [np.repeat(0, repeats=len(days_sim)) for ii in range(0,node_cnt)]
-
-    for ss in range(0, node_cnt):
-        for yy in range(0, len(times[ss])):
-            times[ss][yy] = times[ss][yy]*len(days_sim)
-            foi_out[ss] = \
-                foi_out[ss] + \
-                heights[ss][yy] * \
-                sp.stats.norm(times[ss][yy], widths[ss][yy]).pdf(days_sim)
-
-    return foi_out
-
 cb = DTKConfigBuilder.from_defaults('DENGUE_SIM')  # should be from_files (check what cls means)
 #configure_site(cb, 'Puerto_Rico')
 cb.set_param('Koppen_Filename',"")
@@ -62,14 +47,10 @@ cb.set_param('Regional_Migration_Filename',mig_file_name)
 
 ## Get node ids
 demographics_path = os.path.join(climate_file_path, cb.get_param('Demographics_Filenames')[0])
-fp = open(demographics_path,'rb')
-demog = json.load(fp)
-node_cnt = demog['Metadata']['NodeCount']
-node_ids = []
-node_pops = []
-for i in range(0,len(demog['Nodes'])):
-    node_ids.append(demog['Nodes'][i]['NodeID'])
-    node_pops.append(demog['Nodes'][i]['NodeAttributes']['InitialPopulation'])
+demog = DemographicsFile.index(demographics_path)
+node_cnt = demog.metadata['NodeCount']
+node_ids = demog.node_ids.tolist()
+node_pops = demog.populations.tolist()
 #Create dictionary to store node_ids and node_pop
 #node_dict=dict(zip(node_ids,node_pop))
 
@@ -164,9 +145,9 @@ intro_cnt=1
 import_node_cnt=1
 ##Now select which node(s) for importation
 days_import = range(1,sim_length)
-for i in range(0, import_node_cnt):
-    ##Select node based on pop size
-    i_node = sorted(nodes_pop_scaled,key=nodes_pop_scaled.__getitem__,reverse=True)[i]
+##Select node(s) based on pop size, importations are drawn for all the nodes at once by the sampler
+sampler = ImportationSampler(list(nodes_pop_scaled.keys()), list(nodes_pop_scaled.values()), import_node_cnt)
+for i_node in sampler.import_nodes:
     for j in range(0, intro_cnt):
         ## First case in Colombia reported in week 74 (day 511 or later)
         ## First case in Caribbean reported in late 2013
@@ -190,28 +171,20 @@ def sample_point_fn(cb, params_dict):
     par_times_import = []
     par_widths_import = []
     par_heights_import = []
-    for i in range(0, import_node_cnt):
-        i_node = sorted(nodes_pop_scaled,key=nodes_pop_scaled.__getitem__,reverse=True)[i]
+    for i_node in sampler.import_nodes:
         par_times_import.append([(params_dict['Import_Times_%s_%s' % (i_node,str(yy))]) for yy in range(0, intro_cnt)])
         par_widths_import.append([(params_dict['Import_Widths_%s_%s' % (i_node,str(yy))]) for yy in range(0, intro_cnt)])
         par_heights_import.append([(params_dict['Import_Heights_%s_%s' % (i_node,str(yy))]) for yy in range(0, intro_cnt)])
 
-    # generate time-varying force of infection patterns by serotype
-    foi_times = foi_time(par_times_import, par_widths_import, par_heights_import, days_import, import_node_cnt)
-
-    # simulate importations from the force of importation patterns
-    importations = []
-
-    for i in range(0, len(foi_times)):
-        importations.append(np.random.poisson(foi_times[i]))
+    # simulate importations from the force of importation patterns (kept in the importation nodes)
+    ##The draws only depend on the sample point and the replicate (Run_Number) so they can be reproduced
+    import_matrix = sampler.sample(par_times_import, par_widths_import, par_heights_import, days_import,
+                                   distribute=False, seed=ImportationSampler.seed_from_params(params_dict, cb.get_param('Run_Number')))
 
     #Importations are a proportion of (scaled) population = number of importations[node][time] / population_size[node]
-    for tt in range(0, sim_length - 1):
-        for node_id in range(import_node_cnt):
-            i_node = sorted(nodes_pop_scaled,key=nodes_pop_scaled.__getitem__,reverse=True)[i]
-            if importations[node_id][tt] > 0.0:
-                add_OutbreakIndivisualDengue(cb, tt, {}, importations[node_id][tt] / nodes_scaled[i_node], 'Strain_1',
-                                             [i_node])
+    #Node x day matrix of importations, turned into as few campaign events as possible by the series builder
+    add_OutbreakIndividualDengue_series(cb, import_matrix, list(nodes_pop_scaled.keys()), list(nodes_scaled.values()),
+                                        'Strain_1')
 
     return params_dict
 
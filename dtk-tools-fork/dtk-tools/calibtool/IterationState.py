@@ -1,12 +1,16 @@
 import json
 import os
 import time
+from collections import Counter
 from datetime import datetime
 import pandas as pd
+from COMPS.Data.Simulation import SimulationState
 from calibtool.utils import StatusPoint
 from simtools.AnalyzeManager.AnalyzeManager import AnalyzeManager
 from simtools.DataAccess.DataStore import DataStore
+from simtools.DBLogging.Tracer import tracer
 from simtools.ExperimentManager.ExperimentManagerFactory import ExperimentManagerFactory
+from simtools.Monitor import StatusPoller
 from simtools.Utilities.Encoding import NumpyEncoder, json_numpy_obj_hook
 from simtools.Utilities.Experiments import retrieve_experiment
 from simtools.Utilities.General import init_logging
@@ -132,30 +136,41 @@ class IterationState:
         if not self.status:
             self.starting_step()
 
+        # The steps are traced under the experiment id of the iteration (known once commissioned)
+        tracer.trace_id = self.experiment_id
+
         # COMMISSION STEP
         if self.status == StatusPoint.iteration_start:
-            self.commission_step()
+            with tracer.span('iteration.commission') as span:
+                self.commission_step()
+                span.trace_id = self.experiment_id
 
         # RUNNING
         if self.status == StatusPoint.commission:
             self.status = StatusPoint.running
-            self.wait_for_finished()
+            with tracer.span('iteration.running', self.experiment_id):
+                self.wait_for_finished()
 
         # ANALYZE STEP
         if self.status == StatusPoint.running:
-            self.analyze_step()
+            with tracer.span('iteration.analyze', self.experiment_id):
+                self.analyze_step()
 
         # PLOTTING STEP
         if self.status == StatusPoint.analyze:
-            self.plotting_step()
+            with tracer.span('iteration.plot', self.experiment_id):
+                self.plotting_step()
 
         # Done with calibration? exit the loop
         if self.finished():
+            tracer.flush()
             return
 
         # NEXT STEP
         if self.status == StatusPoint.plot:
-            self.next_point_step()
+            with tracer.span('iteration.next_point', self.experiment_id):
+                self.next_point_step()
+        tracer.flush()
 
         self.status = StatusPoint.done
 
@@ -269,48 +284,63 @@ class IterationState:
         self.results = cached_results
 
         # Set those results in the next point algorithm
-        self.next_point_algo.set_results_for_iteration(self.iteration, results)
-
-        # Update the summary table and all the results
-        self.all_results, self.summary_table = self.next_point_algo.update_summary_table(self, self.all_results)
+        # and update the summary table and all the results
+        with tracer.span('iteration.likelihood', self.experiment_id):
+            self.next_point_algo.set_results_for_iteration(self.iteration, results)
+            self.all_results, self.summary_table = self.next_point_algo.update_summary_table(self, self.all_results)
         logger.info(self.summary_table)
 
-    def wait_for_finished(self, verbose=True, init_sleep=1.0, sleep_time=10):
-        while True:
-            time.sleep(init_sleep)
-            self.exp_manager.refresh_experiment()
-
+    def wait_for_finished(self, verbose=True, init_sleep=1.0, sleep_time=10, max_sleep=300, on_finished=None):
+        """
+        Wait for the simulations of the iteration to finish.
+        The states are polled every sleep_time seconds while they change, backing off up to max_sleep seconds while
+        they do not (see StatusPoller).
+        :param on_finished: Called with the states (sim_id -> SimulationState) of the simulations newly finished at
+        each poll, allowing to start processing them before the whole iteration is done
+        """
+        def on_change(changes):
             # Output time info
             current_time = datetime.now()
-            iteration_time_elapsed = current_time - self.iteration_start
-            calibration_time_elapsed = current_time - self.calibration_start
-
-            logger.info('\n\nCalibration: %s' % self.calibration_name)
-            logger.info('Calibration started: %s' % self.calibration_start)
-            logger.info('Current iteration: Iteration %s' % self.iteration)
-            logger.info('Current Iteration Started: %s' % self.iteration_start)
-            logger.info('Time since iteration started: %s' % verbose_timedelta(iteration_time_elapsed))
-            logger.info('Time since calibration started: %s\n' % verbose_timedelta(calibration_time_elapsed))
+            logger.info('Calibration %s - Iteration %s: %s simulation(s) remaining, %s since iteration started, '
+                        '%s since calibration started'
+                        % (self.calibration_name, self.iteration, poller.remaining,
+                           verbose_timedelta(current_time - self.iteration_start),
+                           verbose_timedelta(current_time - self.calibration_start)))
 
             # Display the statuses
             if verbose:
-                self.exp_manager.print_status()
+                self.exp_manager.print_status(counts=Counter(poller.states.values()))
+
+            finished = {sim_id: state for sim_id, state in changes.items() if state in StatusPoller.FINISHED}
+            if finished and on_finished:
+                on_finished(finished)
+
+        poller = StatusPoller(lambda: self.exp_manager.get_simulation_status()[0],
+                              min_interval=sleep_time, max_interval=max_sleep, on_change=on_change)
+
+        time.sleep(init_sleep)
+        while True:
+            changes = poller.poll()
 
             # If Calibration has been canceled -> exit
-            if self.exp_manager.any_failed_or_cancelled():
+            if any(state in (SimulationState.Failed, SimulationState.Canceled) for state in changes.values()):
                 # Kill the remaining simulations
                 print("\nOne or more simulations failed/cancelled. Calibration cannot continue. Exiting...")
                 self.kill()
                 exit()
 
             # Test if we are all done
-            if self.exp_manager.experiment.is_done():
+            if poller.finished:
                 break
 
-            time.sleep(sleep_time)
+            logger.debug('Next status check in %.0fs' % poller.interval)
+            time.sleep(poller.interval)
+
+        # The experiment is only reloaded once done
+        self.exp_manager.refresh_experiment()
 
         # Print the status one more time
-        iteration_time_elapsed = current_time - self.iteration_start
+        iteration_time_elapsed = datetime.now() - self.iteration_start
         logger.info("Iteration %s done (took %s)" % (self.iteration, verbose_timedelta(iteration_time_elapsed)))
 
 
@@ -60,6 +60,29 @@ def beta_binomial_pandas(df):
 
     return LL.mean()
 
+
+def beta_binomial_vectorized(ref, sim, trials):
+    """
+    Beta-binomial log-likelihood of the reference observations given the simulated observations and trials,
+    summed over the time steps and vectorized over the samples.
+    Each time step contributes log(C(n, x)) + log(B(x + 1 + x_sim, 2n - x - x_sim + 1)) - log(B(1 + x_sim, 1 + n - x_sim))
+    :param ref: Reference observations (x), shape (n_steps,) or broadcastable with sim
+    :param sim: Simulated observations (x_sim), shape (n_steps,) or (n_samples, n_steps)
+    :param trials: Simulated number of trials (n), same shape as sim
+    :return: The log-likelihood (float) or an array with one log-likelihood per sample
+    """
+    x = np.asarray(ref, dtype=np.float64)
+    x_sim = np.asarray(sim, dtype=np.float64)
+    n = np.asarray(trials, dtype=np.float64)
+
+    # log(C(n, x)) + betaln(x + 1 + x_sim, n - x + 1 + n - x_sim) - betaln(1 + x_sim, 1 + n - x_sim)
+    # with every beta function written in terms of gammaln
+    LL = gammaln(n + 1) - gammaln(x + 1) - gammaln(n - x + 1) \
+       + gammaln(x + x_sim + 1) + gammaln(2 * n - x - x_sim + 1) - gammaln(2 * n + 2) \
+       - gammaln(x_sim + 1) - gammaln(n - x_sim + 1) + gammaln(n + 2)
+
+    return LL.sum(axis=-1)
+
 """
 Functions below were ported by J.Gerardin
 from K.McCarthy Matlab CalibTool versions
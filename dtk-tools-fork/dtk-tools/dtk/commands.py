@@ -422,6 +422,34 @@ def log(args, unknownArgs):
         print("Log written to %s" % args.export)
 
 
+def profile(args, unknownArgs):
+    """
+    Report where the time of an experiment went (creation, run, analysis...) from the traced spans.
+    """
+    exp_id = args.expId
+    experiment = DataStore.get_experiment(exp_id) if exp_id else None
+    experiment = experiment or DataStore.get_most_recent_experiment(exp_id)
+    if experiment:
+        exp_id = experiment.exp_id
+
+    spans = LoggingDataStore.get_spans(exp_id)
+    if not spans:
+        logger.error("No timing recorded for the experiment '%s'." % exp_id)
+        return
+
+    wall = max(span[6] for span in spans) - min(span[5] for span in spans)
+    print("Profile of %s" % (experiment.id if experiment else exp_id))
+    print(" | Wall time: %.2fs (first span start to last span end)" % wall)
+    print("")
+    print("{:<40} {:>8} {:>12} {:>10} {:>10} {:>12} {:>7}".format("Label", "Count", "Total (s)", "Mean (s)", "Max (s)",
+                                                                   "Elapsed (s)", "% wall"))
+    for label, count, total, minimum, maximum, start, end in spans:
+        # Elapsed is the time between the first start and the last end (less than total if run in parallel)
+        print("{:<40} {:>8} {:>12.2f} {:>10.3f} {:>10.3f} {:>12.2f} {:>6.1f}%"
+              .format(label, count, total, total / count, maximum, end - start,
+                      100 * (end - start) / wall if wall else 100))
+
+
 def sync(args, unknownArgs):
     """
     Sync COMPS db with local db
@@ -924,6 +952,9 @@ def main():
     # 'dtk log' options
     commands_args.populate_log_arguments(subparsers, log)
 
+    # 'dtk profile' options
+    commands_args.populate_profile_arguments(subparsers, profile)
+
     # 'dtk list_packages' options
     commands_args.populate_list_packages_arguments(subparsers, list_packages)
 
@@ -217,6 +217,13 @@ def populate_log_arguments(subparsers, func):
     parser_log.set_defaults(func=func)
 
 
+# 'dtk profile' options
+def populate_profile_arguments(subparsers, func):
+    parser_profile = subparsers.add_parser('profile', help="Report where the time of an experiment went (creation, run, analysis...).")
+    parser_profile.add_argument(dest='expId', default=None, nargs='?', help='Experiment ID or name (Default: most recent).')
+    parser_profile.set_defaults(func=func)
+
+
 # 'dtk list_packages' options
 def populate_list_packages_arguments(subparsers, func):
     parser_list_packages = subparsers.add_parser('list_packages', help="List the packages available to get_package command.")
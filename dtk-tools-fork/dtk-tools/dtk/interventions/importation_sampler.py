@@ -0,0 +1,91 @@
+import json
+import zlib
+
+import numpy as np
+from scipy.stats import norm
+
+
+class ImportationSampler:
+    """
+    Draw the importations (node x day matrix of imported infections) of a calibration sample point.
+
+    The force of importation of each importation node is a sum of normal curves (one per introduction) and the
+    imported infections are either kept in the importation nodes or spread across all the nodes proportionally to
+    their population. Node ordering and probabilities are computed once, and the whole matrix is drawn in a few
+    vectorized calls.
+    """
+
+    def __init__(self, node_ids, node_populations, import_node_cnt=1, seed=None):
+        """
+        :param node_ids: List of node ids. Defines the rows of the importation matrices
+        :param node_populations: Population of each node, used to select the importation nodes (the largest ones)
+        and to distribute the importations across nodes
+        :param import_node_cnt: Number of importation nodes
+        :param seed: Seed of the default random generator
+        """
+        self.node_ids = np.asarray(node_ids)
+        self.node_populations = np.asarray(node_populations, dtype=np.float64)
+
+        # Largest nodes first (stable to keep the original order between equal populations)
+        order = np.argsort(-self.node_populations, kind='mergesort')
+        self.import_indices = order[0:import_node_cnt]
+        self.import_nodes = self.node_ids[self.import_indices].tolist()
+        self.p_vals = self.node_populations / self.node_populations.sum()
+
+        self.random_state = np.random.RandomState(seed)
+
+    @staticmethod
+    def seed_from_params(params, run_number=None):
+        """
+        Deterministic seed derived from the values of a sample point so a given point always gets the same draws.
+        :param params: Dictionary of the sample point values
+        :param run_number: Run_Number of the simulation. Mixed in the seed so the replicates of a sample point get
+        different importations
+        """
+        key = params if run_number is None else {'params': params, 'Run_Number': run_number}
+        return zlib.crc32(json.dumps(key, sort_keys=True, default=str).encode())
+
+    @staticmethod
+    def force_of_importation(times, widths, heights, days):
+        """
+        Force of importation over time for each importation node.
+        :param times: (import nodes x introductions) peak times, as a fraction of the number of days
+        :param widths: (import nodes x introductions) standard deviations in days
+        :param heights: (import nodes x introductions) scaling of each normal curve
+        :param days: Days where the force of importation is evaluated
+        :return: Array (import nodes x days)
+        """
+        days = np.asarray(days, dtype=np.float64)
+        times = np.asarray(times, dtype=np.float64)[..., np.newaxis] * len(days)
+        widths = np.asarray(widths, dtype=np.float64)[..., np.newaxis]
+        heights = np.asarray(heights, dtype=np.float64)[..., np.newaxis]
+
+        return (heights * norm.pdf(days, times, widths)).sum(axis=1)
+
+    def sample(self, times, widths, heights, days, distribute=True, seed=None):
+        """
+        Draw the importations.
+        :param times, widths, heights: Parameters of the force of importation (see force_of_importation)
+        :param days: Days where the importations are drawn
+        :param distribute: If True, spread each imported infection to a node drawn according to the node populations.
+        Otherwise the infections stay in their importation node
+        :param seed: If set, use a generator seeded with it instead of the default one
+        :return: Array (nodes x days) of imported infections, rows following node_ids
+        """
+        random_state = self.random_state if seed is None else np.random.RandomState(seed)
+
+        foi = self.force_of_importation(times, widths, heights, days)
+        importations = random_state.poisson(foi)
+
+        matrix = np.zeros((len(self.node_ids), len(days)), dtype=np.int64)
+        if not distribute:
+            matrix[self.import_indices] = importations
+            return matrix
+
+        # Drawing a node for every imported infection is the same as one multinomial per day
+        per_day = importations.sum(axis=0)
+        import_days = np.repeat(np.arange(len(days)), per_day)
+        import_nodes = random_state.choice(len(self.node_ids), size=len(import_days), p=self.p_vals)
+        np.add.at(matrix, (import_nodes, import_days), 1)
+
+        return matrix
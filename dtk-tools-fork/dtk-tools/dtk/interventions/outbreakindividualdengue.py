@@ -1,3 +1,5 @@
+import numpy as np
+
 from dtk.utils.Campaign.CampaignClass import *
 from dtk.utils.Campaign.CampaignEnum import *
 
@@ -33,3 +35,107 @@ def add_OutbreakIndividualDengue(config_builder, start, coverage_by_age, strain_
         dengue_event.Nodeset_Config = NodeSetNodeList(Node_List=nodeIDs)
 
     config_builder.add_event(dengue_event)
+
+
+# Maximum number of repetitions accepted by StandardInterventionDistributionEventCoordinator
+MAX_REPETITIONS = 1000
+
+
+def group_importations(importations, node_ids, node_populations, start_day=0):
+    """
+    Group a node x day matrix of importation counts into the minimal set of outbreak events.
+    Nodes receiving the same coverage on the same day share an event and identical node sets/coverages repeated at
+    regular intervals become a single event with repetitions.
+
+    :param importations: Matrix (nodes x days) of the number of imported infections
+    :param node_ids: Id of the node for each row of importations
+    :param node_populations: Population (as sampled in the simulation) of each node, used to turn counts in coverages
+    :param start_day: Simulation day of the first column of importations
+    :return: List of dictionaries with start_day, repetitions, interval, coverage and nodes keys, sorted by start_day
+    """
+    counts = np.asarray(importations, dtype=np.float64)
+    populations = np.asarray(node_populations, dtype=np.float64)
+    node_ids = np.asarray(node_ids)
+    if counts.ndim != 2 or counts.shape[0] != len(node_ids) or len(node_ids) != len(populations):
+        raise ValueError("importations should be a (nodes x days) matrix matching node_ids and node_populations")
+
+    nodes, days = np.nonzero(counts > 0)
+    coverages = np.minimum(counts[nodes, days] / populations[nodes], 1)
+
+    # Nodes sharing the same coverage on the same day go in the same event
+    node_sets = {}
+    order = np.lexsort((nodes, coverages, days))
+    for day, coverage, node in zip(days[order], coverages[order], node_ids[nodes[order]]):
+        node_sets.setdefault((int(day), float(coverage)), []).append(int(node))
+
+    # Then the days receiving the same (coverage, nodes) are merged in evenly spaced repetitions
+    schedules = {}
+    for (day, coverage), event_nodes in node_sets.items():
+        schedules.setdefault((coverage, tuple(event_nodes)), []).append(day)
+
+    events = []
+    for (coverage, event_nodes), event_days in schedules.items():
+        event_days = sorted(event_days)
+        i = 0
+        while i < len(event_days):
+            j = i
+            if i + 1 < len(event_days):
+                step = event_days[i + 1] - event_days[i]
+                j = i + 1
+                while j + 1 < len(event_days) and event_days[j + 1] - event_days[j] == step \
+                        and j + 1 - i < MAX_REPETITIONS:
+                    j += 1
+            events.append({'start_day': start_day + event_days[i],
+                           'repetitions': j - i + 1,
+                           'interval': event_days[j] - event_days[j - 1] if j > i else -1,
+                           'coverage': coverage,
+                           'nodes': list(event_nodes)})
+            i = j + 1
+
+    return sorted(events, key=lambda e: (e['start_day'], e['nodes']))
+
+
+# Add a whole series of dengue importations with as few events as possible
+def add_OutbreakIndividualDengue_series(config_builder, importations, node_ids, node_populations, strain_id_name,
+                                        start_day=0, coverage_by_age=None):
+    """
+    Add the importations described by a node x day count matrix to the campaign.
+    The (node, day) pairs are grouped by group_importations() instead of creating one event each.
+
+    :param config_builder: The config builder getting the events
+    :param importations: Matrix (nodes x days) of the number of imported infections
+    :param node_ids: Id of the node for each row of importations
+    :param node_populations: Population (as sampled in the simulation) of each node
+    :param strain_id_name: Strain of the outbreak (eg. "Strain_1")
+    :param start_day: Simulation day of the first column of importations
+    :param coverage_by_age: Optional dictionary with min and max ages to target
+    :return: The number of events added
+    """
+    events = group_importations(importations, node_ids, node_populations, start_day)
+
+    for event in events:
+        coordinator = StandardInterventionDistributionEventCoordinator(
+            Demographic_Coverage=event['coverage'],
+            Number_Repetitions=event['repetitions'],
+            Timesteps_Between_Repetitions=event['interval'],
+            Intervention_Config=OutbreakIndividualDengue(
+                Strain_Id_Name=strain_id_name,
+                Antigen=0,
+                Genome=0,
+                Comment_antigen_genome="See GitHub https://github.com/InstituteforDiseaseModeling/DtkTrunk/issues/1682",
+                Incubation_Period_Override=-1
+            )
+        )
+
+        if coverage_by_age and all([k in coverage_by_age.keys() for k in ['min', 'max']]):
+            coordinator.Target_Demographic = StandardInterventionDistributionEventCoordinator_Target_Demographic_Enum.ExplicitAgeRanges
+            coordinator.Target_Age_Min = coverage_by_age["min"]
+            coordinator.Target_Age_Max = coverage_by_age["max"]
+
+        config_builder.add_event(CampaignEvent(
+            Start_Day=int(event['start_day']),
+            Event_Coordinator_Config=coordinator,
+            Nodeset_Config=NodeSetNodeList(Node_List=event['nodes'])
+        ))
+
+    return len(events)
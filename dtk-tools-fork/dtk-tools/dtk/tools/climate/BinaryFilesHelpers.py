@@ -1,29 +1,48 @@
 import json
-import struct
 from collections import OrderedDict
 
+import numpy as np
+
+
+def read_climate_offsets(binary_file):
+    """
+    Read the header of a climate binary.
+    :return: The metadata and an OrderedDict {node_id: offset} following the NodeOffsets
+    """
+    with open(binary_file + '.json', 'rb') as f:
+        meta = json.load(f)
+
+    offsets = meta['NodeOffsets']
+    offsets_nodes = OrderedDict(
+        (int(offsets[i:i + 8], 16), int(offsets[i + 8:i + 16], 16)) for i in range(0, len(offsets), 16)
+    )
+    return meta['Metadata'], offsets_nodes
+
+
+def extract_data_from_climate_bin_for_nodes(nodes, binary_file):
+    """
+    This function returns the data for a set of nodes in the provided binary_file.
+    Works for climate binaries. The file is memory-mapped so only the requested series are read.
+    :param nodes: List of nodes (or node ids)
+    :return: Array (nodes x DatavalueCount) of float32
+    """
+    meta, offsets_nodes = read_climate_offsets(binary_file)
+    tsteps = meta['DatavalueCount']
+    node_ids = [getattr(node, 'id', node) for node in nodes]
+
+    missing = [node_id for node_id in node_ids if node_id not in offsets_nodes]
+    if missing:
+        raise KeyError("Nodes %s not found in %s" % (missing, binary_file))
+
+    # Series are stored contiguously, one float32 per time step
+    data = np.memmap(binary_file, dtype='<f4', mode='r')
+    starts = np.array([offsets_nodes[node_id] for node_id in node_ids], dtype=np.int64) // 4
+    return np.array(data[starts[:, np.newaxis] + np.arange(tsteps)])
+
 
 def extract_data_from_climate_bin_for_node(node, binary_file):
     """
     This function returns the data for a particular node in the provided binary_file.
     Works for climate binaries
     """
-    meta = json.load(open(binary_file+'.json','rb'))
-    tsteps = meta['Metadata']['DatavalueCount']
-    offsets = meta['NodeOffsets']
-    offsets_nodes = OrderedDict()
-    i=0
-    while i <len(offsets):
-        nodeid = int(offsets[i:i+8],16)
-        offset = int(offsets[i+9:i+16], 16)
-        offsets_nodes[nodeid] = offset
-        i+=16
-
-    series = []
-    with open(binary_file, 'rb') as bin_file:
-        bin_file.seek(offsets_nodes[node.id])
-
-        # Read the data
-        for i in range(tsteps):
-            series.append(struct.unpack('f', bin_file.read(4))[0])
-    return series
\ No newline at end of file
+    return extract_data_from_climate_bin_for_nodes([node], binary_file)[0].tolist()
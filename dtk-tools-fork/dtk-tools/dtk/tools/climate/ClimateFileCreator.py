@@ -1,17 +1,29 @@
 import json
 import os
-import struct
 import time
 import logging
-from collections import OrderedDict
 
-import itertools
+import numpy as np
 
 logger = logging.getLogger(__name__)
 logging.basicConfig(filename='ClimateFileCreator_Log.log', level=logging.DEBUG)
 
 
 class ClimateFileCreator:
+    # Bounds of the valid values, used to clamp the invalid ones
+    CLIMATE_RANGES = {
+        'rainfall': (0, 2493),
+        'air_temperature': (-89.2, 56.7),
+        'land_temperature': (-89.2, 56.77),
+        'humidity': (0, 100)
+    }
+    FILL_STRATEGIES = {
+        'zero': 'fill_zero',
+        'previous': 'fill_previous',
+        'interpolate': 'fill_interpolate',
+        'clamp': 'fill_clamp'
+    }
+
     def __init__(self, nodes, prefix, suffix, original_data_years, idref="Gridded world grump2.5arcmin"):
         """
         :param nodes: format -
@@ -36,82 +48,228 @@ class ClimateFileCreator:
         self.prefix = prefix
         self.suffix = suffix
         self.original_data_years = original_data_years
+        self.cleaning_report = {}
+
+    def prepare_rainfall(self, invalid_handler=None, test_function=None, strategy='zero'):
+        return self.prepare_data_set('rainfall', invalid_handler, test_function or self.valid_rainfall, strategy)
+
+    def prepare_air_temperature(self, invalid_handler=None, test_function=None, strategy='zero'):
+        return self.prepare_data_set('air_temperature', invalid_handler, test_function or self.valid_air_temperature,
+                                     strategy)
+
+    def prepare_land_temperature(self, invalid_handler=None, test_function=None, strategy='zero'):
+        return self.prepare_data_set('land_temperature', invalid_handler,
+                                     test_function or self.valid_land_temperature, strategy)
+
+    def prepare_humidity(self, invalid_handler=None, test_function=None, strategy='zero'):
+        return self.prepare_data_set('humidity', invalid_handler, test_function or self.valid_humidity, strategy)
 
-    def prepare_rainfall(self, invalid_handler=None, test_function=None):
-        if not invalid_handler:
-            invalid_handler = self.invalid_rainfall_handler
-        if not test_function:
-            test_function = self.valid_rainfall
-        for i, node in enumerate(self.nodes):
-            self.nodes[i].rainfall = self.prepare_data(node.rainfall, invalid_handler, test_function)
-
-    def prepare_air_temperature(self, invalid_handler=None, test_function=None):
-        if not invalid_handler:
-            invalid_handler = self.invalid_air_temperature_handler
-        if not test_function:
-            test_function = self.valid_air_temperature
-
-        for i, node in enumerate(self.nodes):
-            self.nodes[i].air_temperature = self.prepare_data(node.air_temperature, invalid_handler, test_function)
-
-    def prepare_land_temperature(self, invalid_handler=None, test_function=None):
-        if not invalid_handler:
-            invalid_handler = self.invalid_land_temperature_handler
-        if not test_function:
-            test_function = self.valid_land_temperature
-
-        for i, node in enumerate(self.nodes):
-            self.nodes[i].land_temperature = self.prepare_data(node.land_temperature, invalid_handler, test_function)
-
-    def prepare_humidity(self, invalid_handler=None, test_function=None):
-        if not invalid_handler:
-            invalid_handler = self.invalid_humidity_handler
-        if not test_function:
-            test_function = self.valid_humidity
-
-        for i, node in enumerate(self.nodes):
-            self.nodes[i].humidity = self.prepare_data(node.humidity, invalid_handler, test_function)
+    def prepare_data_set(self, data_set, invalid_handler=None, test_function=None, strategy='zero'):
+        """
+        Clean a data set of all the nodes and log a summary of the replaced values.
+        :param data_set: 'rainfall', 'air_temperature', 'land_temperature' or 'humidity'
+        :param invalid_handler: Optional function (value, index, series) -> replacement, called for each invalid value.
+        Takes precedence over strategy
+        :param test_function: Function telling if a value (or an array of values) is valid
+        :param strategy: Replacement of the invalid values (see FILL_STRATEGIES)
+        :return: The summary report (also stored in self.cleaning_report)
+        """
+        series = [getattr(node, data_set) for node in self.nodes]
+        lengths = {len(s) for s in series}
+
+        if len(lengths) == 1:
+            matrix = np.asarray(series, dtype=np.float64)
+            cleaned, invalid = self.prepare_data(matrix, invalid_handler, test_function, strategy,
+                                                 self.CLIMATE_RANGES.get(data_set), return_mask=True)
+            bad_values, invalid_per_node = matrix[invalid], invalid.sum(axis=1)
+        else:
+            # Series of different lengths are cleaned node by node
+            cleaned, bad_values, invalid_per_node = [], [], []
+            for s in series:
+                data = np.asarray(s, dtype=np.float64)
+                clean, invalid = self.prepare_data(data, invalid_handler, test_function, strategy,
+                                                   self.CLIMATE_RANGES.get(data_set), return_mask=True)
+                cleaned.append(clean)
+                bad_values.append(data[invalid])
+                invalid_per_node.append(invalid.sum())
+            bad_values = np.concatenate(bad_values or [[]])
+            invalid_per_node = np.array(invalid_per_node, dtype=int)
+
+        for node, clean in zip(self.nodes, cleaned):
+            setattr(node, data_set, clean)
+
+        report = self.cleaning_summary(data_set, sum(map(len, series)), bad_values, invalid_per_node,
+                                       'handler' if invalid_handler else strategy)
+        self.cleaning_report[data_set] = report
+        return report
+
+    def cleaning_summary(self, data_set, total_values, invalid_values, invalid_per_node, strategy):
+        finite = invalid_values[np.isfinite(invalid_values)]
+        worst = np.argsort(-invalid_per_node, kind='mergesort')[0:5]
+        report = {
+            "data_set": data_set,
+            "values": int(total_values),
+            "invalid": len(invalid_values),
+            "non_finite": len(invalid_values) - len(finite),
+            "nodes": int(np.count_nonzero(invalid_per_node)),
+            "min": float(finite.min()) if len(finite) else None,
+            "max": float(finite.max()) if len(finite) else None,
+            "strategy": strategy,
+            "worst_nodes": {self.nodes[i].id: int(invalid_per_node[i]) for i in worst if invalid_per_node[i]}
+        }
+
+        if report["invalid"]:
+            logger.warning("%(data_set)s: %(invalid)d invalid values out of %(values)d in %(nodes)d nodes "
+                           "(%(non_finite)d non finite, range of the finite ones: %(min)s to %(max)s) replaced with "
+                           "strategy '%(strategy)s'. Nodes with the most invalid values: %(worst_nodes)s" % report)
+        else:
+            logger.info("%(data_set)s: %(values)d values, all valid" % report)
+        return report
 
     # Format climate data
     @staticmethod
-    def prepare_data(data, invalid_handler=None, test_function=None):
-        ret = []
-        # Make sure all data is correct
-        for i in range(len(data)):
-            data_day = data[i]
-            if test_function(data_day):
-                # The weather value is correct
-                ret.append(data_day)
+    def prepare_data(data, invalid_handler=None, test_function=None, strategy='zero', bounds=None, return_mask=False):
+        """
+        Replace the invalid values of a series (or of a nodes x days array of series).
+        :param data: Series of values, or 2D array with one series per row
+        :param invalid_handler: Optional function (value, index, series) -> replacement, called for each invalid value
+        :param test_function: Function telling if a value (or an array of values) is valid
+        :param strategy: 'zero', 'previous' (last valid value of the series), 'interpolate' (linear between the
+        surrounding valid values) or 'clamp' (closest value of bounds, non finite values are interpolated)
+        :param bounds: (min, max) used by the 'clamp' strategy
+        :param return_mask: Also return the boolean array of the invalid values
+        :return: The cleaned array
+        """
+        data = np.array(data, dtype=np.float64)
+        series = np.atleast_2d(data)
+        invalid = ~ClimateFileCreator.valid_mask(series, test_function)
+
+        if invalid.any():
+            if invalid_handler:
+                for row, col in zip(*np.nonzero(invalid)):
+                    series[row, col] = invalid_handler(series[row, col], col, data if data.ndim == 1 else data[row])
+            elif strategy in ClimateFileCreator.FILL_STRATEGIES:
+                getattr(ClimateFileCreator, ClimateFileCreator.FILL_STRATEGIES[strategy])(series, invalid, test_function, bounds)
             else:
-                clean_value = invalid_handler(data_day, i, data)
-                logger.warning("Bad value: %s, replaced by %s at index %s" % (data_day, clean_value, i), exc_info=1)
-                ret.append(clean_value)
+                raise ValueError("Unknown strategy %s, expected one of %s"
+                                 % (strategy, list(ClimateFileCreator.FILL_STRATEGIES)))
 
-        return ret
+        cleaned = series.reshape(data.shape)
+        if return_mask:
+            return cleaned, invalid.reshape(data.shape)
+        return cleaned
 
-    def generate_climate_files(self, output_path):
-        for data_set in ('air_temperature', 'land_temperature', 'humidity', 'rainfall'):
-            data = OrderedDict()
-            offset = 0
-            offset_string = ""
+    @staticmethod
+    def valid_mask(data, test_function=None):
+        if test_function is None:
+            return np.isfinite(data)
+        try:
+            mask = test_function(data)
+        except ValueError:
+            # The test function only works on single values
+            mask = None
+        if not isinstance(mask, np.ndarray) or mask.shape != data.shape:
+            mask = np.vectorize(test_function, otypes=[bool])(data)
+        return mask.astype(bool) & ~np.isnan(data)
+
+    @staticmethod
+    def valid_neighbours(invalid):
+        """
+        :return: Rows and columns of the invalid values, with the column of the previous valid value (-1 if none)
+        and of the next valid value (length of the row if none) in the same row
+        """
+        length = invalid.shape[1]
+        positions = np.arange(length)
+        previous = np.maximum.accumulate(np.where(invalid, -1, positions), axis=1)
+        following = np.minimum.accumulate(np.where(invalid, length, positions)[:, ::-1], axis=1)[:, ::-1]
+        rows, cols = np.nonzero(invalid)
+        return rows, cols, previous[rows, cols], following[rows, cols]
+
+    @staticmethod
+    def fill_zero(data, invalid, test_function=None, bounds=None):
+        data[invalid] = 0
 
-            for node in self.nodes:
-                key = tuple(getattr(node, data_set))
+    @staticmethod
+    def fill_previous(data, invalid, test_function=None, bounds=None):
+        rows, cols, previous, following = ClimateFileCreator.valid_neighbours(invalid)
+        # Use the next valid value at the beginning of a series, 0 if the series has no valid value
+        source = np.where(previous >= 0, previous, following)
+        found = source < data.shape[1]
+        data[rows, cols] = np.where(found, data[rows, np.minimum(source, data.shape[1] - 1)], 0)
+
+    @staticmethod
+    def fill_interpolate(data, invalid, test_function=None, bounds=None):
+        length = data.shape[1]
+        rows, cols, previous, following = ClimateFileCreator.valid_neighbours(invalid)
+        has_previous, has_following = previous >= 0, following < length
+
+        before = data[rows, np.maximum(previous, 0)]
+        after = data[rows, np.minimum(following, length - 1)]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            interpolated = before + (cols - previous) / (following - previous) * (after - before)
+
+        data[rows, cols] = np.where(has_previous & has_following, interpolated,
+                                    np.where(has_previous, before, np.where(has_following, after, 0)))
 
-                if not key in data:
-                    data[key] = offset
-                    offset += len(key)*4
+    @staticmethod
+    def fill_clamp(data, invalid, test_function=None, bounds=None):
+        if bounds is None:
+            raise ValueError("The clamp strategy needs the bounds of the valid values")
+        low, high = bounds
+        finite = np.isfinite(data)
+        clamp = invalid & finite
+        data[clamp] = np.clip(data[clamp], low, high)
+
+        # Bounds excluded by the test function are moved to the closest float32 value inside
+        if test_function is not None:
+            outside = clamp & ~ClimateFileCreator.valid_mask(data, test_function)
+            middle = np.float32((low + high) / 2)
+            data[outside] = np.nextafter(data[outside].astype(np.float32), middle)
+
+        ClimateFileCreator.fill_interpolate(data, invalid & ~finite)
 
-                offset_string = "%s%08x%08x" % (offset_string, node.id, data[key])
+    def generate_climate_files(self, output_path):
+        for data_set in ('air_temperature', 'land_temperature', 'humidity', 'rainfall'):
+            data, offsets = self.data_set_to_array(data_set)
 
             if len(data) > 0:
+                offset_string = "".join("%08x%08x" % (node.id, offset) for node, offset in zip(self.nodes, offsets))
                 self.write_files(output_path=output_path,
-                                 count=len(list(data)[0]),
+                                 count=data.shape[1],
                                  offset_string=offset_string,
                                  available_nodes_count=len(data),
-                                 data_to_save=list(itertools.chain.from_iterable(list(data))),
+                                 data_to_save=data,
                                  data_name=data_set)
 
+    def data_set_to_array(self, data_set):
+        """
+        Gather a data set of all the nodes, storing identical series only once.
+        :return: The distinct series as an array (series x days) of float32 in order of first appearance
+        and the offset of the series of each node in this array
+        """
+        if not self.nodes:
+            return np.empty((0, 0), dtype=np.float32), np.empty(0, dtype=np.int64)
+
+        try:
+            matrix = np.asarray([getattr(node, data_set) for node in self.nodes], dtype=np.float32)
+        except ValueError:
+            raise ValueError("All the nodes need to have the same number of %s values" % data_set)
+        if matrix.ndim != 2:
+            raise ValueError("All the nodes need to have the same number of %s values" % data_set)
+
+        # Hash the raw bytes of each series to find the duplicates
+        series = {}
+        firsts = []
+        series_index = np.empty(len(matrix), dtype=np.int64)
+        for i, row in enumerate(matrix):
+            key = row.tobytes()
+            if key not in series:
+                series[key] = len(firsts)
+                firsts.append(i)
+            series_index[i] = series[key]
+
+        return matrix[firsts], series_index * matrix.shape[1] * matrix.itemsize
+
     def write_files(self, output_path, count, offset_string, available_nodes_count, data_to_save, data_name):
         dump = lambda content: json.dumps(content, sort_keys=True, indent=4).strip('"')
         metadata = {
@@ -136,41 +294,24 @@ class ClimateFileCreator:
         json_file_name = file_name + ".bin.json"
 
         with open(os.path.join(output_path, '%s' % bin_file_name), 'wb') as handle:
-            a = struct.pack('f' * len(data_to_save), *data_to_save)
-            # Write it to the file
-            handle.write(a)
+            np.asarray(data_to_save, dtype='<f4').tofile(handle)
 
         with open(os.path.join(output_path, '%s' % json_file_name), 'w') as f:
             f.write(dump(metadata))
 
-    @staticmethod
-    def invalid_rainfall_handler(current_value, index, data):
-        return 0
-
     @staticmethod
     def valid_rainfall(current_value):
-        return 0 <= current_value < 2493
-
-    @staticmethod
-    def invalid_air_temperature_handler(current_value, index, data):
-        return 0
+        return (0 <= current_value) & (current_value < 2493)
 
     @staticmethod
     def valid_air_temperature(current_value):
-        return -89.2 <= current_value < 56.7
-
-    @staticmethod
-    def invalid_land_temperature_handler(current_value, index, data):
-        return 0
+        return (-89.2 <= current_value) & (current_value < 56.7)
 
     @staticmethod
     def valid_land_temperature(current_value):
-        return -89.2 <= current_value < 56.77
-
-    @staticmethod
-    def invalid_humidity_handler(current_value, index, data):
-        return 0
+        return (-89.2 <= current_value) & (current_value < 56.77)
 
     @staticmethod
     def valid_humidity(current_value):
-        return 0 <= current_value <= 100
\ No newline at end of file
+        return (0 <= current_value) & (current_value <= 100)
+
@@ -1,4 +1,9 @@
 import json
+import os
+import re
+import tempfile
+
+import numpy as np
 
 from dtk.tools.climate.BaseInputFile import BaseInputFile
 from dtk.tools.demographics.Node import Node
@@ -97,3 +102,199 @@ class DemographicsFile(BaseInputFile):
         for node in self.nodes.values():
             if node.name == nodeid: return node
         raise ValueError("No nodes available with the id: %s. Available nodes (%s)" % (nodeid, ", ".join(self.nodes.keys())))
+
+    @classmethod
+    def index(cls, base_file, cache=True):
+        """
+        Open a demographics file in index mode: only the node table (ids, coordinates, populations and position of
+        each node in the file) is loaded, the node attributes are read on demand.
+        :param base_file: Path of the demographics file
+        :param cache: Save/reuse the node table in a file next to the demographics file
+        :return: A DemographicsIndex
+        """
+        return DemographicsIndex(base_file, cache)
+
+
+class DemographicsIndex(object):
+    """
+    Columnar table of the nodes of a demographics file.
+    The file is parsed once and the table is cached next to it (base_file + CACHE_SUFFIX), keyed on the
+    modification time and size of the file. Per-node attributes are read from the position of the node in the file.
+    """
+    CACHE_SUFFIX = '.index.npz'
+    VERSION = 1
+
+    def __init__(self, base_file, cache=True):
+        self.base_file = base_file
+        self.cache_file = base_file + self.CACHE_SUFFIX
+
+        st = os.stat(base_file)
+        self.source_key = np.array([self.VERSION, st.st_mtime_ns, st.st_size], dtype=np.int64)
+
+        table = self.load_cache() if cache else None
+        if table is None:
+            table = self.build_table()
+            if cache:
+                self.save_cache(table)
+
+        self.node_ids = table['node_ids']
+        self.latitudes = table['latitudes']
+        self.longitudes = table['longitudes']
+        self.populations = table['populations']
+        self.names = table['names']
+        self.offsets = table['offsets']
+        header = json.loads(str(table['header']))
+        self.metadata = header['Metadata']
+        self.defaults = header['Defaults']
+        self.positions = {node_id: i for i, node_id in enumerate(self.node_ids.tolist())}
+
+    @property
+    def node_count(self):
+        return len(self.node_ids)
+
+    @property
+    def idref(self):
+        return self.metadata.get('IdReference')
+
+    def position(self, node_id):
+        try:
+            return self.positions[node_id]
+        except KeyError:
+            raise ValueError("No nodes available with the id: %s" % node_id)
+
+    def attributes(self, node_id):
+        """
+        Read the NodeAttributes of a node from the demographics file.
+        """
+        start, end = self.offsets[self.position(node_id)]
+        with open(self.base_file, 'rb') as f:
+            f.seek(start)
+            node = json.loads(f.read(end - start).decode('utf-8'))
+        return node.get('NodeAttributes', {})
+
+    def get_attribute(self, node_id, attribute, default=None):
+        value = self.attributes(node_id).get(attribute)
+        if value is None:
+            value = self.defaults.get('NodeAttributes', {}).get(attribute, default)
+        return value
+
+    def get_node(self, node_id):
+        data = {'NodeID': node_id, 'NodeAttributes': dict(self.attributes(node_id))}
+        data['NodeAttributes'].setdefault('InitialPopulation', self.populations[self.position(node_id)])
+        return Node.from_data(data)
+
+    def load_cache(self):
+        try:
+            with np.load(self.cache_file, allow_pickle=False) as cached:
+                if not np.array_equal(cached['source_key'], self.source_key):
+                    return None
+                return {key: cached[key] for key in cached.files}
+        except (IOError, OSError, ValueError, KeyError):
+            return None
+
+    def save_cache(self, table):
+        directory = os.path.dirname(os.path.abspath(self.cache_file))
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.tmp', suffix='.npz')
+        except (IOError, OSError):
+            # The directory may be read-only; the table will just be parsed again next time
+            return
+
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                np.savez(f, source_key=self.source_key, **table)
+            os.replace(tmp_path, self.cache_file)
+        except (IOError, OSError):
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def build_table(self):
+        with open(self.base_file, 'rb') as f:
+            # latin-1 keeps one character per byte so the positions found are the byte offsets of the nodes
+            text = f.read().decode('latin-1')
+
+        header, nodes = scan_demographics(text)
+        defaults = header.get('Defaults', {}).get('NodeAttributes', {})
+        default_population = defaults.get('InitialPopulation', 0)
+
+        count = len(nodes)
+        table = {
+            'node_ids': np.empty(count, dtype=np.int64),
+            'latitudes': np.empty(count, dtype=np.float64),
+            'longitudes': np.empty(count, dtype=np.float64),
+            'populations': np.empty(count, dtype=np.float64),
+            'offsets': np.empty((count, 2), dtype=np.int64)
+        }
+        names = []
+        for i, (node, start, end) in enumerate(nodes):
+            attributes = node.get('NodeAttributes', {})
+            table['node_ids'][i] = node['NodeID']
+            table['latitudes'][i] = attributes.get('Latitude', defaults.get('Latitude', np.nan))
+            table['longitudes'][i] = attributes.get('Longitude', defaults.get('Longitude', np.nan))
+            table['populations'][i] = attributes.get('InitialPopulation', default_population)
+            table['offsets'][i] = start, end
+            names.append(utf8_string(attributes.get('FacilityName', '')))
+
+        table['names'] = np.array(names, dtype=np.str_) if names else np.empty(0, dtype='<U1')
+        table['header'] = np.array(json.dumps(utf8_strings({
+            'Metadata': header.get('Metadata', {}),
+            'Defaults': header.get('Defaults', {})
+        })))
+        return table
+
+
+WHITESPACE = re.compile(r'[ \t\n\r]*')
+
+
+def scan_demographics(text):
+    """
+    Parse the top level of a demographics file, decoding the nodes one by one to record where they are.
+    :return: The top level values except the nodes, and a list of (node, start, end) for each node
+    """
+    decoder = json.JSONDecoder()
+
+    def skip(pos, expected=None):
+        pos = WHITESPACE.match(text, pos).end()
+        if expected is not None:
+            if text[pos:pos + 1] != expected:
+                raise ValueError("Expected '%s' at position %d of the demographics file" % (expected, pos))
+            pos = WHITESPACE.match(text, pos + 1).end()
+        return pos
+
+    header, nodes = {}, []
+    pos = skip(0, '{')
+    while text[pos:pos + 1] != '}':
+        key, pos = decoder.raw_decode(text, pos)
+        pos = skip(pos, ':')
+        if key == 'Nodes':
+            pos = skip(pos, '[')
+            while text[pos:pos + 1] != ']':
+                node, end = decoder.raw_decode(text, pos)
+                nodes.append((node, pos, end))
+                pos = skip(end)
+                if text[pos:pos + 1] == ',':
+                    pos = skip(pos + 1)
+            pos = skip(pos + 1)
+        else:
+            header[key], pos = decoder.raw_decode(text, pos)
+            pos = skip(pos)
+        if text[pos:pos + 1] == ',':
+            pos = skip(pos + 1)
+
+    return header, nodes
+
+
+def utf8_string(value):
+    # Strings decoded from latin-1 text
+    try:
+        return value.encode('latin-1').decode('utf-8') if isinstance(value, str) else value
+    except (UnicodeEncodeError, UnicodeDecodeError):
+        return value
+
+
+def utf8_strings(content):
+    if isinstance(content, dict):
+        return {utf8_string(k): utf8_strings(v) for k, v in content.items()}
+    if isinstance(content, list):
+        return [utf8_strings(v) for v in content]
+    return utf8_string(content)
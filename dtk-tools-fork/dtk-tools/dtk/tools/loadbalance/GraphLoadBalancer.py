@@ -0,0 +1,250 @@
+import matplotlib.pyplot as plt
+import matplotlib.cm as cm
+import numpy as np
+from scipy import sparse
+
+from dtk.tools.demographics.DemographicsFile import DemographicsFile
+from dtk.tools.migration.MigrationFile import MigrationFile
+
+
+def migration_volumes(node_ids, populations, migration_file_paths):
+    """
+    Build the symmetric matrix of daily migration volumes (rate x population of the source) between the nodes,
+    summed over all the migration files (binary files with their json header, or csv rate matrices).
+    Links to nodes that are not in node_ids are ignored.
+    """
+    n = len(node_ids)
+    positions = {node_id: i for i, node_id in enumerate(node_ids)}
+    volumes = sparse.csr_matrix((n, n))
+
+    for path in migration_file_paths or []:
+        if path.endswith('.csv'):
+            migration = MigrationFile.from_csv(None, path)
+        else:
+            migration = MigrationFile.from_file(path)
+        source_ids, destination_ids, rates = migration.to_csr()
+
+        rows = np.array([positions.get(node_id, -1) for node_id in source_ids], dtype=int)
+        cols = np.array([positions.get(node_id, -1) for node_id in destination_ids], dtype=int)
+        rates = rates.tocoo()
+        keep = (rows[rates.row] >= 0) & (cols[rates.col] >= 0) & (rows[rates.row] != cols[rates.col])
+        src, dest = rows[rates.row[keep]], cols[rates.col[keep]]
+        volumes = volumes + sparse.csr_matrix((rates.data[keep] * populations[src], (src, dest)), shape=(n, n))
+
+    return (volumes + volumes.T).tocsr()
+
+
+def partition_graph(weights, adjacency, nparts, coordinates=None, tolerance=0.05, max_moves=None):
+    """
+    Split the nodes of a graph into nparts partitions of similar weights while minimizing the weight of the edges
+    across partitions.
+    Recursive bisection: each split starts from a weighted cut along the principal axis of the node coordinates
+    (or the node order if no coordinates) and is refined by greedily moving the nodes that reduce the cut the most
+    while keeping the partitions below (1 + tolerance) times the average weight (or the weight of the heaviest node).
+    :param weights: Weight (computational cost) of each node
+    :param adjacency: Symmetric sparse matrix of the edge weights
+    :param nparts: Number of partitions
+    :param coordinates: Optional (nodes x 2) array of longitude/latitude
+    :param tolerance: Allowed excess weight of a partition relative to the average
+    :param max_moves: Maximum number of moves of a refinement (defaults to 10 x the number of nodes)
+    :return: Array of the partition of each node
+    """
+    weights = np.asarray(weights, dtype=np.float64)
+    adjacency = sparse.csr_matrix(adjacency, dtype=np.float64)
+    parts = np.zeros(len(weights), dtype=int)
+    if len(weights) == 0:
+        return parts
+
+    # A partition cannot be lighter than the heaviest node, which sets the runtime anyway
+    capacity = max((1 + tolerance) * weights.sum() / nparts, weights.max())
+
+    def bisect(indices, first_part, count):
+        if count == 1 or len(indices) == 0:
+            parts[indices] = first_part
+            return
+        if len(indices) <= count:
+            # Not enough nodes, one node per partition
+            parts[indices] = first_part + np.arange(len(indices))
+            return
+
+        left_count = count // 2
+        left = initial_split(weights[indices], None if coordinates is None else coordinates[indices],
+                             left_count, count)
+        max_loads = (capacity * left_count, capacity * (count - left_count))
+        left = refine_split(adjacency[indices][:, indices], weights[indices], left, max_loads,
+                            (left_count, count - left_count), max_moves or 10 * len(indices))
+
+        bisect(indices[left], first_part, left_count)
+        bisect(indices[~left], first_part + left_count, count - left_count)
+
+    bisect(np.arange(len(weights)), 0, nparts)
+    return parts
+
+
+def initial_split(weights, coordinates, left_count, count):
+    """
+    Cut the nodes ordered along the principal axis of their coordinates where the cumulative weight reaches the
+    share of the left partitions.
+    :return: Boolean array, True for the nodes of the left side
+    """
+    n = len(weights)
+    if coordinates is None:
+        order = np.arange(n)
+    else:
+        xy = np.array(coordinates, dtype=np.float64)
+        # Approximate distances: scale the longitudes at the average latitude
+        xy[:, 0] *= np.cos(np.radians(xy[:, 1].mean()))
+        normalized = weights / weights.sum() if weights.sum() > 0 else np.full(n, 1.0 / n)
+        centered = xy - normalized.dot(xy)
+        _, vectors = np.linalg.eigh((centered * normalized[:, np.newaxis]).T.dot(centered))
+        order = np.argsort(centered.dot(vectors[:, -1]), kind='mergesort')
+
+    cumulative = np.cumsum(weights[order])
+    target = cumulative[-1] * left_count / count
+    cut = int(np.searchsorted(cumulative, target))
+    # Take the node crossing the target on the side that gets closer to it
+    if cut < n and cumulative[cut] - target < target - (cumulative[cut - 1] if cut > 0 else 0):
+        cut += 1
+    cut = min(max(cut, left_count), n - (count - left_count))
+
+    left = np.zeros(n, dtype=bool)
+    left[order[0:cut]] = True
+    return left
+
+
+def refine_split(adjacency, weights, left, max_loads, min_counts, max_moves):
+    """
+    Greedy refinement of a bisection. Overloaded sides first give away nodes, then the nodes with the largest cut
+    reduction are moved as long as the balance constraints hold.
+    """
+    left = left.copy()
+    degree = np.asarray(adjacency.sum(axis=1)).ravel()
+    to_left = adjacency.dot(left.astype(np.float64))
+    loads = np.array([weights[left].sum(), weights[~left].sum()])
+    counts = np.array([left.sum(), (~left).sum()])
+    max_loads = np.asarray(max_loads)
+    min_counts = np.asarray(min_counts)
+
+    for _ in range(max_moves):
+        side = np.where(left, 0, 1)
+        internal = np.where(left, to_left, degree - to_left)
+        gain = (degree - internal) - internal
+        source_load, dest_load = loads[side], loads[1 - side] + weights
+        allowed = counts[side] > min_counts[side]
+
+        overloaded = loads > max_loads
+        if overloaded.any():
+            # Moves that lower the heaviest side
+            candidates = allowed & overloaded[side] & (dest_load < source_load)
+        else:
+            candidates = allowed & (gain > 0) & (dest_load <= max_loads[1 - side])
+
+        if not candidates.any():
+            break
+
+        i = np.flatnonzero(candidates)[np.argmax(gain[candidates])]
+        s = side[i]
+        left[i] = not left[i]
+        loads[s] -= weights[i]
+        loads[1 - s] += weights[i]
+        counts[s] -= 1
+        counts[1 - s] += 1
+
+        start, end = adjacency.indptr[i], adjacency.indptr[i + 1]
+        to_left[adjacency.indices[start:end]] += adjacency.data[start:end] * (1 if left[i] else -1)
+
+    return left
+
+
+def partition_report(weights, adjacency, parts, nparts):
+    """
+    :return: Load of each partition, predicted imbalance (heaviest partition over the average) and migration volume
+    across partitions
+    """
+    loads = np.bincount(parts, weights=weights, minlength=nparts)
+    coo = sparse.triu(adjacency, k=1).tocoo()
+    cut = coo.data[parts[coo.row] != parts[coo.col]].sum()
+    total = coo.data.sum()
+
+    return {
+        'loads': loads.tolist(),
+        'imbalance': float(loads.max() / loads.mean()) if loads.sum() > 0 else 1.0,
+        'cut_volume': float(cut),
+        'total_volume': float(total),
+        'cut_fraction': float(cut / total) if total > 0 else 0.0
+    }
+
+
+class GraphLoadBalancer(object):
+
+    '''
+    load balancing based on graph partitioning: nodes are weighted by their population (or any computational cost)
+    and linked by their migration volumes; the nodes are split in as many partitions as cores, of similar weights,
+    while minimizing the migration crossing partitions (i.e. the synchronization between cores)
+    '''
+
+    def __init__(self, demographics_file_path, nparts=32, migration_file_paths=None, node_weights=None,
+                 imbalance_tolerance=0.05):
+        '''
+        :param demographics_file_path: demographics file providing the nodes, populations and coordinates
+        :param nparts: number of partitions (cores)
+        :param migration_file_paths: migration binary files (with their .json header) or csv rate matrices;
+        without migration only the balance and the geography are considered
+        :param node_weights: optional {node id: weight} replacing the populations as computational costs
+        :param imbalance_tolerance: allowed excess weight of a partition relative to the average
+        '''
+        self.demographics_file_path = demographics_file_path
+        self.nparts = nparts
+        self.migration_file_paths = migration_file_paths or []
+        self.node_weights = node_weights
+        self.imbalance_tolerance = imbalance_tolerance
+
+        # plotting related attributes
+        self.max_marker_size = 500
+
+    def balance_load(self):
+
+        print(' Generating load balancing using GraphLoadBalancer')
+
+        demographics = DemographicsFile.index(self.demographics_file_path)
+        node_ids = demographics.node_ids.tolist()
+        populations = demographics.populations
+
+        if self.node_weights:
+            weights = np.array([self.node_weights.get(node_id, 0) for node_id in node_ids], dtype=np.float64)
+        else:
+            weights = populations.copy()
+        if weights.sum() <= 0:
+            weights = np.ones(len(node_ids))
+
+        volumes = migration_volumes(node_ids, populations, self.migration_file_paths)
+        coordinates = np.column_stack((demographics.longitudes, demographics.latitudes))
+        parts = partition_graph(weights, volumes, self.nparts, coordinates, self.imbalance_tolerance)
+
+        report = partition_report(weights, volumes, parts, self.nparts)
+        print('Predicted imbalance (heaviest partition / average): %.3f' % report['imbalance'])
+        print('Migration volume across partitions: %.6g (%.1f%% of %.6g)'
+              % (report['cut_volume'], 100 * report['cut_fraction'], report['total_volume']))
+
+        # Nodes ordered by partition; the cumulative loads of the nodes of partition p are in [p/nparts, (p+1)/nparts)
+        # so each partition is assigned to its own core
+        order = np.lexsort((np.arange(len(node_ids)), parts))
+        loads = np.asarray(report['loads'])
+        before = np.cumsum(weights[order]) - weights[order]
+        part_start = np.concatenate(([0], np.cumsum(loads)[:-1]))[parts[order]]
+        part_load = loads[parts[order]]
+        within = np.divide(before - part_start, part_load, out=np.zeros(len(order)), where=part_load > 0)
+        cum_loads = (parts[order] + within) / self.nparts
+
+        colors = [cm.jet(p * 256 // self.nparts) for p in parts]
+        sizes = self.max_marker_size * populations / max(populations.max(), 1)
+        plt.scatter(demographics.longitudes, demographics.latitudes, s=sizes, c=colors)
+        plt.title('Lat/Long scatter of nodes')
+        plt.axis('equal')
+
+        return {'num_nodes': len(node_ids),
+                'node_ids': [node_ids[i] for i in order],
+                'cum_loads': cum_loads.tolist(),
+                'partitions': dict(zip(node_ids, parts.tolist())),
+                'report': report,
+                'lb_fig': plt}
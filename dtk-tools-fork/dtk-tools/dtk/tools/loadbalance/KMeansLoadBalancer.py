@@ -1,10 +1,12 @@
-import json, numpy
+import numpy
 import matplotlib.pyplot as plt
 import matplotlib.cm as cm
 
 from scipy.cluster.vq import *
 import warnings
 
+from dtk.tools.demographics.DemographicsFile import DemographicsFile
+
 
 class KMeansLoadBalancer(object):
     
@@ -29,50 +31,22 @@ class KMeansLoadBalancer(object):
         
         print(' Generating load balancing using KMeansLoadBalancer')
               
-        with open(self.demographics_file_path, 'r') as file:
-            demogjson = json.load(file) #TODO: object_pairs_hook??
+        demographics = DemographicsFile.index(self.demographics_file_path)
 
-            numnodes = 0
-            if 'Metadata' in demogjson:
-                if 'NodeCount' in demogjson['Metadata']:
-                    numnodes = demogjson['Metadata']['NodeCount']
-                else:
-                    print("Demographics file has no property ['Metadata']['NodeCount']")
-            else:
-                print("Demographics file has no property ['Metadata']")
+        numnodes = 0
+        if 'NodeCount' in demographics.metadata:
+            numnodes = demographics.metadata['NodeCount']
+        else:
+            print("Demographics file has no property ['Metadata']['NodeCount']")
 
-            default_population = 0
-            if 'Defaults' in demogjson:
-                if 'NodeAttributes' in demogjson['Defaults']:
-                    if 'InitialPopulation' in demogjson['Defaults']['NodeAttributes']:
-                        default_population = demogjson['Defaults']['NodeAttributes']['InitialPopulation']
-                    else:
-                        print("Demographics file has no property ['Defaults']['NodeAttributes']['InitialPopulation']")
-                else:
-                    print("Demographics file has no property ['Defaults']['NodeAttributes']")
-            else:
-                print("Demographics file has no property ['Defaults']")
+        print('There are ' + str(numnodes) + ' nodes in this demographics file')
 
-            print('There are ' + str(numnodes) + ' nodes in this demographics file')
+        # Populations missing from the nodes are already filled with ['Defaults']['NodeAttributes']['InitialPopulation']
+        lats = demographics.latitudes.tolist()
+        longs = demographics.longitudes.tolist()
+        node_ids = demographics.node_ids.tolist()
+        node_pops = demographics.populations.tolist()
 
-            lats  = []
-            longs = []
-            node_ids = []
-            node_pops = []
-            
-            for node in demogjson['Nodes']:
-            #    print( 'Node ID: ' + str(node['NodeID']) + 
-            #           '\tLat: ' + str(node['NodeAttributes']['Latitude']) + 
-            #           '\tLong: ' + str(node['NodeAttributes']['Longitude']) )
-        
-                lats.append(float(node['NodeAttributes']['Latitude']))
-                longs.append(float(node['NodeAttributes']['Longitude']))
-                node_ids.append(node['NodeID'])
-                if 'InitialPopulation' in node['NodeAttributes']:
-                    node_pops.append(float(node['NodeAttributes']['InitialPopulation']))
-                else:
-                    node_pops.append(float(default_population))
-            
         # cluster node IDs by lat/long
         # TODO: post-processing to require equal number of nodes in each cluster??
         #       find few nearest neighbors of most populous cluster; give least populous neighbor closest node; iterate??
@@ -1,5 +1,6 @@
 import struct, array
 
+from . GraphLoadBalancer import GraphLoadBalancer
 from . KMeansLoadBalancer import KMeansLoadBalancer
 
 
@@ -10,14 +11,16 @@ class LoadBalanceGenerator(object):
     Generate multi-core simulation load balancing depending 
     on number of nodes, population size per node, etc..
     '''
-    def __init__(self, num_cores, demographics_file_path, load_balanace_algo = 'kmeans'):
+    def __init__(self, num_cores, demographics_file_path, load_balanace_algo = 'kmeans', migration_file_paths = None):
         
         self.num_cores = num_cores # number of cores to load balance nodes' populations
         self.demographics_file_path = demographics_file_path # contains population size per node
-        self.load_balanace_algo = load_balanace_algo # load balance algorithm
+        self.load_balanace_algo = load_balanace_algo # load balance algorithm ('kmeans' or 'graph')
+        self.migration_file_paths = migration_file_paths # migration files weighting the graph edges ('graph' algo)
         self.load_balance_nodes_list = None # output of load balance algo 
         self.load_balance_cum_loads_list = None # output of load balance algo
         self.num_nodes = 0 # number of nodes to load balance, output of load balance algo
+        self.load_balance_report = None # predicted imbalance and cut migration volume ('graph' algo)
         
         # load balance visualization figure; returned by algo
         self.load_balance_fig = None
@@ -46,6 +49,13 @@ class LoadBalanceGenerator(object):
                                          max_equal_clusters_iterations, 
                                          cluster_max_over_avg_threshold
                                          )
+        elif self.load_balanace_algo == 'graph':
+            
+            self.lb = GraphLoadBalancer(
+                                        self.demographics_file_path,
+                                        self.num_cores,
+                                        self.migration_file_paths
+                                        )
         else:
             raise ValueError("The " + str(self.load_balanace_algo) + " is not implemented yet.")
         
@@ -55,6 +65,7 @@ class LoadBalanceGenerator(object):
         self.load_balance_nodes_list = load_balance['node_ids']
         self.load_balance_cum_loads_list = load_balance['cum_loads']
         self.load_balance_fig = load_balance['lb_fig']
+        self.load_balance_report = load_balance.get('report')
         
         
     # save loadbalance binary for DTK input
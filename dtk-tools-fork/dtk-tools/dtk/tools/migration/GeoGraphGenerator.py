@@ -1,6 +1,49 @@
 import networkx as nx
+import numpy as np
 from math import radians, cos, sin, asin, sqrt
-import itertools
+from scipy.spatial import cKDTree
+
+# 6367 km is the radius of the Earth
+EARTH_RADIUS = 6367
+
+
+def haversine_distances(lon1, lat1, lon2, lat2):
+	'''
+	Vectorized great circle distances (in km) between points specified in decimal degrees;
+	arguments are broadcast against each other
+	'''
+	lon1, lat1, lon2, lat2 = (np.radians(np.asarray(x, dtype=np.float64)) for x in (lon1, lat1, lon2, lat2))
+
+	a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+	return 2 * EARTH_RADIUS * np.arcsin(np.sqrt(np.minimum(a, 1)))
+
+
+def pairs_within_radius(lons, lats, radius):
+	'''
+	Index pairs (i < j) of the points distanced less than radius km away, and their distances;
+	the points are placed on the unit sphere and a kd-tree finds the candidate pairs within the equivalent chord length
+	so only the close pairs are ever considered (all the pairs if radius is None)
+	'''
+	lons = np.asarray(lons, dtype=np.float64)
+	lats = np.asarray(lats, dtype=np.float64)
+
+	if radius:
+		lon_r, lat_r = np.radians(lons), np.radians(lats)
+		xyz = np.column_stack((np.cos(lat_r) * np.cos(lon_r), np.cos(lat_r) * np.sin(lon_r), np.sin(lat_r)))
+		# slightly larger chord to not miss pairs due to rounding; the exact distance filter is applied below
+		chord = 2 * np.sin(min(radius / (2.0 * EARTH_RADIUS), np.pi / 2)) * (1 + 1e-9)
+		pairs = cKDTree(xyz).query_pairs(chord, output_type='ndarray')
+		first, second = pairs[:, 0], pairs[:, 1]
+	else:
+		first, second = np.triu_indices(len(lons), 1)
+
+	distances = haversine_distances(lons[first], lats[first], lons[second], lats[second])
+	if radius:
+		close = distances < radius
+		first, second, distances = first[close], second[close], distances[close]
+
+	return first, second, distances
+
 
 class GeoGraphGenerator(object):
 	
@@ -82,19 +125,20 @@ class GeoGraphGenerator(object):
 			G.population[node_id] = properties[2]
 			G.position[node_id]=(properties[0], properties[1]) # (x,y) for matplotlib
 	
-		# add an edge between any two nodes distanced less than max_kms away
-		
-		for n in itertools.combinations(G.nodes(),2):
-			distance = self.get_haversine_distance(G.position[n[0]][0],G.position[n[0]][1],G.position[n[1]][0],G.position[n[1]][1])
-			if not self.migration_radius or distance < self.migration_radius:
-				G.add_edge(n[0], n[1], weight = distance)
-		
+		# add an edge between any two nodes distanced less than max_kms away (all of them if no radius)
+		node_ids = list(G.nodes())
+		lons, lats = zip(*[G.position[node_id] for node_id in node_ids]) if node_ids else ((), ())
+		first, second, distances = pairs_within_radius(lons, lats, self.migration_radius)
+		G.add_weighted_edges_from(zip([node_ids[i] for i in first], [node_ids[j] for j in second], distances.tolist()))
 	
 		# add edge based on adjacency matrix
-		for node_id, node_links in self.adjacency_list.items():
-			for node_link_id, w in node_links.items():
-				distance = self.get_haversine_distance(G.position[int(node_id)][0], G.position[int(node_id)][1], G.position[int(node_link_id)][0], G.position[int(node_link_id)][1])
-				G.add_edge(int(node_id), int(node_link_id), weight = distance*w)
+		links = [(int(node_id), int(node_link_id), w) for node_id, node_links in (self.adjacency_list or {}).items()
+				 for node_link_id, w in node_links.items()]
+		if links:
+			src, dst, w = zip(*links)
+			distances = haversine_distances([G.position[n][0] for n in src], [G.position[n][1] for n in src],
+											[G.position[n][0] for n in dst], [G.position[n][1] for n in dst])
+			G.add_weighted_edges_from(zip(src, dst, (distances * np.asarray(w, dtype=np.float64)).tolist()))
 				
 		self.graph = G
 		
@@ -102,11 +146,15 @@ class GeoGraphGenerator(object):
 	
 	
 	'''
-	get shortest paths based on link weights
+	get shortest paths based on link weights;
+	if cutoff is set, only the paths shorter than cutoff are searched (e.g. the distance cutoff of the gravity model)
 	'''
-	def get_shortest_paths(self):
+	def get_shortest_paths(self, cutoff=None):
+		
+		if cutoff is None:
+			return nx.shortest_path_length(self.graph, weight='weight')
 		
-		return nx.shortest_path_length(self.graph, weight='weight') 
+		return nx.all_pairs_dijkstra_path_length(self.graph, cutoff=cutoff, weight='weight')
 	
 		
 	'''
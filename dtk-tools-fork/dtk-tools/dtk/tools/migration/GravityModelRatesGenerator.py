@@ -1,6 +1,96 @@
 import heapq
 import warnings
+from multiprocessing import Pool
+
 import networkx as nx
+import numpy as np
+from scipy import sparse
+from scipy.sparse.csgraph import dijkstra
+
+# graph and parameters shared with the worker processes of gravity_rates_matrix
+_worker_args = None
+
+
+def graph_to_csgraph(graph, node_ids=None):
+    '''
+    convert a networkx graph to a (n x n) csr matrix of the edges weights usable by scipy.sparse.csgraph;
+    undirected edges are stored in both directions
+    '''
+    node_ids = list(graph.nodes()) if node_ids is None else list(node_ids)
+    index = {node_id: i for i, node_id in enumerate(node_ids)}
+
+    # self loops never shorten a path
+    edges = [(index[u], index[v], w) for u, v, w in graph.edges(data='weight', default=1)
+             if u != v and u in index and v in index]
+    rows, cols, weights = (np.asarray(x) for x in zip(*edges)) if edges else (np.array([], dtype=int),) * 3
+    if not graph.is_directed():
+        rows, cols, weights = np.concatenate((rows, cols)), np.concatenate((cols, rows)), np.concatenate((weights, weights))
+
+    matrix = sparse.coo_matrix((weights.astype(np.float64), (rows, cols)), shape=(len(node_ids), len(node_ids)))
+    return matrix.tocsr(), node_ids
+
+
+def _gravity_rates_rows(sources):
+    csgraph, populations, coeff, dist_cutoff, max_dests = _worker_args
+
+    # cutoff limited dijkstra, unreachable (or beyond cutoff) destinations are inf
+    dist = np.atleast_2d(dijkstra(csgraph, directed=True, indices=sources, limit=dist_cutoff))
+
+    keep = np.isfinite(dist) & (dist > 0) & (dist < dist_cutoff)
+    keep[np.arange(len(sources)), sources] = False
+
+    rows, cols, rates = [], [], []
+    for i, src in enumerate(sources):
+        dests = np.flatnonzero(keep[i])
+        dest_rates = coeff * populations[dests]
+        if len(dests) > max_dests:
+            # largest rates first, lowest node index first in case of ties
+            top = np.argsort(-dest_rates, kind='mergesort')[0:max_dests]
+            dests, dest_rates = dests[top], dest_rates[top]
+        rows.append(np.full(len(dests), src))
+        cols.append(dests)
+        rates.append(dest_rates)
+
+    return np.concatenate(rows), np.concatenate(cols), np.concatenate(rates)
+
+
+def _init_worker(args):
+    global _worker_args
+    _worker_args = args
+
+
+def gravity_rates_matrix(graph, populations, coeff=1, dist_cutoff=20, max_dests=100, node_ids=None, processes=1,
+                         chunk_size=None):
+    '''
+    gravity model link rates as a sparse matrix;
+    a cutoff limited dijkstra is ran for chunks of sources (in parallel if processes > 1) and only the destinations
+    closer than dist_cutoff are kept (at most max_dests per source, largest rates first) so the full distance matrix is
+    never held in memory
+
+    :param graph: networkx graph with the distances as 'weight'
+    :param populations: population by node id
+    :param node_ids: order of the nodes in the matrix (default: graph nodes order)
+    :param processes: number of worker processes
+    :param chunk_size: number of sources per dijkstra call (default: bounded to ~10M distances per chunk)
+    :return: (csr matrix of rates [source, destination], node ids)
+    '''
+    csgraph, node_ids = graph_to_csgraph(graph, node_ids)
+    n = len(node_ids)
+    pops = np.array([populations[node_id] for node_id in node_ids], dtype=np.float64)
+
+    chunk_size = chunk_size or max(1, min(1024, int(1e7 // max(n, 1))))
+    chunks = [np.arange(start, min(start + chunk_size, n)) for start in range(0, n, chunk_size)]
+    args = (csgraph, pops, coeff, dist_cutoff, max_dests)
+
+    if processes and processes > 1 and len(chunks) > 1:
+        with Pool(processes, initializer=_init_worker, initargs=(args,)) as pool:
+            results = pool.map(_gravity_rates_rows, chunks)
+    else:
+        _init_worker(args)
+        results = [_gravity_rates_rows(chunk) for chunk in chunks]
+
+    rows, cols, rates = (np.concatenate(x) for x in zip(*results)) if results else ([], [], [])
+    return sparse.csr_matrix((rates, (rows, cols)), shape=(n, n)), node_ids
 
 
 class GravityModelRatesGenerator(object):
@@ -9,7 +99,12 @@ class GravityModelRatesGenerator(object):
     see MigrationGenerator for path lengths/weights and graph topology generation 
     '''
 
-    def __init__(self, path_lengths, graph, coeff=1):
+    MIN_DIST = 1  # 1km minimum distance in gravity model for improved short-distance asymptotic behavior
+    DIST_CUTOFF = 20  # beyond 20km effective distance not reached in 1 day.
+    MAX_MIGRATION_DESTS = 100  # limit of DTK local migration
+
+    def __init__(self, path_lengths, graph, coeff=1, processes=1):
+        # if path_lengths is None the paths are searched directly in the graph (see generate_migration_links_rates_matrix)
         self.path_lengths = path_lengths
 
         self.graph = graph
@@ -20,24 +115,52 @@ class GravityModelRatesGenerator(object):
         
         #print (coeff)
 
+        self.processes = processes
+
         self.link_rates = None # output of gravity model based migration links generation
+        self.link_rates_matrix = None # same as a sparse matrix (rows/columns following node_ids)
+        self.node_ids = None
         
         
+    '''
+    gravity model based link rates as a scipy sparse matrix, computed with cutoff limited dijkstra searches
+    '''
+
+    def generate_migration_links_rates_matrix(self):
+
+        self.link_rates_matrix, self.node_ids = gravity_rates_matrix(self.graph, self.graph.population, coeff=self.coeff,
+                                                                     dist_cutoff=self.DIST_CUTOFF,
+                                                                     max_dests=self.MAX_MIGRATION_DESTS,
+                                                                     processes=self.processes)
+
+        isolated = [self.node_ids[i] for i in np.flatnonzero(np.diff(self.link_rates_matrix.indptr) == 0)]
+        if isolated:
+            warnings.warn('No paths from %d source(s) found! Check if nodes are isolated: %s' % (len(isolated), isolated))
+
+        return self.link_rates_matrix, self.node_ids
+
     '''
     gravity model based link rates
     '''
 
     def generate_migration_links_rates(self):
 
+        if self.path_lengths is None:
+            matrix, node_ids = self.generate_migration_links_rates_matrix()
+            self.link_rates = {src: {node_ids[j]: rate for j, rate in zip(matrix.indices[matrix.indptr[i]:matrix.indptr[i + 1]],
+                                                                          matrix.data[matrix.indptr[i]:matrix.indptr[i + 1]])}
+                               for i, src in enumerate(node_ids)}
+            return self.link_rates
+
         paths = {}
 
         migs = []
 
         max_migs = []
 
-        mindist = 1  # 1km minimum distance in gravity model for improved short-distance asymptotic behavior
-        dist_cutoff = 20  # beyond 20km effective distance not reached in 1 day.
-        max_migration_dests = 100  # limit of DTK local migration
+        mindist = self.MIN_DIST
+        dist_cutoff = self.DIST_CUTOFF
+        max_migration_dests = self.MAX_MIGRATION_DESTS
 
         for src, v in self.path_lengths:
             paths[src] = {}
@@ -1,14 +1,16 @@
 import json
-from struct import pack
+
+import numpy as np
+from scipy import sparse
 
 from dtk.tools.climate.BaseInputFile import BaseInputFile
 
 
 class MigrationFile(BaseInputFile):
-    def __init__(self, idref, matrix):
+    def __init__(self, idref, matrix, node_ids=None, max_destinations=None, destination_ids=None):
         """
         Initialize a MigrationFile.
-        :param idref: 
+        :param idref:
         :param matrix: The matrix needs to be of the format:
             {
                node_source1: {
@@ -16,67 +18,137 @@ class MigrationFile(BaseInputFile):
                   node_destination_2: rate
                 }
             }
+            or a dense numpy array / scipy sparse matrix of rates [source, destination] following node_ids
+        :param node_ids: Node ids of the rows/columns if matrix is an array
+        :param max_destinations: Only keep the destinations with the largest rates. Defaults to all the destinations
+        :param destination_ids: Node ids of the columns if matrix is an array and they differ from node_ids
         """
         super(MigrationFile, self).__init__(idref)
         self.idref = idref
         self.matrix = matrix
+        self.node_ids = node_ids
+        self.max_destinations = max_destinations
+        self.destination_ids = destination_ids
 
-    def generate_file(self, name):
-        # Before generating, transform the matrix
-        matrix_id = self.nodes_to_id()
+        if not isinstance(matrix, dict) and node_ids is None:
+            raise ValueError("node_ids are needed when the matrix is an array")
+
+    @classmethod
+    def from_csv(cls, idref, path, max_destinations=None):
+        """
+        Load a square matrix of rates in csv format, the header holding the node ids (as the
+        *_admin2_migration_rates.csv files).
+        """
+        with open(path) as f:
+            node_ids = [int(n.strip('"')) for n in f.readline().strip().split(',')]
+        rates = np.loadtxt(path, delimiter=',', skiprows=1, ndmin=2)
+        return cls(idref, rates, node_ids, max_destinations)
 
-        offset = 0
-        offset_str = ""
+    @classmethod
+    def from_file(cls, name):
+        """
+        Read a migration binary file (and its .json header)
+        :return: A MigrationFile holding a csr matrix (zero rates are dropped)
+        """
+        with open("%s.json" % name) as f:
+            headers = json.load(f)
 
-        # Make sure we have the same destinations size everywhere
-        # First find the max size
-        max_size = max([len(dest) for dest in matrix_id.values()])
+        count = headers["Metadata"]["DatavalueCount"]
+        offsets = headers["NodeOffsets"]
+        node_ids = [int(offsets[i:i + 8], 16) for i in range(0, len(offsets), 16)]
+        record_offsets = np.array([int(offsets[i + 8:i + 16], 16) for i in range(0, len(offsets), 16)])
 
-        # Add a fake node destinations in nodes to make sure the destinations are all same size
-        for source, dests in self.matrix.items():
-            self.get_filler_nodes(source, dests, max_size, matrix_id.keys())
+        records = np.fromfile(name, dtype=cls.record_dtype(count))
+        # Follow the offsets in case the records are not in the header order
+        records = records[record_offsets // records.dtype.itemsize] if len(records) else records
 
-        with open(name, 'wb') as migration_file:
-            for nodeid, destinations in matrix_id.items():
-                destinations_id = pack('I' * len(destinations.keys()), *destinations.keys())
-                destinations_rate = pack('d' * len(destinations.values()), *destinations.values())
+        rows = np.repeat(np.arange(len(node_ids)), count)
+        destinations = records['destinations'].ravel()
+        rates = records['rates'].ravel()
+        keep = rates != 0
 
-                # Write
-                migration_file.write(destinations_id)
-                migration_file.write(destinations_rate)
+        # Columns follow the node ids, then the destinations without record if any
+        destination_ids = node_ids + sorted(set(destinations[keep].tolist()) - set(node_ids))
+        index = {node_id: i for i, node_id in enumerate(destination_ids)}
+        cols = np.array([index[d] for d in destinations[keep].tolist()], dtype=int)
 
-                # Write offset
-                offset_str = "%s%s%s" % (offset_str, "{0:08x}".format(nodeid), "{0:08x}".format(offset))
+        matrix = sparse.csr_matrix((rates[keep], (rows[keep], cols)), shape=(len(node_ids), len(destination_ids)))
+        migration_file = cls(headers["Metadata"].get("IdReference"), matrix, node_ids, destination_ids=destination_ids)
+        migration_file.headers = headers
+        return migration_file
 
-                # Increment offset
-                offset += 12 * len(destinations)
+    @staticmethod
+    def record_dtype(count):
+        # Each node record holds the destination ids followed by the rates
+        return np.dtype([('destinations', '<u4', (count,)), ('rates', '<f8', (count,))])
+
+    def generate_file(self, name):
+        node_ids, destination_ids, matrix = self.to_csr()
+        n = len(node_ids)
+
+        # Sort each row by decreasing rate (lowest destination index first for ties) and trim
+        row_lengths = np.diff(matrix.indptr)
+        rows = np.repeat(np.arange(n), row_lengths)
+        order = np.lexsort((matrix.indices, -matrix.data, rows))
+        cols, rates = matrix.indices[order], matrix.data[order]
+        ranks = np.arange(len(order)) - np.repeat(matrix.indptr[:-1], row_lengths)
+
+        # Make sure we have the same destinations size everywhere (filled with 0 destinations and 0 rates)
+        count = int(row_lengths.max()) if n else 0
+        if self.max_destinations is not None:
+            count = min(count, self.max_destinations)
+        keep = ranks < count
+
+        records = np.zeros(n, dtype=self.record_dtype(count))
+        records['destinations'][rows[keep], ranks[keep]] = np.asarray(destination_ids, dtype=np.uint32)[cols[keep]]
+        records['rates'][rows[keep], ranks[keep]] = rates[keep]
+        records.tofile(name)
+
+        # Offsets of each node record
+        offsets = np.arange(n) * records.dtype.itemsize
+        offset_str = "".join("{0:08x}{1:08x}".format(nodeid, offset) for nodeid, offset in zip(node_ids, offsets))
 
         # Write the headers
-        meta = self.generate_headers({"NodeCount": len(matrix_id), "DatavalueCount": len(matrix_id.values()) })
+        meta = self.generate_headers({"NodeCount": n, "DatavalueCount": count})
         headers = {
             "Metadata": meta,
             "NodeOffsets": offset_str
         }
-        json.dump(headers, open("%s.json" % name, 'w'), indent=3)
+        with open("%s.json" % name, 'w') as f:
+            json.dump(headers, f, indent=3)
 
-    def get_filler_nodes(self, source, dests, n, available_nodes):
+    def to_csr(self):
         """
-        Fills the destinations with n filler nodes.
-        Makes sure the nodes ids chosen are not the source, not the destinations and come from the available_nodes
+        :return: The source ids (rows), the destination ids (columns) and the matrix of rates as a csr matrix
         """
-        while len(dests) < n:
-            for node in available_nodes:
-                if node not in dests and node != source:
-                    dests[node] = 0
+        if not isinstance(self.matrix, dict):
+            destination_ids = self.node_ids if self.destination_ids is None else self.destination_ids
+            matrix = sparse.csr_matrix(self.matrix, dtype=np.float64)
+            matrix.eliminate_zeros()
+            return [int(n) for n in self.node_ids], [int(n) for n in destination_ids], matrix
+
+        matrix_id = self.nodes_to_id()
+        source_ids = list(matrix_id.keys())
+        destination_ids = source_ids + sorted({d for dests in matrix_id.values() for d in dests} - set(source_ids))
+        index = {node_id: i for i, node_id in enumerate(destination_ids)}
+
+        rows, cols, rates = [], [], []
+        for i, destinations in enumerate(matrix_id.values()):
+            rows.extend([i] * len(destinations))
+            cols.extend(index[d] for d in destinations.keys())
+            rates.extend(destinations.values())
+
+        matrix = sparse.csr_matrix((rates, (rows, cols)), shape=(len(source_ids), len(destination_ids)), dtype=np.float64)
+        matrix.eliminate_zeros()
+        return source_ids, destination_ids, matrix
 
     def nodes_to_id(self):
         """
         Transform the matrix of {node:{destination:rate}} into {node.id: {dest.id:rate}}
-        :return: 
+        :return:
         """
         return {
             node.id:{
                 dest.id:v for dest, v in dests.items()
             } for node, dests in self.matrix.items()
         }
-
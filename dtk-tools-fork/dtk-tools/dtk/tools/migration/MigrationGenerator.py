@@ -5,13 +5,17 @@ from struct import pack
 import os
 import matplotlib.pyplot as plt
 import networkx as nx
+import numpy as np
+from scipy import sparse
 
 import dtk.tools.demographics.compiledemog as compiledemog
+from dtk.tools.demographics.DemographicsFile import DemographicsFile
 from dtk.tools.migration import createmigrationheader
 from dtk.tools.migration.SmallWorldGridGraphGenerator import SmallWorldGridGraphGenerator
 from . import visualize_routes
 from . GeoGraphGenerator import GeoGraphGenerator
 from . GravityModelRatesGenerator import GravityModelRatesGenerator
+from . MigrationFile import MigrationFile
 
 
 class MigrationGenerator(object):
@@ -22,8 +26,13 @@ class MigrationGenerator(object):
     only supply the input relevant for migration; currently done in process_input(self)
     '''
 
+    MAX_DESTINATIONS_BY_ROUTE = {'local': 90,
+                                 'regional': 90,
+                                 'sea': 5,
+                                 'air': 60}
+
     def __init__(self, demographics_file_path, migration_network_file_path, graph_topo_type='geo-graph',
-                 link_rates_model_type='gravity'):
+                 link_rates_model_type='gravity', processes=1):
 
         self.demographics_file_path = demographics_file_path
         self.migration_network_file_path = migration_network_file_path  # network structure provided in json adjacency list format or csv format
@@ -39,6 +48,11 @@ class MigrationGenerator(object):
 
         self.graph_topo = None
         self.link_rates = None
+        self.link_rates_matrix = None  # sparse link rates (rows/columns following link_rates_node_ids) if generated
+        self.link_rates_node_ids = None
+
+        # number of processes used to generate the link rates
+        self.processes = processes
 
         # graph topology instance
         self.gt = None
@@ -168,20 +182,22 @@ class MigrationGenerator(object):
             self.generate_node_properties()
 
     def generate_node_properties(self):
-        with open(self.demographics_file_path, 'r') as demo_f:
-            demographics = json.load(demo_f)
-            self.node_label_2_id = {}
-            nodes = demographics['Nodes']
-            self.node_properties = {}
-            for node in nodes:
-                node_attributes = node['NodeAttributes']
-
-                self.node_properties[int(node['NodeID'])] = [float(node_attributes['Longitude']),
-                                                             float(node_attributes['Latitude']),
-                                                             int(node_attributes['InitialPopulation']),
-                                                             node_attributes['FacilityName']]
-
-                self.node_label_2_id[node_attributes['FacilityName']] = int(node['NodeID'])
+        demographics = DemographicsFile.index(self.demographics_file_path)
+        names = demographics.names.tolist()
+        node_ids = demographics.node_ids.tolist()
+
+        # The node labels are required: the index stores a missing FacilityName as ''
+        for node_id, name in zip(node_ids, names):
+            if not name and 'FacilityName' not in demographics.attributes(node_id):
+                raise KeyError("No FacilityName for the node %s in %s" % (node_id, self.demographics_file_path))
+
+        self.node_properties = {node_id: [lon, lat, int(pop), name]
+                                for node_id, lon, lat, pop, name in zip(node_ids,
+                                                                         demographics.longitudes.tolist(),
+                                                                         demographics.latitudes.tolist(),
+                                                                         demographics.populations.tolist(),
+                                                                         names)}
+        self.node_label_2_id = dict(zip(names, node_ids))
 
     def generate_graph_topology(self):
 
@@ -222,11 +238,12 @@ class MigrationGenerator(object):
 
             print ("Preparing link rates generation config...")
 
+            # the shortest paths are searched by the rates generator (sparse, bounded by its distance cutoff)
             self.lrm = GravityModelRatesGenerator(
-                self.gt.get_shortest_paths(),
-                # assume all graph topologies implement the get_shortest_paths() method; enforce via interface? in Python??
+                None,
                 self.graph_topo,
-                coeff=1e-4
+                coeff=1e-4,
+                processes=self.processes
             )
 
         elif self.link_rates_model_type == 'custom':
@@ -239,6 +256,8 @@ class MigrationGenerator(object):
 
         if self.lrm:
             self.link_rates = self.lrm.generate_migration_links_rates()  # assume all link rates models implement generate_migration_links_re
+            self.link_rates_matrix = getattr(self.lrm, 'link_rates_matrix', None)
+            self.link_rates_node_ids = getattr(self.lrm, 'node_ids', None)
 
     def save_migration_graph_topo_visualization(self, output_dir):
         graph = self.get_topo()
@@ -280,6 +299,40 @@ class MigrationGenerator(object):
                 for dest, mig in v.items():
                     fout.write('%d %d %0.1g\n' % (int(src), int(dest), mig))
 
+    '''
+    save link rates directly to a DTK binary migration file and its json header (no intermediate txt file);
+    uses the sparse link rates if they were generated, the link rates dictionary otherwise;
+    node_ids gives the nodes and the order of the records (e.g. the demographics nodes, nodes without link rates get
+    an empty record), by default the nodes of the link rates are used
+    '''
+
+    def save_link_rates_to_bin(self, rates_bin_file_path, route="local", idref="dtk-tools", node_ids=None):
+        if self.link_rates_matrix is not None:
+            matrix, rates_node_ids = self.link_rates_matrix, list(self.link_rates_node_ids)
+        elif self.link_rates:
+            rates_node_ids = sorted(set(self.link_rates.keys()) | {dest for v in self.link_rates.values() for dest in v})
+            index = {node_id: i for i, node_id in enumerate(rates_node_ids)}
+            links = [(index[src], index[dest], mig) for src, v in self.link_rates.items() for dest, mig in v.items()]
+            rows, cols, rates = zip(*links) if links else ((), (), ())
+            matrix = sparse.csr_matrix((np.asarray(rates, dtype=np.float64), (rows, cols)),
+                                       shape=(len(rates_node_ids), len(rates_node_ids)))
+        else:
+            raise ValueError(
+                'Link rates were not generated or provided! Please provide link rates or indicate link rates generation algorithm.')
+
+        if node_ids is None:
+            node_ids = rates_node_ids
+        else:
+            # One row per requested node, in the requested order (empty for the nodes without link rates)
+            index = {node_id: i for i, node_id in enumerate(rates_node_ids)}
+            selected = [(row, index[node_id]) for row, node_id in enumerate(node_ids) if node_id in index]
+            rows, cols = zip(*selected) if selected else ((), ())
+            reorder = sparse.csr_matrix((np.ones(len(rows)), (rows, cols)), shape=(len(node_ids), len(rates_node_ids)))
+            matrix = reorder.dot(matrix)
+
+        MigrationFile(idref, matrix, node_ids, max_destinations=self.MAX_DESTINATIONS_BY_ROUTE[route],
+                      destination_ids=rates_node_ids).generate_file(rates_bin_file_path)
+
     '''
     convert a txt links rates file (e.g. as generated by save_link_rates_to_txt(self...)) to DTK binary migration file 
     '''
@@ -294,10 +347,7 @@ class MigrationGenerator(object):
         net = {}
         net_rate = {}
 
-        MAX_DESTINATIONS_BY_ROUTE = {'local': 90,
-                                     'regional': 90,
-                                     'sea': 5,
-                                     'air': 60}
+        MAX_DESTINATIONS_BY_ROUTE = MigrationGenerator.MAX_DESTINATIONS_BY_ROUTE
 
         for line in fopen:
             s = line.strip().split()
@@ -131,5 +131,7 @@ class SmallWorldGridGraphGenerator(object):
 	'''
 	get shortest paths based on link weights
 	'''
-	def get_shortest_paths(self):
-		return nx.shortest_path_length(self.graph, weight='weight')
\ No newline at end of file
+	def get_shortest_paths(self, cutoff=None):
+		if cutoff is None:
+			return nx.shortest_path_length(self.graph, weight='weight')
+		return nx.all_pairs_dijkstra_path_length(self.graph, cutoff=cutoff, weight='weight')
\ No newline at end of file
@@ -1,4 +1,4 @@
-import struct
+import os
 
 import numpy as np
 
@@ -15,6 +15,33 @@ class SpatialOutput:
 
     @classmethod
     def from_bytes(cls, bytes, filtered=False):
+        # Decode without copy then convert once to the historical int/float64 arrays (writable)
+        so = cls.open(bytes, filtered=filtered)
+        so.nodeids = so.nodeids.astype(np.int64)
+        so.data = so.data.astype(np.float64)
+        return so
+
+    @classmethod
+    def open(cls, source, mmap=True, filtered=None):
+        """
+        Open a spatial report without copying the data.
+        The nodeids and data are read-only views on the file content (float32 for the data).
+        :param source: Path of the SpatialReport file or its content (bytes-like)
+        :param mmap: If source is a path, memory-map the file instead of reading it
+        :param filtered: Is it a filtered spatial report? Defaults to checking 'Filtered' in the file name
+        :return: A SpatialOutput
+        """
+        if isinstance(source, str):
+            if filtered is None:
+                filtered = 'Filtered' in os.path.basename(source)
+            buffer = np.memmap(source, dtype=np.uint8, mode='r') if mmap else np.fromfile(source, dtype=np.uint8)
+        else:
+            buffer = np.frombuffer(source, dtype=np.uint8)
+
+        return cls._from_buffer(buffer, bool(filtered))
+
+    @classmethod
+    def _from_buffer(cls, buffer, filtered):
         # The header size changes if the file is a filtered one
         headersize = 16 if filtered else 8
 
@@ -22,28 +49,91 @@ class SpatialOutput:
         so = cls()
 
         # Retrive the number of nodes and number of timesteps
-        so.n_nodes, = struct.unpack('i', bytes[0:4])
-        so.n_tstep, = struct.unpack('i', bytes[4:8])
+        so.n_nodes, so.n_tstep = (int(v) for v in buffer[0:8].view('<i4'))
 
         # If filtered, retrieve the start and interval
         if filtered:
-            start, = struct.unpack('f', bytes[8:12])
-            interval, = struct.unpack('f', bytes[12:16])
+            start, interval = buffer[8:16].view('<f4')
             so.start = int(start)
             so.interval = int(interval)
 
         # Get the nodeids
-        so.nodeids = struct.unpack(str(so.n_nodes) + 'I', bytes[headersize:headersize + so.n_nodes * 4])
-        so.nodeids = np.asarray(so.nodeids)
+        data_offset = headersize + so.n_nodes * 4
+        so.nodeids = buffer[headersize:data_offset].view('<u4')
 
         # Retrieve the data
-        so.data = struct.unpack(str(so.n_nodes * so.n_tstep) + 'f',
-                                     bytes[headersize + so.n_nodes * 4:headersize + so.n_nodes * 4 + so.n_nodes * so.n_tstep * 4])
-        so.data = np.asarray(so.data)
+        so.data = buffer[data_offset:data_offset + so.n_nodes * so.n_tstep * 4].view('<f4')
         so.data = so.data.reshape(so.n_tstep, so.n_nodes)
 
         return so
 
+    def node_indices(self, nodeids=None):
+        """
+        Column indices of the given nodes in the data matrix.
+        :param nodeids: List of node ids or None for all the nodes
+        :return: Array of indices (or a slice selecting all the nodes)
+        """
+        if nodeids is None:
+            return slice(None)
+
+        nodeids = np.asarray(nodeids)
+        order = np.argsort(self.nodeids)
+        positions = np.searchsorted(self.nodeids, nodeids, sorter=order)
+        positions = np.clip(positions, 0, len(order) - 1)
+        indices = order[positions]
+
+        missing = self.nodeids[indices] != nodeids
+        if missing.any():
+            raise KeyError("Nodes not present in the spatial report: {}".format(nodeids[missing].tolist()))
+
+        return indices
+
+    def select(self, nodeids=None, tstart=0, tend=None):
+        """
+        Extract a subset of the report. Only the selected values are copied.
+        :param nodeids: List of node ids to keep (None for all)
+        :param tstart: First time step (index) to keep
+        :param tend: Time step (index) where to stop (excluded). None for the end of the report
+        :return: A new SpatialOutput
+        """
+        columns = self.node_indices(nodeids)
+        tend = self.n_tstep if tend is None else min(tend, self.n_tstep)
+
+        so = self.__class__()
+        so.data = np.array(self.data[tstart:tend, columns])
+        so.nodeids = np.array(self.nodeids[columns])
+        so.n_tstep, so.n_nodes = so.data.shape
+        so.start = self.start + tstart * self.interval
+        so.interval = self.interval
+        return so
+
+    def aggregate(self, period=7, nodeids=None, tstart=0, tend=None, how='sum'):
+        """
+        Aggregate the report over periods of time steps (weekly by default) one period at a time, never loading more
+        than `period` rows of the selected nodes in memory.
+        The last period may be incomplete.
+        :param period: Number of time steps per period
+        :param nodeids: List of node ids to aggregate (None for all)
+        :param tstart: First time step (index) considered
+        :param tend: Time step (index) where to stop (excluded). None for the end of the report
+        :param how: 'sum' or 'mean'
+        :return: Array of shape (number of periods, number of nodes) in float64
+        """
+        if how not in ('sum', 'mean'):
+            raise ValueError("how should be 'sum' or 'mean', got {}".format(how))
+
+        columns = self.node_indices(nodeids)
+        tend = self.n_tstep if tend is None else min(tend, self.n_tstep)
+        n_columns = self.n_nodes if isinstance(columns, slice) else len(columns)
+
+        starts = range(tstart, tend, period)
+        result = np.empty((len(starts), n_columns), dtype=np.float64)
+        for i, t in enumerate(starts):
+            chunk = self.data[t:min(t + period, tend), columns]
+            result[i] = chunk.sum(axis=0, dtype=np.float64) if how == 'sum' else chunk.mean(axis=0, dtype=np.float64)
+
+        return result
+
     def to_dict(self):
         return {'n_nodes' : self.n_nodes,
                 'n_tstep' : self.n_tstep,
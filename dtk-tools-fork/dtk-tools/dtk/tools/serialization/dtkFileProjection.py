@@ -0,0 +1,222 @@
+#!/usr/bin/python
+
+"""
+Projection of selected fields out of the JSON text of serialized objects without building the whole object tree.
+
+A path selects values with dotted keys, [*] for every element of an array and [n] for a single element, e.g.
+    m_vectorpopulations[*].AdultQueues[*].state
+    individualHumans[*].m_age
+The text is scanned once for all the paths: the keys off the paths are skipped over (by regular expressions, in C)
+and only the selected values and the small elements of the arrays on the paths (e.g. one human or one cohort, up
+to ELEMENT_SIZE characters) are decoded, so the memory needed is the size of the text rather than the size of the
+decoded node.
+"""
+
+from . import dtkFileSupport as support
+import json
+import re
+
+WILDCARD = '*'
+ELEMENT_SIZE = 1 << 16
+
+_TOKEN = re.compile(r'([^.\[\]]+)|\[(\*|\d+)\]')
+_STRING = re.compile(r'"[^"\\]*(?:\\.[^"\\]*)*"')
+# Everything up to the next bracket, strings (which may hold brackets) included
+_SKIP = re.compile(r'(?:[^"\[\]{}]+|"[^"\\]*(?:\\.[^"\\]*)*")*')
+_SCALAR = re.compile(r'[^,\]}\s]+')
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+
+__decoder__ = json.JSONDecoder(object_hook=support.SerialObject)
+
+
+def parse_path(path):
+    """
+    :return: The keys (str), indices (int) and wildcards of a path, e.g. ['individualHumans', '*', 'm_age']
+    """
+    tokens = []
+    position = 0
+    while position < len(path):
+        if path[position] == '.' and tokens:
+            position += 1
+        match = _TOKEN.match(path, position)
+        if match is None:
+            raise ValueError("Invalid projection path '{0}'".format(path))
+        key, index = match.groups()
+        tokens.append(key if key is not None else (index if index == WILDCARD else int(index)))
+        position = match.end()
+    if not tokens:
+        raise ValueError("Empty projection path")
+    return tokens
+
+
+class PathTree(dict):
+    """
+    Tree of the tokens of several paths, the paths ending at a node being listed in its 'paths' attribute.
+    """
+
+    def __init__(self):
+        super(PathTree, self).__init__()
+        self.paths = []
+        return
+
+    @classmethod
+    def from_paths(cls, paths):
+        tree = cls()
+        for path in paths:
+            node = tree
+            for token in parse_path(path):
+                node = node.setdefault(token, cls())
+            node.paths.append(path)
+        return tree
+
+
+def project(text, paths):
+    """
+    Extract the values selected by the paths from the JSON text of an object.
+    :param text: JSON text (str)
+    :param paths: List of paths
+    :return: {path: [values in document order]}
+    """
+    tree = PathTree.from_paths(paths)
+    results = {path: [] for path in paths}
+    _walk_value(text, _skip_whitespace(text, 0), tree, results)
+    return results
+
+
+def project_object(item, paths):
+    """
+    Same as project() for an object already decoded.
+    """
+    tree = PathTree.from_paths(paths)
+    results = {path: [] for path in paths}
+    _extract(item, tree, results)
+    return results
+
+
+def _extract(item, tree, results):
+    for path in tree.paths:
+        results[path].append(item)
+    for token, child in tree.items():
+        if token == WILDCARD:
+            if isinstance(item, list):
+                for element in item:
+                    _extract(element, child, results)
+        elif isinstance(token, int):
+            if isinstance(item, list) and -len(item) <= token < len(item):
+                _extract(item[token], child, results)
+        elif isinstance(item, dict) and token in item:
+            _extract(item[token], child, results)
+    return
+
+
+def _skip_whitespace(text, position):
+    return _WHITESPACE.match(text, position).end()
+
+
+def _walk_value(text, position, tree, results):
+    """
+    :return: The position after the value starting at position
+    """
+    if tree.paths:
+        # The value itself is selected, decode it and pick the values selected below it if any
+        item, end = __decoder__.raw_decode(text, position)
+        _extract(item, tree, results)
+        return end
+
+    character = text[position]
+    if character == '{':
+        return _walk_object(text, position, tree, results)
+    if character == '[':
+        return _walk_array(text, position, tree, results)
+    return _skip_value(text, position)
+
+
+def _walk_object(text, position, tree, results):
+    position = _skip_whitespace(text, position + 1)
+    if text[position] == '}':
+        return position + 1
+
+    while True:
+        match = _STRING.match(text, position)
+        key = match.group()[1:-1]
+        if '\\' in key:
+            key = json.loads(match.group())
+        position = _skip_whitespace(text, match.end())
+        position = _skip_whitespace(text, position + 1)     # ':'
+
+        if key in tree:
+            position = _walk_value(text, position, tree[key], results)
+        else:
+            position = _skip_value(text, position)
+
+        position = _skip_whitespace(text, position)
+        if text[position] == '}':
+            return position + 1
+        position = _skip_whitespace(text, position + 1)     # ','
+
+
+def _walk_array(text, position, tree, results):
+    position = _skip_whitespace(text, position + 1)
+    if text[position] == ']':
+        return position + 1
+
+    index = 0
+    while True:
+        child = tree.get(WILDCARD)
+        if index in tree:
+            # The same element may be selected by [*] and [index]
+            child = tree[index] if child is None else _merge(child, tree[index])
+
+        if child is not None and not child.paths and text[position] in '{[':
+            # Elements holding the selected values (e.g. one human) are walked if they are large
+            end = _skip_value(text, position)
+            if end - position <= ELEMENT_SIZE:
+                # Decoding a small element at once is faster than walking it
+                item, end = __decoder__.raw_decode(text, position)
+                _extract(item, child, results)
+            else:
+                _walk_value(text, position, child, results)
+            position = end
+        elif child is not None:
+            position = _walk_value(text, position, child, results)
+        else:
+            position = _skip_value(text, position)
+        index += 1
+
+        position = _skip_whitespace(text, position)
+        if text[position] == ']':
+            return position + 1
+        position = _skip_whitespace(text, position + 1)     # ','
+
+
+def _merge(first, second):
+    merged = PathTree()
+    merged.paths = first.paths + second.paths
+    for token in set(first) | set(second):
+        if token in first and token in second:
+            merged[token] = _merge(first[token], second[token])
+        else:
+            merged[token] = first[token] if token in first else second[token]
+    return merged
+
+
+def _skip_value(text, position):
+    character = text[position]
+    if character == '"':
+        return _STRING.match(text, position).end()
+    if character != '{' and character != '[':
+        return _SCALAR.match(text, position).end()
+
+    depth = 0
+    while True:
+        character = text[position]
+        if character == '{' or character == '[':
+            depth += 1
+        elif character == '}' or character == ']':
+            depth -= 1
+        else:
+            raise ValueError("Invalid JSON at position {0}".format(position))
+        position += 1
+        if depth == 0:
+            return position
+        position = _SKIP.match(text, position).end()
@@ -8,7 +8,7 @@ class Uncompressed(object):
 
     @classmethod
     def compress(cls, data):
-        return data
+        return data.encode() if isinstance(data, str) else data
 
     @classmethod
     def uncompress(cls, data):
@@ -31,4 +31,8 @@ class SerialObject(dict):
     def __init__(self, dictionary={}):
         super(SerialObject, self).__init__(dictionary)
         self.__dict__ = self
-        return
\ No newline at end of file
+        return
+
+    def __reduce__(self):
+        # __dict__ is the object itself, rebuild it from its items (pickle for the process pools, deepcopy)
+        return self.__class__, (dict(self),)
\ No newline at end of file
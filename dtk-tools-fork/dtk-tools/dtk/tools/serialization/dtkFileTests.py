@@ -3,6 +3,8 @@
 from __future__ import print_function
 import dtkFileTools as dft
 import dtkFileSupport as support
+import dtkFileProjection as projection
+import json
 import os
 import tempfile
 import unittest
@@ -441,6 +443,172 @@ class TestReadingSadPath(unittest.TestCase):
         return
 
 
+def double_first_node_birth_rate(node):
+    # Module level so it can be sent to the worker processes
+    if node.externalId != 1:
+        return False
+    node.x_birth *= 2
+    return True
+
+
+class TestLazyReading(unittest.TestCase):
+
+    def test_reading_file(self):
+        eager = dft.read('test-data/version4.dtk')
+        lazy = dft.read('test-data/version4.dtk', lazy=True)
+        self.assertEqual(eager.chunk_sizes, lazy.chunk_sizes)
+        self.assertTrue(all(lazy.chunks.is_mapped(index) for index in range(lazy.chunk_count)))
+        self.assertEqual(eager.simulation, lazy.simulation)
+        self.assertEqual([node.externalId for node in eager.nodes], [node.externalId for node in lazy.nodes])
+        self.assertEqual(2500, len(lazy.nodes[3].individualHumans))
+        return
+
+    def test_truncated_file(self):
+        with self.assertRaises(UserWarning):
+            dft.read('test-data/truncated.dtk', lazy=True)
+        return
+
+    def test_cache(self):
+        dtk = dft.read('test-data/version4.dtk', lazy=True, cache_size=2)
+        node = dtk.nodes[0]
+        self.assertIs(node, dtk.nodes[0])
+        dtk.nodes[1]
+        dtk.nodes[2]
+        self.assertEqual([2, 3], list(dtk.__cache__.keys()))
+        self.assertIsNot(node, dtk.nodes[0])
+        # Assigning an object re-encodes its chunk and drops it from the cache
+        dtk.nodes[2] = dtk.nodes[2]
+        self.assertFalse(dtk.chunks.is_mapped(3))
+        self.assertNotIn(3, dtk.__cache__)
+        return
+
+    def test_read_after_mutate(self):
+        # Eager reads do not cache: modifying a node without assigning it back does not change the next reads
+        eager = dft.read('test-data/version4.dtk')
+        x_birth = eager.nodes[0].x_birth
+        eager.nodes[0].x_birth = 2 * x_birth
+        self.assertEqual(x_birth, eager.nodes[0].x_birth)
+        self.assertEqual(0, len(eager.__cache__))
+
+        # Lazy reads return the cached node
+        lazy = dft.read('test-data/version4.dtk', lazy=True)
+        lazy.nodes[0].x_birth = 2 * x_birth
+        self.assertEqual(2 * x_birth, lazy.nodes[0].x_birth)
+        lazy = dft.read('test-data/version4.dtk', lazy=True, cache_size=0)
+        lazy.nodes[0].x_birth = 2 * x_birth
+        self.assertEqual(x_birth, lazy.nodes[0].x_birth)
+        return
+
+    def test_parallel_decoding(self):
+        dtk = dft.read('test-data/version4.dtk', lazy=True)
+        decoded = list(dtk.objects.decoded(range(1, 5), processes=2))
+        self.assertEqual([1, 2, 3, 4], [index for index, node in decoded])
+        self.assertEqual([1, 2, 3, 4], [node.externalId for index, node in decoded])
+        return
+
+    def test_transform_nodes(self):
+        source = dft.read('test-data/version4.dtk', lazy=True)
+        x_birth = source.nodes[0].x_birth
+        self.assertEqual([0], source.transform_nodes(double_first_node_birth_rate, processes=2))
+
+        handle, filename = tempfile.mkstemp()
+        os.close(handle)
+        dft.write(source, filename)
+
+        original = dft.read('test-data/version4.dtk')
+        dest = dft.read(filename, lazy=True)
+        self.assertEqual(2 * x_birth, dest.nodes[0].x_birth)
+        # Only the modified chunk was re-encoded
+        self.assertNotEqual(original.chunks[1], dest.chunks[1])
+        for index in [0, 2, 3, 4]:
+            self.assertEqual(original.chunks[index], dest.chunks[index])
+
+        # Overwriting the mapped file
+        self.assertEqual([0], dest.transform_nodes(double_first_node_birth_rate, processes=1))
+        dft.write(dest, filename)
+        self.assertEqual(4 * x_birth, dft.read(filename).nodes[0].x_birth)
+        os.remove(filename)
+        return
+
+
+class RecordingDecoder(object):
+    """
+    Keep track of the size of the JSON text decoded by the projection.
+    """
+    def __init__(self, decoder):
+        self.decoder = decoder
+        self.sizes = []
+
+    def raw_decode(self, text, position):
+        item, end = self.decoder.raw_decode(text, position)
+        self.sizes.append(end - position)
+        return item, end
+
+
+class TestProjection(unittest.TestCase):
+
+    def test_parse_path(self):
+        self.assertEqual(['m_vectorpopulations', '*', 'AdultQueues', 0, 'state'],
+                         projection.parse_path('m_vectorpopulations[*].AdultQueues[0].state'))
+        for path in ['', 'a..b', 'a[x]']:
+            with self.assertRaises(ValueError):
+                projection.parse_path(path)
+        return
+
+    def test_project_text(self):
+        text = '{"a" : [ {"b":"x]}\\"{", "c":[1,2]}, {"c":[3]} ], "k\\u0041":{"z":[1]}, "e":[], "n":[[1,[2]],{}]}'
+        paths = ['a[*].c[*]', 'a[1].c', 'kA.z[0]', 'e[*]', 'a[*].b', 'n[*][0]', 'missing']
+        expected = {'a[*].c[*]': [1, 2, 3], 'a[1].c': [[3]], 'kA.z[0]': [1], 'e[*]': [], 'a[*].b': ['x]}"{'],
+                    'n[*][0]': [1], 'missing': []}
+        self.assertEqual(expected, projection.project(text, paths))
+        self.assertEqual(expected, projection.project_object(json.loads(text), paths))
+        return
+
+    def test_project_nodes(self):
+        paths = ['externalId', 'individualHumans[*].m_age', 'individualHumans[*].infections[*]',
+                 'm_vectorpopulations[*].AdultQueues[*].population']
+        for version in [2, 3, 4]:
+            filename = 'test-data/version{0}.dtk'.format(version)
+            expected = [projection.project_object(node, paths) for node in dft.read(filename).nodes]
+            projected = list(dft.read(filename, lazy=True).project_nodes(paths, processes=2))
+            self.assertEqual(list(range(len(expected))), [index for index, values in projected])
+            self.assertEqual(expected, [values for index, values in projected])
+        return
+
+    def test_large_elements(self):
+        # Elements larger than ELEMENT_SIZE are walked instead of decoded
+        dtk = dft.read('test-data/version4.dtk', lazy=True)
+        paths = ['individualHumans[*].infections[*]', 'individualHumans[*].suid.id']
+        expected = list(dtk.project_nodes(paths, processes=1))
+        element_size = projection.ELEMENT_SIZE
+        projection.ELEMENT_SIZE = 0
+        try:
+            self.assertEqual(expected, list(dtk.project_nodes(paths, processes=1)))
+        finally:
+            projection.ELEMENT_SIZE = element_size
+        return
+
+    def test_decoded_size(self):
+        # Without wildcard only the selected values (and the selected array elements) are decoded, not the whole node
+        dtk = dft.read('test-data/version4.dtk', lazy=True)
+        text = dtk.contents[1]
+        text = text.decode() if isinstance(text, bytes) else text
+        paths = ['externalId', 'individualHumans[3].m_age', 'individualHumans[3]']
+        expected = projection.project_object(dtk.nodes[0], paths)
+        self.assertEqual(1, len(expected['individualHumans[3].m_age']))
+
+        decoder = RecordingDecoder(projection.__dict__['__decoder__'])
+        original, projection.__dict__['__decoder__'] = projection.__dict__['__decoder__'], decoder
+        try:
+            self.assertEqual(expected, projection.project(text, paths))
+            self.assertEqual([(index, {'externalId': [node.externalId]}) for index, node in enumerate(dtk.nodes)],
+                             list(dtk.project_nodes(['externalId'], processes=1)))
+        finally:
+            projection.__dict__['__decoder__'] = original
+        self.assertLess(max(decoder.sizes), len(text) / 100)
+        return
+
+
 class TestRegressions(unittest.TestCase):
 
     # https://github.com/InstituteforDiseaseModeling/DtkTrunk/issues/1268
@@ -6,11 +6,23 @@ Support for three formats of serialized population files:
 2. "First chunked version": multiple payload chunks, one for simulation and one each for nodes
 3. "Second chunked version": multiple payload chunks, simulation and node objects are "root" objects in each chunk
 4. "Metadata update": compressed: true|false + engine: NONE|LZ4|SNAPPY replaced with compression: NONE|LZ4|SNAPPY
+
+Large files can be read lazily (read(filename, lazy=True)): the chunks are memory-mapped and only decompressed and
+parsed when accessed. Decoded objects are kept in an LRU cache (DtkFile.cache_size objects, lazy reads only),
+chunks can be decoded or transformed in a process pool (DtkFile.objects.decoded(),
+DtkFile.transform_objects()/transform_nodes()), and only the modified chunks are re-encoded, the others being copied
+as is when writing.
+Summaries needing a few fields of the nodes can project them (DtkFile.project_nodes(), see dtkFileProjection)
+instead of decoding whole nodes.
 """
 
+from . import dtkFileProjection as projection
 from . import dtkFileSupport as support
+from collections import OrderedDict
 import copy
 import json
+import mmap
+import multiprocessing
 import os
 import snappy
 import time
@@ -20,6 +32,7 @@ NONE = 'NONE'
 LZ4 = 'LZ4'
 SNAPPY = 'SNAPPY'
 MAX_VERSION = 4
+DEFAULT_CACHE_SIZE = 16
 
 
 __engines__ = {LZ4: support.EllZeeFour, SNAPPY: snappy, NONE: support.Uncompressed}
@@ -39,6 +52,150 @@ def compress(data, engine):
         raise RuntimeError("Unknown compression scheme '{0}'".format(engine))
 
 
+def decode(data, engine):
+    return json.loads(uncompress(data, engine), object_hook=support.SerialObject)
+
+
+def encode(item, engine):
+    return compress(json.dumps(item, separators=(',', ':')), engine)
+
+
+def __load_chunk__(source):
+    # Mapped chunks are sent to the workers as (filename, offset, size) and read there
+    if isinstance(source, tuple):
+        filename, offset, size = source
+        with open(filename, 'rb') as handle:
+            handle.seek(offset)
+            return handle.read(size)
+    return source
+
+
+def __decode_chunk__(task):
+    index, source, engine = task
+    try:
+        return index, decode(__load_chunk__(source), engine)
+    except Exception:
+        raise UserWarning("Could not parse JSON in chunk {0}".format(index))
+
+
+def __transform_chunk__(task):
+    index, source, engine, function = task
+    index, item = __decode_chunk__((index, source, engine))
+    if not function(item):
+        return index, None
+    return index, encode(item, engine)
+
+
+def __project_chunk__(task):
+    index, source, engine, paths = task
+    try:
+        text = uncompress(__load_chunk__(source), engine)
+        text = text.decode() if isinstance(text, bytes) else text
+        return index, projection.project(text, paths)
+    except Exception:
+        raise UserWarning("Could not parse JSON in chunk {0}".format(index))
+
+
+def __run__(worker, tasks, processes):
+    """
+    Apply worker to the tasks, in order, in a process pool unless processes is 1.
+    processes=None uses all the cpus.
+    """
+    if processes == 1 or len(tasks) <= 1:
+        for task in tasks:
+            yield worker(task)
+        return
+
+    pool = multiprocessing.Pool(processes)
+    try:
+        for result in pool.imap(worker, tasks):
+            yield result
+    finally:
+        pool.terminate()
+
+
+class ChunkList(object):
+    """
+    List of the (compressed) chunks of a file. Chunks are either held in memory or read on demand from a
+    memory-mapped file; assigning a chunk keeps it in memory.
+    """
+
+    def __init__(self, count=0):
+        self._chunks = [None for index in range(count)]
+        self._locations = [None for index in range(count)]
+        self._mapped = None
+        self.filename = None
+        return
+
+    @classmethod
+    def from_file(cls, handle, filename, sizes):
+        chunks = cls(len(sizes))
+        chunks._mapped = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        chunks.filename = os.path.abspath(filename)
+
+        offset = handle.tell()
+        for index, size in enumerate(sizes):
+            if offset + size > len(chunks._mapped):
+                raise UserWarning("Only read {0} bytes of {1} for chunk {2} of file '{3}'".format(
+                    max(len(chunks._mapped) - offset, 0), size, index, filename))
+            chunks._locations[index] = (offset, size)
+            offset += size
+        return chunks
+
+    def __getitem__(self, index):
+        if self._chunks[index] is not None or self._locations[index] is None:
+            return self._chunks[index]
+        offset, size = self._locations[index]
+        return self._mapped[offset:offset + size]
+
+    def __setitem__(self, index, value):
+        self._chunks[index] = value
+        self._locations[index] = None
+        return
+
+    def append(self, value):
+        self._chunks.append(value)
+        self._locations.append(None)
+        return
+
+    def __len__(self):
+        return len(self._chunks)
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self.__getitem__(index)
+
+    def size(self, index):
+        if self._locations[index] is not None:
+            return self._locations[index][1]
+        chunk = self._chunks[index]
+        return len(chunk) if chunk is not None else 0
+
+    def is_mapped(self, index):
+        return self._locations[index] is not None
+
+    def source(self, index):
+        """
+        :return: The chunk if held in memory, (filename, offset, size) if it is in the mapped file
+        """
+        if self._locations[index] is not None:
+            offset, size = self._locations[index]
+            return self.filename, offset, size
+        return self._chunks[index]
+
+    def load(self):
+        """
+        Read all the mapped chunks in memory and release the mapped file (e.g. before overwriting it)
+        """
+        for index in range(len(self)):
+            if self._locations[index] is not None:
+                self[index] = self.__getitem__(index)
+        if self._mapped is not None:
+            self._mapped.close()
+            self._mapped = None
+        return
+
+
 class DtkHeader(support.SerialObject):
     # noinspection PyDefaultArgument
     def __init__(self, dictionary={
@@ -83,6 +240,7 @@ class DtkFile(object):
         def __setitem__(self, index, value):
             data = compress(value, self.__parent__.compression)
             self.__parent__.chunks[index] = data
+            self.__parent__.__uncache__(index)
             return
 
         def append(self, item):
@@ -105,13 +263,40 @@ class DtkFile(object):
                 index += 1
 
         def __getitem__(self, index):
+            parent = self.__parent__
+            index = parent.__chunk_index__(index)
+            if index in parent.__cache__:
+                parent.__cache__.move_to_end(index)
+                return parent.__cache__[index]
+
             try:
-                contents = self.__parent__.contents[index]
+                contents = parent.contents[index]
                 item = json.loads(contents, object_hook=support.SerialObject)
             except Exception as e:
                 raise UserWarning("Could not parse JSON in chunk {0}".format(index))
+            parent.__cache_object__(index, item)
             return item
 
+        def decoded(self, indices=None, processes=None):
+            """
+            Iterate over (index, object) for the given chunk indices (all by default), decoding the chunks in a
+            process pool (processes=None uses all the cpus). The decoded objects go through the LRU cache.
+            """
+            parent = self.__parent__
+            indices = range(len(self)) if indices is None else [parent.__chunk_index__(index) for index in indices]
+            tasks = [(index, parent.chunks.source(index), parent.compression)
+                     for index in indices if index not in parent.__cache__]
+            results = __run__(__decode_chunk__, tasks, processes)
+
+            for index in indices:
+                if index in parent.__cache__:
+                    yield index, self.__getitem__(index)
+                else:
+                    _, item = next(results)
+                    parent.__cache_object__(index, item)
+                    yield index, item
+            return
+
         def __setitem__(self, index, value):
             contents = json.dumps(value, separators=(',', ':'))
             self.__parent__.contents[index] = contents
@@ -128,9 +313,62 @@ class DtkFile(object):
 
     def __init__(self, header):
         self.__header__ = header
-        self._chunks = [None for index in range(header.chunkcount)]
+        self._chunks = ChunkList(header.chunkcount)
         self.contents = self.Contents(self)
         self.objects = self.Objects(self)
+        self.cache_size = 0
+        self.__cache__ = OrderedDict()
+        return
+
+    def __chunk_index__(self, index):
+        return index + len(self.chunks) if index < 0 else index
+
+    def __cache_object__(self, index, item):
+        self.__cache__[index] = item
+        self.__cache__.move_to_end(index)
+        while len(self.__cache__) > self.cache_size:
+            self.__cache__.popitem(last=False)
+        return
+
+    def __uncache__(self, index):
+        self.__cache__.pop(self.__chunk_index__(index), None)
+        return
+
+    def transform_objects(self, function, indices=None, processes=None):
+        """
+        Apply function to the objects of the given chunks (all by default) in a process pool and re-encode only
+        the chunks of the objects it modified.
+        :param function: Picklable function modifying an object in place and returning True if it changed it
+        :param processes: Number of processes, None for all the cpus, 1 to run in this process
+        :return: The indices of the modified chunks
+        """
+        indices = range(self.chunk_count) if indices is None else [self.__chunk_index__(index) for index in indices]
+        tasks = [(index, self.chunks.source(index), self.compression, function) for index in indices]
+
+        modified = []
+        for index, chunk in __run__(__transform_chunk__, tasks, processes):
+            if chunk is not None:
+                self._chunks[index] = chunk
+                self.__uncache__(index)
+                modified.append(index)
+        return modified
+
+    def project_objects(self, paths, indices=None, processes=None):
+        """
+        Iterate over (index, {path: values}) for the objects of the given chunks (all by default), extracting the
+        values selected by the paths (e.g. 'individualHumans[*].m_age', see dtkFileProjection) without decoding
+        the whole objects. Chunks are processed in a process pool (processes=None uses all the cpus).
+        """
+        indices = range(self.chunk_count) if indices is None else [self.__chunk_index__(index) for index in indices]
+        tasks = [(index, self.chunks.source(index), self.compression, paths)
+                 for index in indices if index not in self.__cache__]
+        results = __run__(__project_chunk__, tasks, processes)
+
+        for index in indices:
+            if index in self.__cache__:
+                yield index, projection.project_object(self.__cache__[index], paths)
+            else:
+                yield next(results)
         return
 
     @property
@@ -169,7 +407,7 @@ class DtkFile(object):
 
     @property
     def chunk_sizes(self):
-        sizes = [len(chunk) for chunk in self.chunks]
+        sizes = [self.chunks.size(index) for index in range(len(self.chunks))]
         return sizes
 
     # Optional header entries
@@ -215,7 +453,7 @@ class DtkFile(object):
 
         self.__header__.date = time.strftime('%a %b %d %H:%M:%S %Y')
         self.__header__.chunkcount = len(self.chunks)
-        self.__header__.chunksizes = [len(chunk) for chunk in self.chunks]
+        self.__header__.chunksizes = self.chunk_sizes
         self.__header__.bytecount = sum(self.__header__.chunksizes)
 
         return
@@ -249,6 +487,42 @@ class DtkFileV1(DtkFile):
         self.objects[0] = {'simulation': value}
         return
 
+    def transform_nodes(self, function, processes=None):
+        """
+        Apply function (modifying a node in place and returning True if it changed it) to each node.
+        All the nodes of a version 1 file are in the same chunk so they are processed in this process.
+        :return: The indices of the modified nodes
+        """
+        root = self.objects[0]
+        entries = root.simulation.nodes
+        modified = [index for index, entry in enumerate(entries) if function(entry.node)]
+        if modified:
+            self.objects[0] = root
+        self._nodes = [entry.node for entry in entries]
+        return modified
+
+    def project_nodes(self, paths, processes=None):
+        """
+        Iterate over (node index, {path: values}), see DtkFile.project_objects().
+        The nodes of a version 1 file are decoded when reading it, the values are picked from them.
+        """
+        for index, node in enumerate(self.nodes):
+            yield index, projection.project_object(node, paths)
+        return
+
+
+class NodeEntryFunction(object):
+    """
+    Apply a node function to the {'suid':{'id':id},'node':{...}} entries of version 2 files (picklable, unlike a
+    closure).
+    """
+    def __init__(self, function):
+        self.function = function
+        return
+
+    def __call__(self, entry):
+        return self.function(entry.node)
+
 
 class DtkFileV2(DtkFile):
 
@@ -277,25 +551,47 @@ class DtkFileV2(DtkFile):
             length = self.__parent__.chunk_count - 1
             return length
 
-    def __init__(self, header=DtkHeader(), filename='', handle=None):
+    def __init__(self, header=DtkHeader(), filename='', handle=None, lazy=False):
         header.version = 2
         super(DtkFileV2, self).__init__(header)
-        for index, size in enumerate(header.chunksizes):
-            self.chunks[index] = handle.read(size)
-            if len(self.chunks[index]) != size:
-                raise UserWarning(
-                    "Only read {0} bytes of {1} for chunk {2} of file '{3}'".format(len(self.chunks[index]),
-                                                                                    size, index, filename))
+        if lazy and handle is not None:
+            self._chunks = ChunkList.from_file(handle, filename, header.chunksizes)
+            self.cache_size = DEFAULT_CACHE_SIZE
+        else:
+            for index, size in enumerate(header.chunksizes):
+                self.chunks[index] = handle.read(size)
+                if len(self.chunks[index]) != size:
+                    raise UserWarning(
+                        "Only read {0} bytes of {1} for chunk {2} of file '{3}'".format(len(self.chunks[index]),
+                                                                                        size, index, filename))
         # Version 2 looks like this: {'simulation':{...}} so we dereference the simulation here for simplicity.
         self._nodes = self.NodesV2(self)
         return
 
     @property
     def simulation(self):
-        sim = self.objects[0]['simulation']
-        del sim['nodes']
+        # Copy as the decoded objects are cached
+        sim = support.SerialObject(self.objects[0]['simulation'])
+        sim.pop('nodes', None)
         return sim
 
+    def transform_nodes(self, function, processes=None):
+        """
+        Apply function to each node in a process pool, see DtkFile.transform_objects().
+        :return: The indices of the modified nodes
+        """
+        modified = self.transform_objects(NodeEntryFunction(function), range(1, self.chunk_count), processes)
+        return [index - 1 for index in modified]
+
+    def project_nodes(self, paths, processes=None):
+        """
+        Iterate over (node index, {path: values}), see DtkFile.project_objects().
+        """
+        entry_paths = ['node.' + path for path in paths]
+        for index, values in self.project_objects(entry_paths, range(1, self.chunk_count), processes):
+            yield index - 1, {path: values[entry_path] for path, entry_path in zip(paths, entry_paths)}
+        return
+
     @simulation.setter
     def simulation(self, value):
         sim = copy.deepcopy(value)
@@ -329,25 +625,46 @@ class DtkFileV3(DtkFile):
             length = self.__parent__.chunk_count - 1
             return length
 
-    def __init__(self, header=DtkHeader(), filename='', handle=None):
+    def __init__(self, header=DtkHeader(), filename='', handle=None, lazy=False):
         header.version = 3
         super(DtkFileV3, self).__init__(header)
-        for index, size in enumerate(header.chunksizes):
-            self.chunks[index] = handle.read(size)
-            if len(self.chunks[index]) != size:
-                raise UserWarning("Only read {0} bytes of {1} for chunk {2} of file '{3}'".format(len(self.chunks[index]), size, index, filename))
+        if lazy and handle is not None:
+            self._chunks = ChunkList.from_file(handle, filename, header.chunksizes)
+            self.cache_size = DEFAULT_CACHE_SIZE
+        else:
+            for index, size in enumerate(header.chunksizes):
+                self.chunks[index] = handle.read(size)
+                if len(self.chunks[index]) != size:
+                    raise UserWarning("Only read {0} bytes of {1} for chunk {2} of file '{3}'".format(len(self.chunks[index]), size, index, filename))
         self._nodes = self.NodesV3(self)
         return
 
     @property
     def simulation(self):
         if len(self.objects) > 0:
-            sim = self.objects[0]
-            del sim['nodes']
+            # Copy as the decoded objects are cached
+            sim = support.SerialObject(self.objects[0])
+            sim.pop('nodes', None)
         else:
             sim = {}
         return sim
 
+    def transform_nodes(self, function, processes=None):
+        """
+        Apply function to each node in a process pool, see DtkFile.transform_objects().
+        :return: The indices of the modified nodes
+        """
+        modified = self.transform_objects(function, range(1, self.chunk_count), processes)
+        return [index - 1 for index in modified]
+
+    def project_nodes(self, paths, processes=None):
+        """
+        Iterate over (node index, {path: values}), see DtkFile.project_objects().
+        """
+        for index, values in self.project_objects(paths, range(1, self.chunk_count), processes):
+            yield index - 1, values
+        return
+
     @simulation.setter
     def simulation(self, value):
         sim = copy.deepcopy(value)
@@ -360,13 +677,20 @@ class DtkFileV3(DtkFile):
 
 class DtkFileV4(DtkFileV3):
 
-    def __init__(self, header=DtkHeader(), filename='', handle=None):
-        super(DtkFileV4, self).__init__(header, filename, handle)
+    def __init__(self, header=DtkHeader(), filename='', handle=None, lazy=False):
+        super(DtkFileV4, self).__init__(header, filename, handle, lazy)
         header.version = 4
         return
 
 
-def read(filename):
+def read(filename, lazy=False, cache_size=None):
+    """
+    Read a serialized population file.
+    :param lazy: Memory-map the chunks instead of reading them all (versions 2+)
+    :param cache_size: Number of decoded objects kept in memory. None for DEFAULT_CACHE_SIZE on lazy reads and no
+    cache otherwise (each access decodes a new object). A cached object is returned as is by the next accesses, so
+    modifying it without assigning it back also changes what is read later
+    """
 
     new_file = None
     with open(filename, 'rb') as handle:
@@ -375,14 +699,16 @@ def read(filename):
         if header.version == 1:
             new_file = DtkFileV1(header, filename=filename, handle=handle)
         elif header.version == 2:
-            new_file = DtkFileV2(header, filename=filename, handle=handle)
+            new_file = DtkFileV2(header, filename=filename, handle=handle, lazy=lazy)
         elif header.version == 3:
-            new_file = DtkFileV3(header, filename=filename, handle=handle)
+            new_file = DtkFileV3(header, filename=filename, handle=handle, lazy=lazy)
         elif header.version == 4:
-            new_file = DtkFileV4(header, filename=filename, handle=handle)
+            new_file = DtkFileV4(header, filename=filename, handle=handle, lazy=lazy)
         else:
             raise UserWarning('Unknown serialized population file version: {0}'.format(header.version))
 
+    if cache_size is not None:
+        new_file.cache_size = cache_size
     return new_file
 
 
@@ -453,6 +779,11 @@ def write(dtk_file, filename):
     # noinspection PyProtectedMember
     dtk_file._sync_header()
 
+    # The unmodified chunks of a lazily read file come from the mapped source, read them before overwriting it
+    source = dtk_file.chunks.filename
+    if source is not None and os.path.exists(filename) and os.path.samefile(source, filename):
+        dtk_file.chunks.load()
+
     with open(filename, 'wb') as handle:
         __write_magic_number__(handle)
         if dtk_file.version <= 3:
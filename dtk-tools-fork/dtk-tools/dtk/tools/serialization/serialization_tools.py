@@ -1,3 +1,5 @@
+from functools import partial
+
 from . import dtkFileTools as dtk
 
 STATE_ADULT = 1         # implies female, I believe
@@ -9,26 +11,16 @@ _endings = [ 'th', 'st', 'nd', 'rd', 'th', 'th', 'th', 'th', 'th', 'th' ]
 # functions need comments and/or cleaning.
 
 
-def zero_infections(source_filename, dest_filename, ignore_nodes=[], keep_individuals=[]):
+def zero_infections(source_filename, dest_filename, ignore_nodes=[], keep_individuals=[], processes=None):
     print('Ignoring nodes {0}'.format(ignore_nodes))
     print('Keeping infections in humans {0}'.format(keep_individuals))
 
     print("Reading file: '{0}'".format(source_filename))
-    source = dtk.read(source_filename)
-
-    for index in range(0, len(source.nodes)):
-        print('Reading {0}{1} node'.format(index, _endings[index%10]), end='')
-        node = source.nodes[index]
-        print(', externalId = {0}'.format(node.externalId))
-        if node.externalId not in ignore_nodes:
-            print('Zeroing vector infections')
-            zero_vector_infections(node.m_vectorpopulations)
-            print('Zeroing human infections')
-            zero_human_infections(node.individualHumans, keep_individuals)
-            print('Saving updated node')
-            source.nodes[index] = node
-        else:
-            print('Ignoring node {0}'.format(index))
+    source = dtk.read(source_filename, lazy=True)
+
+    # Nodes are decoded, updated and re-encoded in a process pool
+    modified = source.transform_nodes(partial(zero_node_infections, ignore_nodes, keep_individuals), processes)
+    print('Zeroed infections in {0} of {1} nodes'.format(len(modified), len(source.nodes)))
 
     print("Writing file: '{0}'".format(dest_filename))
     dtk.write(source, dest_filename)
@@ -36,6 +28,14 @@ def zero_infections(source_filename, dest_filename, ignore_nodes=[], keep_indivi
     return
 
 
+def zero_node_infections(ignore_nodes, keep_individuals, node):
+    if node.externalId in ignore_nodes:
+        return False
+    zero_vector_infections(node.m_vectorpopulations)
+    zero_human_infections(node.individualHumans, keep_individuals)
+    return True
+
+
 def zero_vector_infections(vectors, remove=False):
 
     for vector_population in vectors:
@@ -72,6 +72,28 @@ def zero_vector_infections(vectors, remove=False):
     return
 
 
+def count_vectors_by_state(source_filename, processes=None):
+    """
+    Count the female vectors of each node by state, only the vector cohorts are decoded (see DtkFile.project_nodes).
+    :return: {node externalId: {STATE_ADULT: count, STATE_INFECTED: count, STATE_INFECTIOUS: count}}
+    """
+    queues = [('AdultQueues', STATE_ADULT), ('InfectedQueues', STATE_INFECTED), ('InfectiousQueues', STATE_INFECTIOUS)]
+    paths = ['m_vectorpopulations[*].{0}[*]'.format(queue) for queue, state in queues]
+
+    source = dtk.read(source_filename, lazy=True)
+    counts = {}
+    for index, values in source.project_nodes(['externalId'] + paths, processes):
+        node_counts = {STATE_ADULT: 0, STATE_INFECTED: 0, STATE_INFECTIOUS: 0}
+        for path, (queue, queue_state) in zip(paths, queues):
+            for cohort in values[path]:
+                # Individual cohorts (VectorCohortIndividual) carry their state, aggregated ones depend on the queue
+                state = cohort.get('state', queue_state)
+                node_counts[state] = node_counts.get(state, 0) + cohort.get('population', 1)
+        counts[values['externalId'][0]] = node_counts
+
+    return counts
+
+
 def zero_human_infections(humans, keep_ids=[]):
     for person in humans:
         if person.suid.id not in keep_ids:
@@ -90,19 +112,13 @@ def zero_human_infections(humans, keep_ids=[]):
     return
 
 
-def remove_vectors_by_nodeid(source_filename, dest_filename, removal_nodes):
+def remove_vectors_by_nodeid(source_filename, dest_filename, removal_nodes, processes=None):
 
     print("Reading file: '{0}'".format(source_filename))
-    source = dtk.read(source_filename)
-
-    for index in range(0, len(source.nodes)):
-        print('Reading {0}{1} node'.format(index, _endings[index%10]))
-        node = source.nodes[index]
-        if node.externalId in removal_nodes:
-            node.m_vectorpopulations = []
-            source.nodes[index] = node
-        else:
-            print('Ignoring node {0}'.format(index))
+    source = dtk.read(source_filename, lazy=True)
+
+    modified = source.transform_nodes(partial(remove_node_vectors, removal_nodes), processes)
+    print('Removed vectors in {0} of {1} nodes'.format(len(modified), len(source.nodes)))
 
     print("Writing file: '{0}'".format(dest_filename))
     dtk.write(source, dest_filename)
@@ -110,21 +126,20 @@ def remove_vectors_by_nodeid(source_filename, dest_filename, removal_nodes):
     return
 
 
-def remove_humans_by_nodeid(source_filename, dest_filename, removal_nodes):
+def remove_node_vectors(removal_nodes, node):
+    if node.externalId not in removal_nodes:
+        return False
+    node.m_vectorpopulations = []
+    return True
+
+
+def remove_humans_by_nodeid(source_filename, dest_filename, removal_nodes, processes=None):
 
     print("Reading file: '{0}'".format(source_filename))
-    source = dtk.read(source_filename)
-
-    for index in range(0, len(source.nodes)):
-        print('Reading {0}{1} node'.format(index, _endings[index%10]))
-        node = source.nodes[index]
-        if node.externalId in removal_nodes:
-            for person in node.individualHumans:
-                if person.home_node_id.id == node.suid.id:
-                    node.individualHumans.remove(person)
-                    source.nodes[index] = node
-        else:
-            print('Ignoring node {0}'.format(index))
+    source = dtk.read(source_filename, lazy=True)
+
+    modified = source.transform_nodes(partial(remove_node_humans, removal_nodes), processes)
+    print('Removed humans in {0} of {1} nodes'.format(len(modified), len(source.nodes)))
 
     print("Writing file: '{0}'".format(dest_filename))
     dtk.write(source, dest_filename)
@@ -132,6 +147,14 @@ def remove_humans_by_nodeid(source_filename, dest_filename, removal_nodes):
     return
 
 
+def remove_node_humans(removal_nodes, node):
+    if node.externalId not in removal_nodes:
+        return False
+    humans = node.individualHumans
+    node.individualHumans = [person for person in humans if person.home_node_id.id != node.suid.id]
+    return len(node.individualHumans) != len(humans)
+
+
 def remove_unused_campaign_events(cb, ser_date, last_date=100000) :
 
     gone_list = []
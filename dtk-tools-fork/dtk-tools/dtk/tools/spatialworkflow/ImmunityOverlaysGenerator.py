@@ -3,6 +3,7 @@ import os
 
 from simtools.OutputParser import CompsDTKOutputParser as parser
 from dtk.tools.demographics.compiledemog import CompileDemographics
+from dtk.tools.demographics.DemographicsFile import DemographicsFile
 
 from dtk.utils.ioformat.OutputMessage import OutputMessage as om
 from simtools.Utilities.COMPSUtilities import COMPS_login
@@ -72,15 +73,10 @@ class ImmunityOverlaysGenerator(object):
     def group_nodes_by_params(self):
             
         # load the demographics file to map node_labels to node_ids
-        with open(self.demographics_file_path, 'r') as demo_f:
-            demographics = json.load(demo_f)
+        demographics = DemographicsFile.index(self.demographics_file_path)
         
         # consider abstracting the node_label_2_id code to its own module; could be a singleton structure available to a bunch of classes
-        node_label_2_id = {}
-        for node in demographics['Nodes']:
-            node_label = node['NodeAttributes']['FacilityName']
-            node_id = node['NodeID']
-            node_label_2_id[node_label] = node_id
+        node_label_2_id = dict(zip(demographics.names.tolist(), demographics.node_ids.tolist()))
             
         self.nodes_by_params = {}
     
@@ -224,6 +224,17 @@ class SpatialManager:
     def set_load_balance_algo_type(self, load_balance_algo_type):
         self.lb.set_load_balance_algo(load_balance_algo_type)
 
+    def save_migration_file(self, demographics, migration_file_path):
+        """
+        Write the generated link rates to a migration binary and its json header (written together so the records
+        and the header always agree). The records follow the demographics nodes and the header its IdReference.
+        :param demographics: Demographics dictionary the migration file is generated for
+        :param migration_file_path: Path of the migration binary (the header is migration_file_path + '.json')
+        """
+        node_ids = [node['NodeID'] for node in demographics['Nodes']]
+        self.mg.save_link_rates_to_bin(migration_file_path, idref=demographics['Metadata']['IdReference'],
+                                       node_ids=node_ids)
+
     def run(self):
         # Verify that our inputs exists
         if (not os.path.exists(self.input_path)):
@@ -290,25 +301,21 @@ class SpatialManager:
                 om("generating migration graph and link rates...", style='bold')
 
                 self.mg.generate_link_rates()
-                if not os.path.exists(self.log_path):
-                    os.mkdir(self.log_path)
 
-                self.mg.save_link_rates_to_txt(os.path.join(self.log_path, 'rates.txt'))
-
-                om("Link rates log saved to: " + os.path.join(self.log_path, 'rates.txt'))
-
-                om("generating migration binary...", style='bold')
+                om("generating migration binary and json header...", style='bold')
                 migration_filename = self.cb.get_param('Local_Migration_Filename')
-                MigrationGenerator.link_rates_txt_2_bin(os.path.join(self.log_path, 'rates.txt'),
-                                                        os.path.join(self.sim_data_input, migration_filename))
+                self.save_migration_file(demographics, os.path.join(self.sim_data_input, migration_filename))
+
+                om("Migration binary and header saved to: " + os.path.join(self.sim_data_input, migration_filename))
 
-                om("Migration binary saved to: " + os.path.join(self.sim_data_input, migration_filename))
+                # the txt dump of the link rates is only kept as a log
+                if self.log:
+                    if not os.path.exists(self.log_path):
+                        os.mkdir(self.log_path)
 
-                om("generating migration json header...", style='bold')
-                MigrationGenerator.save_migration_header(
-                    os.path.join(self.sim_data_input, self.demographics_output_file), os.path.join(self.sim_data_input, migration_filename))
+                    self.mg.save_link_rates_to_txt(os.path.join(self.log_path, 'rates.txt'))
 
-                om("Migration header saved to: " + os.path.join(self.sim_data_input, self.demographics_output_file))
+                    om("Link rates log saved to: " + os.path.join(self.log_path, 'rates.txt'))
 
             else:  # if existing migration files are provided, copy them to the right places
 
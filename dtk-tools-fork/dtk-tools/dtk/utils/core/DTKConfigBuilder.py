@@ -451,11 +451,21 @@ class DTKConfigBuilder(SimConfigBuilder):
         """
         return [os.path.join(dll_type, dll_name) for dll_type, dll_name in self.dlls]
 
+    def campaign_to_json(self, human_readability):
+        """
+        Serialize the campaign. Copies of a frozen builder which did not touch the campaign share the serialization.
+
+        Args:
+            human_readability (bool): Indent the output
+        """
+        return self.shared_value('campaign', ('to_json', human_readability),
+                                 lambda campaign: campaign.to_json(campaign.Use_Defaults, human_readability))
+
     def check_custom_events(self):
         """
         Returns the custom events listed in the campaign along with user-defined ones in the Listed_Events (config.json)
         """
-        campaign_str = self.campaign.to_json(self.campaign.Use_Defaults, False)
+        campaign_str = self.campaign_to_json(False)
 
         # Retrieve all the events in the campaign file
         events_from_campaign = re.findall(r"['\"](?:Broadcast_Event|Event_Trigger|Event_To_Broadcast|Blackout_Event_Trigger|Took_Dose_Event|Discard_Event|Received_Event|Using_Event)['\"]:\s['\"](.*?)['\"]", campaign_str, re.DOTALL)
@@ -519,8 +529,7 @@ class DTKConfigBuilder(SimConfigBuilder):
         else:
             dump = lambda content: json.dumps(content, sort_keys=True, cls=NumpyEncoder).strip('"')
 
-        write_fn(self.config['parameters']['Campaign_Filename'],
-                 self.campaign.to_json(self.campaign.Use_Defaults, self.human_readability))
+        write_fn(self.config['parameters']['Campaign_Filename'], self.campaign_to_json(self.human_readability))
 
         if self.custom_reports:
             self.set_param('Custom_Reports_Filename', 'custom_reports.json')
@@ -550,12 +559,19 @@ class DTKConfigBuilder(SimConfigBuilder):
             self.emodules_map[module_type] =list(set([os.path.join(root, dll) for dll in self.emodules_map[module_type]]))
         write_fn('emodules_map.json', dump(self.emodules_map))
 
-    def dump_files(self, working_directory):
+    def dump_files(self, working_directory, content_store=None):
+        """
+        Write the simulation files in working_directory.
+        If a ContentStore is given, the files are links to the deduplicated contents of the store.
+        """
         if not os.path.exists(working_directory):
             os.makedirs(working_directory)
 
         def write_file(name, content):
             filename = os.path.join(working_directory, '%s' % name)
+            if content_store is not None:
+                content_store.write_text(filename, content)
+                return
             with open(filename, 'w') as f:
                 f.write(content)
 
@@ -564,5 +580,8 @@ class DTKConfigBuilder(SimConfigBuilder):
         from simtools.SetupParser import SetupParser
         if SetupParser.get('type') == "LOCAL":
             for file in self.experiment_files:
-                shutil.copy(file.absolute_path, working_directory)
+                if content_store is not None:
+                    content_store.copy_file(file.absolute_path, working_directory)
+                else:
+                    shutil.copy(file.absolute_path, working_directory)
 
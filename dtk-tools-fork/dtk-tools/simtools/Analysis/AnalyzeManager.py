@@ -1,14 +1,19 @@
 import collections
-import itertools
+import functools
 import os
 import sys
 import time
+import traceback
 from multiprocessing.pool import Pool
 
 from COMPS.Data.Simulation import SimulationState
 
-from simtools.Analysis.DataRetrievalProcess import retrieve_data
+from simtools.Analysis.DataRetrievalProcess import retrieve_data, required_files, fetch_simulation_files
+from simtools.Analysis.OutputDownloader import OutputDownloader
+from simtools.Analysis.ParseCache import ParseCache
+from simtools.Analysis.ResultCache import ResultCache
 from simtools.DataAccess.DataStore import DataStore
+from simtools.DBLogging.Tracer import tracer, call_traced
 from simtools.SetupParser import SetupParser
 from simtools.Utilities import on_off, pluralize, verbose_timedelta
 from simtools.Utilities.COMPSCache import COMPSCache
@@ -21,11 +26,13 @@ logger = init_logging('AnalyzeManager')
 ANALYZE_TIMEOUT = 3600*8  # Maximum seconds before timing out - set to 1h
 WAIT_TIME = 1.15          # How much time to wait between check if the analysis is done
 EXCEPTION_KEY = "__EXCEPTION__"
+PARSE_STATS_KEY = "__PARSE_STATS__"
+MAX_CONCURRENT_DOWNLOADS = 8  # Default number of COMPS downloads in flight
 
 
 class AnalyzeManager(CacheEnabled):
     def __init__(self, exp_list=None, sim_list=None, analyzers=None, working_dir=None, force_analyze=False,
-                 verbose=True):
+                 verbose=True, track_parse_memory=False, result_cache_dir=None, max_concurrent_downloads=None):
         super().__init__()
         self.analyzers = []
         self.experiments = set()
@@ -34,10 +41,17 @@ class AnalyzeManager(CacheEnabled):
         try:
             with SetupParser.TemporarySetup() as sp:
                 self.max_threads = min(os.cpu_count(), int(sp.get('max_threads', 16)))
+                result_cache_dir = result_cache_dir or sp.get('result_cache_dir', None) or None
+                if max_concurrent_downloads is None:
+                    max_concurrent_downloads = int(sp.get('max_concurrent_downloads', MAX_CONCURRENT_DOWNLOADS))
         except:
             self.max_threads = min(os.cpu_count(), 16)
+        self.max_concurrent_downloads = MAX_CONCURRENT_DOWNLOADS if max_concurrent_downloads is None \
+            else max_concurrent_downloads
         self.verbose = verbose
         self.force_analyze = force_analyze
+        self.track_parse_memory = track_parse_memory
+        self.parse_stats = {}
         self.working_dir = working_dir or os.getcwd()
 
         # If no experiment is specified, retrieve the most recent as a convenience
@@ -62,6 +76,9 @@ class AnalyzeManager(CacheEnabled):
         # Initialize the cache
         self.cache = self.initialize_cache(shards=self.max_threads)
 
+        # Opt-in persistent cache of the selected data across analysis runs
+        self.result_cache = ResultCache(result_cache_dir) if result_cache_dir else None
+
     def filter_simulations(self, simulations):
         if self.force_analyze:
             self.simulations.update({s.id:s for s in simulations})
@@ -116,6 +133,40 @@ class AnalyzeManager(CacheEnabled):
             print(exception)
             exit()
 
+    def _on_download(self, simulation, submit, future):
+        """
+        Called by the download threads: send the downloaded files to the process pool for parsing.
+        """
+        try:
+            submit(simulation, future.result())
+        except:
+            self.cache.set(EXCEPTION_KEY, "An exception has been raised during data retrieval.\n"
+                                          "Simulation: {} \n"
+                                          "\n{}".format(simulation, traceback.format_exc()))
+
+    def _process_results(self, reducers, accumulators, processed):
+        """
+        Go through the simulations results not processed yet, gather the parsing statistics and feed the reducers.
+        :param reducers: List of analyzers implementing reduce()
+        :param accumulators: Dictionary associating analyzer.uid with its current accumulator
+        :param processed: Set of the simulation ids already processed (updated)
+        """
+        for key in list(self.cache):
+            if key == EXCEPTION_KEY or key in processed: continue
+            processed.add(key)
+
+            sim_cache = self.cache.get(key)
+            if not sim_cache: continue
+
+            if PARSE_STATS_KEY in sim_cache:
+                ParseCache.merge_stats(self.parse_stats, sim_cache[PARSE_STATS_KEY])
+
+            simulation_obj = self.simulations[key]
+            for a in reducers:
+                if a.uid in sim_cache:
+                    with tracer.span('analyze.reduce.%s' % a.uid, simulation_obj.experiment.exp_id):
+                        accumulators[a.uid] = a.reduce(accumulators[a.uid], simulation_obj, sim_cache[a.uid])
+
     def analyze(self):
         # Clear the cache
         self.cache.clear()
@@ -128,6 +179,10 @@ class AnalyzeManager(CacheEnabled):
             print("No analyzers or experiments selected, exiting...")
             return
 
+        # The analysis is traced under the experiment id when there is only one
+        trace_id = next(iter(self.experiments)).exp_id if len(self.experiments) == 1 else None
+        analyze_span = tracer.span('analyze', trace_id).start()
+
         # If any of the analyzer needs the dir map, create it
         if any(a.need_dir_map for a in self.analyzers if hasattr(a, 'need_dir_map')):
             # preload the global dir map
@@ -154,16 +209,47 @@ class AnalyzeManager(CacheEnabled):
             for a in self.analyzers:
                 print(" |  - {} (Directory map: {} / File parsing: {} / Use cache: {})"
                       .format(a.uid, on_off(a.need_dir_map), on_off(a.parse), on_off(hasattr(a, "cache"))))
+            if self.result_cache is not None:
+                print(" | Result cache: {} ({} entries)".format(self.result_cache.directory, len(self.result_cache)))
             print(" | Pool of {} analyzing processes".format(max_threads))
+            if any(s.experiment.location == "HPC" for s in self.simulations.values()):
+                print(" | {} concurrent COMPS download{}"
+                      .format(self.max_concurrent_downloads or "No", pluralize(self.max_concurrent_downloads)))
+
+        # Analyzers implementing reduce() consume the results as they arrive
+        reducers = [a for a in self.analyzers if a.uses_reduce]
+        accumulators = {a.uid: a.initial_accumulator() for a in reducers}
+        self.parse_stats = {}
+        processed = set()
 
         pool = Pool(max_threads)
         if scount == 0 and self.verbose:
             print("No experiments/simulations for analysis.")
         else:
-            results = pool.starmap_async(retrieve_data, itertools.product(self.simulations.values(), (self.analyzers,), (self.cache,)))
-
-            while not results.ready():
+            async_results = []
+
+            def submit(simulation, byte_arrays=None):
+                async_results.append(pool.apply_async(retrieve_data, (simulation, self.analyzers, self.cache,
+                                                                      self.track_parse_memory, self.result_cache,
+                                                                      byte_arrays)))
+
+            # COMPS outputs are downloaded by a pool of threads and only the parsing happens in the processes
+            downloader = None
+            if self.max_concurrent_downloads and any(s.experiment.location == "HPC" for s in self.simulations.values()):
+                downloader = OutputDownloader(fetch_simulation_files, max_in_flight=self.max_concurrent_downloads)
+
+            for simulation in self.simulations.values():
+                if downloader and simulation.experiment.location == "HPC":
+                    filenames = required_files(simulation, self.analyzers, self.result_cache)
+                    if filenames:
+                        downloader.submit(simulation, filenames,
+                                          callback=functools.partial(self._on_download, simulation, submit))
+                        continue
+                submit(simulation)
+
+            while (downloader and not downloader.idle) or not all(r.ready() for r in async_results):
                 self._check_exception()
+                self._process_results(reducers, accumulators, processed)
 
                 time_elapsed = time.time()-start_time
                 if self.verbose:
@@ -175,12 +261,25 @@ class AnalyzeManager(CacheEnabled):
                     raise Exception("Timeout while waiting the analysis to complete...")
 
                 time.sleep(WAIT_TIME)
-            results.get()
+
+            if downloader:
+                downloader.shutdown()
+            self._check_exception()
+            for r in async_results:
+                r.get()
 
         # At this point we have all our results
+        self._process_results(reducers, accumulators, processed)
+
         # Give to the analyzer
         finalize_results = {}
         for a in self.analyzers:
+            if a.uses_reduce:
+                # Only the accumulator is sent to finalize
+                finalize_results[a.uid] = pool.apply_async(call_traced, ('analyze.finalize.%s' % a.uid, trace_id,
+                                                                         a.finalize, accumulators[a.uid]))
+                continue
+
             analyzer_data = {}
             for key in self.cache:
                 if key == EXCEPTION_KEY: continue
@@ -189,18 +288,29 @@ class AnalyzeManager(CacheEnabled):
                 simulation_obj = self.simulations[key]
                 # Give to the analyzer
                 analyzer_data[simulation_obj] = sim_cache[a.uid] if sim_cache and a.uid in sim_cache else None
-            finalize_results[a.uid] = pool.apply_async(a.finalize, (analyzer_data,))
+            finalize_results[a.uid] = pool.apply_async(call_traced, ('analyze.finalize.%s' % a.uid, trace_id,
+                                                                     a.finalize, analyzer_data))
 
         pool.close()
         pool.join()
 
         for a in self.analyzers:
             a.results = finalize_results[a.uid].get()
+        analyze_span.stop()
 
         if self.verbose:
             total_time = time.time() - start_time
             print("\r | Analysis done. Took {} (~ {:.3f} per simulation)"
                   .format(verbose_timedelta(total_time), total_time / scount if scount != 0 else 0))
+            for file_type, stats in sorted(self.parse_stats.items()):
+                print(" |  - Parsed {} {} file{} ({:.1f} MB) in {:.2f}s{}"
+                      .format(stats["count"], file_type, pluralize(stats["count"]), stats["bytes"] / 2**20,
+                              stats["time"],
+                              " / peak memory {:.1f} MB".format(stats["peak_memory"] / 2**20)
+                              if self.track_parse_memory else ""))
 
         for a in self.analyzers:
             a.destroy()
+
+        if self.result_cache is not None:
+            self.result_cache.close()
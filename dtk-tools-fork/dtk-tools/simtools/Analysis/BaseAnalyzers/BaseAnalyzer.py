@@ -6,19 +6,23 @@ class BaseAnalyzer(metaclass=ABCMeta):
     An abstract base class carrying the lowest level analyzer interfaces called by BaseExperimentManager
     """
     @abstractmethod
-    def __init__(self, uid=None, working_dir=None, parse=True, need_dir_map=False, filenames=None):
+    def __init__(self, uid=None, working_dir=None, parse=True, need_dir_map=False, filenames=None, version=None):
         """
         :param uid: The unique id identifying this analyzer
         :param working_dir: A working directory to dump files
         :param parse: Do we want to leverage the OutputParser or just get the raw data in the select_simulation_data()
         :param need_dir_map: Will we need the path of the simulations eventually?
         :param filenames: Which files the analyzer needs to download
+        :param version: Version (or hash) of the analyzer parameters. Analyzers with a version have their selected data
+        persisted in the result cache of the AnalyzeManager. Needs to change whenever select_simulation_data would
+        return something different.
         """
         self.filenames = filenames or []
         self.parse = parse
         self.need_dir_map = need_dir_map
         self.working_dir = working_dir
         self.uid = uid or self.__class__.__name__
+        self.version = version
         self.results = None  # Store what finalize() is returning
 
     def initialize(self):
@@ -52,10 +56,33 @@ class BaseAnalyzer(metaclass=ABCMeta):
         """
         return {}
 
+    def initial_accumulator(self):
+        """
+        Only used if reduce() is implemented.
+        :return: The accumulator passed to the first reduce() call
+        """
+        return None
+
+    def reduce(self, accumulator, simulation, data):
+        """
+        Optional. If implemented, called in the main process for each simulation as soon as its selected data is
+        available, and finalize() receives the accumulator instead of the data of all the simulations.
+        Simulations filtered out for this analyzer are not reduced.
+        :param accumulator: Current accumulator (initial_accumulator() for the first simulation)
+        :param simulation: object representing the simulation for which the data is passed
+        :param data: selected data for the given simulation
+        :return: The updated accumulator
+        """
+        raise NotImplementedError
+
+    @property
+    def uses_reduce(self):
+        return type(self).reduce is not BaseAnalyzer.reduce
+
     def finalize(self, all_data):
         """
         On a single process, get all the selected data
-        :param all_data: dictionary associating simulation:selected_data
+        :param all_data: dictionary associating simulation:selected_data or the accumulator if reduce() is implemented
         """
         pass
 
@@ -3,84 +3,119 @@ import itertools
 import os
 import traceback
 
-import time
+from COMPS.Data.Simulation import SimulationState
 
-from simtools.Analysis.OutputParser import SimulationOutputParser
+from simtools.Analysis.OutputDownloader import call_with_backoff
+from simtools.Analysis.ParseCache import ParseCache
+from simtools.DBLogging.Tracer import tracer
 from simtools.Utilities.COMPSCache import COMPSCache
 from simtools.Utilities.COMPSUtilities import COMPS_login, get_asset_files_for_simulation_id
 
 
-def retrieve_data(simulation, analyzers, cache):
-    from simtools.Analysis.AnalyzeManager import EXCEPTION_KEY
+def required_files(simulation, analyzers, result_cache=None):
+    """
+    Find the files to retrieve for a given simulation.
+    Only the analyzers selecting this simulation and not served by the result cache are considered.
+    :return: Set of filenames
+    """
+    analyzers = [a for a in analyzers if a.filter(simulation)]
+    if result_cache is not None:
+        analyzers = [a for a in analyzers if not result_cache.contains(simulation.id, a)]
+    return set(itertools.chain(*(a.filenames for a in analyzers)))
 
-    # Filter first and get the filenames from filtered analysis
-    filtered_analysis = [a for a in analyzers if a.filter(simulation)]
-    filenames = set(itertools.chain(*(a.filenames for a in filtered_analysis)))
-
-    # We dont have anything to do :)
-    if not filtered_analysis:
-        cache.set(simulation.id, None)
-        return
 
-    # The byte_arrays will associate filename with content
+def fetch_simulation_files(simulation, filenames):
+    """
+    Retrieve the raw content of the given files for a simulation (from COMPS or from the disk).
+    :return: Dictionary associating filename with content
+    """
     byte_arrays = {}
 
-    try:
+    with tracer.span('analyze.download', simulation.experiment.exp_id):
         if simulation.experiment.location == "HPC":
-            retries = 5
-            while True:
-                try:
-                    COMPS_login(simulation.experiment.endpoint)
-                    COMPS_simulation = COMPSCache.simulation(simulation.id)
-                    assets = [path for path in filenames if path.lower().startswith("assets")]
-                    transient = [path for path in filenames if not path.lower().startswith("assets")]
-                    if transient:
-                        byte_arrays.update(dict(zip(transient, COMPS_simulation.retrieve_output_files(paths=transient))))
-                    if assets:
-                        byte_arrays.update(get_asset_files_for_simulation_id(simulation.id, paths=assets, remove_prefix='Assets'))
-                    break
-                except ConnectionResetError as e:
-                    retries -= 1
-                    time.sleep(3)
-                    if retries == 0:
-                        raise e
-
+            COMPS_login(simulation.experiment.endpoint)
+            COMPS_simulation = COMPSCache.simulation(simulation.id)
+            assets = [path for path in filenames if path.lower().startswith("assets")]
+            transient = [path for path in filenames if not path.lower().startswith("assets")]
+            if transient:
+                byte_arrays.update(dict(zip(transient, COMPS_simulation.retrieve_output_files(paths=transient))))
+            if assets:
+                byte_arrays.update(get_asset_files_for_simulation_id(simulation.id, paths=assets, remove_prefix='Assets'))
         else:
             for filename in filenames:
                 path = os.path.join(simulation.get_path(), filename)
                 with open(path, 'rb') as output_file:
                     byte_arrays[filename] = output_file.read()
-    except:
-        tb = traceback.format_exc()
-        cache.set(EXCEPTION_KEY, "An exception has been raised during data retrieval.\n"
-                                 "Simulation: {} \n"
-                                 "Analyzers: {}\n"
-                                 "Files: {}\n"
-                                 "\n{}".format(simulation, ", ".join(analyzers), ", ".join(filenames), tb))
+
+    return byte_arrays
+
+
+def retrieve_data(simulation, analyzers, cache, track_memory=False, result_cache=None, byte_arrays=None):
+    """
+    Retrieve, parse and select the data of a simulation for all the analyzers and store the result in the cache.
+    :param byte_arrays: Content of the files if already downloaded. If None, the files are retrieved here.
+    """
+    from simtools.Analysis.AnalyzeManager import EXCEPTION_KEY, PARSE_STATS_KEY
+
+    # Filter first
+    filtered_analysis = [a for a in analyzers if a.filter(simulation)]
+
+    # We dont have anything to do :)
+    if not filtered_analysis:
+        cache.set(simulation.id, None)
         return
 
     # Selected data will be a dict with analyzer.uid => data
+    # Start with what is already present in the persistent result cache
     selected_data = {}
+    if result_cache is not None:
+        for analyzer in filtered_analysis:
+            found, data = result_cache.get(simulation.id, analyzer)
+            if found:
+                selected_data[analyzer.uid] = data
+
+    # Only retrieve the files needed by the analyzers not served by the result cache
+    filtered_analysis = [a for a in filtered_analysis if a.uid not in selected_data]
+    filenames = set(itertools.chain(*(a.filenames for a in filtered_analysis)))
+
+    if not filtered_analysis:
+        cache.set(simulation.id, selected_data)
+        return
+
+    if byte_arrays is None:
+        try:
+            byte_arrays = call_with_backoff(fetch_simulation_files, simulation, filenames)
+        except:
+            tb = traceback.format_exc()
+            cache.set(EXCEPTION_KEY, "An exception has been raised during data retrieval.\n"
+                                     "Simulation: {} \n"
+                                     "Analyzers: {}\n"
+                                     "Files: {}\n"
+                                     "\n{}".format(simulation, ", ".join(a.uid for a in analyzers),
+                                                   ", ".join(filenames), tb))
+            return
+
+    # Each file is parsed at most once and shared across the analyzers
+    trace_id = simulation.experiment.exp_id
+    parse_cache = ParseCache(byte_arrays, track_memory=track_memory)
+
     for analyzer in filtered_analysis:
-        # If the analyzer needs the parsed data, parse
-        if analyzer.parse:
-            try:
-                data = {filename:SimulationOutputParser.parse(filename, content)
-                        for filename, content in byte_arrays.items()}
-            except:
-                tb = traceback.format_exc()
-                cache.set(EXCEPTION_KEY, "An exception has been raised during the data parsing.\n"
-                                         "Simulation: {} \n"
-                                         "Analyzer: {}\n"
-                                         "\n{}".format(simulation, analyzer, tb))
-                return
-        else:
-            # If the analyzer doesnt wish to parse, give the raw data
-            data = byte_arrays
+        # Only give the analyzer the files it asked for (parsed or raw depending on analyzer.parse)
+        try:
+            with tracer.span('analyze.parse', trace_id):
+                data = parse_cache.data_for(analyzer)
+        except:
+            tb = traceback.format_exc()
+            cache.set(EXCEPTION_KEY, "An exception has been raised during the data parsing.\n"
+                                     "Simulation: {} \n"
+                                     "Analyzer: {}\n"
+                                     "\n{}".format(simulation, analyzer, tb))
+            return
 
         # Retrieve the selected data for the given analyzer
         try:
-            selected_data[analyzer.uid] = analyzer.select_simulation_data(data, simulation)
+            with tracer.span('analyze.select.%s' % analyzer.uid, trace_id):
+                selected_data[analyzer.uid] = analyzer.select_simulation_data(data, simulation)
         except:
             tb = traceback.format_exc()
             cache.set(EXCEPTION_KEY, "An exception has been raised during data processing.\n"
@@ -89,5 +124,10 @@ def retrieve_data(simulation, analyzers, cache):
                                      "\n{}".format(simulation, analyzer, tb))
             return
 
-    # Store in the cache
+        # Only persist the results of simulations that will not change anymore
+        if result_cache is not None and simulation.status == SimulationState.Succeeded:
+            result_cache.set(simulation.id, analyzer, selected_data[analyzer.uid])
+
+    # Store in the cache along with the parsing statistics
+    selected_data[PARSE_STATS_KEY] = parse_cache.stats
     cache.set(simulation.id, selected_data)
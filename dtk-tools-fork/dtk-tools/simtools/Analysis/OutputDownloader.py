@@ -0,0 +1,98 @@
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from requests.exceptions import ConnectionError as RequestsConnectionError, Timeout
+
+from simtools.Utilities.General import init_logging
+
+logger = init_logging('OutputDownloader')
+
+# Errors considered transient and worth a retry
+RETRYABLE_ERRORS = (ConnectionError, TimeoutError, RequestsConnectionError, Timeout)
+
+
+def backoff_delay(attempt, base=0.5, cap=30):
+    """
+    Exponential backoff with full jitter.
+    :param attempt: Number of the failed attempt (starting at 0)
+    :param base: Delay in seconds of the first retry before jitter
+    :param cap: Maximum delay in seconds
+    :return: A random delay between 0 and min(cap, base * 2**attempt)
+    """
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+def call_with_backoff(fn, *args, retries=5, base=0.5, cap=30, retry_on=RETRYABLE_ERRORS, **kwargs):
+    """
+    Call fn(*args, **kwargs) retrying with exponential backoff and jitter when one of the retry_on errors is raised.
+    The last error is re-raised after `retries` failed retries.
+    """
+    attempt = 0
+    while True:
+        try:
+            return fn(*args, **kwargs)
+        except retry_on as e:
+            if attempt >= retries:
+                raise e
+            delay = backoff_delay(attempt, base, cap)
+            logger.debug("Attempt {} of {} failed ({}), retrying in {:.2f}s".format(attempt + 1, fn, e, delay))
+            time.sleep(delay)
+            attempt += 1
+
+
+class OutputDownloader:
+    """
+    Thread based download stage.
+    Runs the I/O bound fetch function with a bounded number of requests in flight so the CPU bound parsing can happen
+    in a separate process pool.
+    """
+    def __init__(self, fetch, max_in_flight=8, retries=5, backoff_base=0.5, backoff_cap=30):
+        """
+        :param fetch: Function called as fetch(*args) and returning the downloaded content
+        :param max_in_flight: Maximum number of concurrent fetches
+        :param retries: How many times a failed fetch is retried
+        :param backoff_base: Base delay (in seconds) of the exponential backoff
+        :param backoff_cap: Maximum delay (in seconds) between two retries
+        """
+        self.fetch = fetch
+        self.max_in_flight = max(1, int(max_in_flight))
+        self.retries = retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.executor = ThreadPoolExecutor(max_workers=self.max_in_flight)
+        self.pending = 0
+        self.lock = threading.Lock()
+
+    def submit(self, *args, callback=None):
+        """
+        Schedule a download.
+        :param args: Arguments passed to the fetch function
+        :param callback: Optional function called with the resulting future once the download is done
+        :return: The future of the download
+        """
+        with self.lock:
+            self.pending += 1
+
+        future = self.executor.submit(call_with_backoff, self.fetch, *args, retries=self.retries,
+                                      base=self.backoff_base, cap=self.backoff_cap)
+
+        def done(f):
+            try:
+                if callback:
+                    callback(f)
+            finally:
+                with self.lock:
+                    self.pending -= 1
+
+        future.add_done_callback(done)
+        return future
+
+    @property
+    def idle(self):
+        with self.lock:
+            return self.pending == 0
+
+    def shutdown(self, wait=True):
+        self.executor.shutdown(wait=wait)
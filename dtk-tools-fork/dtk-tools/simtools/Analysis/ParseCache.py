@@ -0,0 +1,94 @@
+import os
+import time
+import tracemalloc
+from io import BytesIO
+
+from simtools.Analysis.OutputParser import SimulationOutputParser
+
+
+class ParseCache:
+    """
+    Per-simulation cache of the output files content.
+    Every (filename, parse) pair is parsed at most once and shared between all the analyzers requesting it.
+    The time (and optionally the peak memory) spent parsing is recorded per file type in `stats`.
+
+    Note: as the parsed objects are shared, select_simulation_data() should not modify the data it receives.
+    """
+    def __init__(self, byte_arrays, track_memory=False):
+        """
+        :param byte_arrays: Dictionary associating filename with raw content
+        :param track_memory: Use tracemalloc to record the peak memory of each parse (slows down the parsing)
+        """
+        self.byte_arrays = byte_arrays
+        self.track_memory = track_memory
+        self.entries = {}
+        self.stats = {}
+
+    def get(self, filename, parse=True):
+        """
+        Retrieve the content of a file, parsing it on first access.
+        :param filename: Name of the file as requested by the analyzer
+        :param parse: Do we want the parsed content or the raw bytes?
+        :return: The parsed (or raw) content
+        """
+        key = (filename, parse)
+        if key not in self.entries:
+            self.entries[key] = self._parse(filename) if parse else self.byte_arrays[filename]
+
+        content = self.entries[key]
+        # Raw files are returned as streams, make sure every analyzer starts reading at the beginning
+        if isinstance(content, BytesIO):
+            content.seek(0)
+        return content
+
+    def data_for(self, analyzer):
+        """
+        Build the data dictionary for a given analyzer, containing only the files this analyzer asked for.
+        :param analyzer: The analyzer
+        :return: Dictionary associating filename with content
+        """
+        return {filename: self.get(filename, analyzer.parse) for filename in analyzer.filenames}
+
+    def _parse(self, filename):
+        content = self.byte_arrays[filename]
+        file_type = os.path.splitext(filename)[1][1:].lower() or "raw"
+
+        # Only measure the memory if nobody else is already tracing
+        tracing = self.track_memory and not tracemalloc.is_tracing()
+        if tracing:
+            tracemalloc.start()
+
+        start = time.perf_counter()
+        try:
+            parsed = SimulationOutputParser.parse(filename, content)
+        finally:
+            elapsed = time.perf_counter() - start
+            peak = None
+            if tracing:
+                peak = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+
+        stats = self.stats.setdefault(file_type, {"count": 0, "bytes": 0, "time": 0., "peak_memory": 0})
+        stats["count"] += 1
+        stats["bytes"] += len(content)
+        stats["time"] += elapsed
+        if peak is not None:
+            stats["peak_memory"] = max(stats["peak_memory"], peak)
+
+        return parsed
+
+    @staticmethod
+    def merge_stats(total, stats):
+        """
+        Accumulate the parse statistics of one simulation into a total.
+        :param total: Dictionary file_type => statistics being accumulated
+        :param stats: Statistics of a ParseCache
+        :return: The updated total
+        """
+        for file_type, s in stats.items():
+            t = total.setdefault(file_type, {"count": 0, "bytes": 0, "time": 0., "peak_memory": 0})
+            t["count"] += s["count"]
+            t["bytes"] += s["bytes"]
+            t["time"] += s["time"]
+            t["peak_memory"] = max(t["peak_memory"], s["peak_memory"])
+        return total
@@ -0,0 +1,75 @@
+import hashlib
+import os
+
+from diskcache import Cache
+
+DEFAULT_RESULT_CACHE_SIZE = int(2**32)  # 4GB
+MISSING = object()
+
+
+class ResultCache:
+    """
+    Persistent on-disk cache of the select_simulation_data() results.
+    Entries are keyed by simulation id and analyzer fingerprint (class, filenames, parse flag and version) and survive
+    across analysis runs. Only analyzers defining a `version` are cached, the version needs to be changed by the user
+    whenever the parameters of the analyzer change.
+    The least recently used entries are evicted when the cache grows bigger than `size_limit`.
+    """
+    def __init__(self, directory, size_limit=DEFAULT_RESULT_CACHE_SIZE):
+        self.directory = os.path.abspath(directory)
+        self.size_limit = int(size_limit)
+        self.cache = Cache(self.directory, size_limit=self.size_limit, eviction_policy='least-recently-used')
+
+    @staticmethod
+    def fingerprint(analyzer):
+        """
+        Compute the fingerprint of an analyzer.
+        :param analyzer: The analyzer
+        :return: The fingerprint as an hex string or None if the analyzer is not cacheable (no version)
+        """
+        version = getattr(analyzer, "version", None)
+        if version is None:
+            return None
+
+        signature = "|".join((analyzer.__class__.__module__, analyzer.__class__.__name__,
+                              ",".join(sorted(analyzer.filenames)), str(analyzer.parse), str(version)))
+        return hashlib.md5(signature.encode()).hexdigest()
+
+    def get(self, simulation_id, analyzer):
+        """
+        Retrieve the selected data for a given simulation/analyzer.
+        :return: A tuple (found, data)
+        """
+        fingerprint = self.fingerprint(analyzer)
+        if fingerprint is None:
+            return False, None
+
+        data = self.cache.get((str(simulation_id), fingerprint), default=MISSING, retry=True)
+        if data is MISSING:
+            return False, None
+        return True, data
+
+    def contains(self, simulation_id, analyzer):
+        fingerprint = self.fingerprint(analyzer)
+        return fingerprint is not None and (str(simulation_id), fingerprint) in self.cache
+
+    def set(self, simulation_id, analyzer, data):
+        fingerprint = self.fingerprint(analyzer)
+        if fingerprint is not None:
+            self.cache.set((str(simulation_id), fingerprint), data, retry=True)
+
+    def clear(self):
+        self.cache.clear()
+
+    def close(self):
+        self.cache.close()
+
+    def __len__(self):
+        return len(self.cache)
+
+    def __getstate__(self):
+        # Only ship the location to the worker processes, they will reopen the cache
+        return {"directory": self.directory, "size_limit": self.size_limit}
+
+    def __setstate__(self, state):
+        self.__init__(state["directory"], state["size_limit"])
@@ -39,4 +39,22 @@ class Timing(Base_logs):
     elapsed_time = Column(Float)
     extra_info = Column(String)
 
+
+class Span(Base_logs):
+    """
+    Aggregated timing of a label (e.g. analyze.parse) for a trace (usually an experiment id) saved by the Tracer.
+    start and end are the epoch times of the first start and last end of the aggregated spans.
+    """
+    __tablename__ = "Spans"
+    id = Column(Integer, primary_key=True)
+    date = Column(DateTime(timezone=True), default=datetime.datetime.now)
+    trace_id = Column(String, index=True)
+    label = Column(String)
+    count = Column(Integer)
+    total = Column(Float)
+    min = Column(Float)
+    max = Column(Float)
+    start = Column(Float)
+    end = Column(Float)
+
 Base_logs.metadata.create_all(engine_logs)
@@ -0,0 +1,128 @@
+import atexit
+import os
+import threading
+import time
+import timeit
+from multiprocessing.util import Finalize
+
+from simtools.Utilities.General import init_logging
+
+logger = init_logging('Tracer')
+
+
+class Span(object):
+    """
+    Time a block of code, as a context manager or with start() and stop().
+    The trace id can be set while the block runs (e.g. once the experiment is created), if it is not the current trace
+    id of the tracer is used.
+    """
+
+    def __init__(self, tracer, label, trace_id=None):
+        self.tracer = tracer
+        self.label = label
+        self.trace_id = trace_id
+        self.started = None
+        self._timer = None
+
+    def start(self):
+        self.started = time.time()
+        self._timer = timeit.default_timer()
+        return self
+
+    def stop(self):
+        elapsed = timeit.default_timer() - self._timer
+        self.tracer.add(self.label, elapsed, self.trace_id, start=self.started)
+        return elapsed
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+        return False
+
+
+class Tracer(object):
+    """
+    Low overhead timing of the phases of an experiment (creation, run, analysis...).
+    The spans are aggregated in memory by (trace id, label) and saved in batches every FLUSH_INTERVAL seconds and
+    when the process exits. Each process (creators, runners, analysis pool) has its own aggregation.
+    The trace id is usually the experiment id, see `dtk profile`.
+    """
+    FLUSH_INTERVAL = 30  # seconds
+
+    def __init__(self):
+        self.trace_id = None
+        self.lock = threading.Lock()
+        self.pid = None
+        self.spans = {}
+        self.last_flush = time.time()
+
+    def span(self, label, trace_id=None):
+        return Span(self, label, trace_id)
+
+    def add(self, label, elapsed, trace_id=None, start=None):
+        """
+        Add a measurement of elapsed seconds to the label.
+        """
+        end = time.time()
+        start = start if start is not None else end - elapsed
+        trace_id = trace_id or self.trace_id
+
+        with self.lock:
+            self._check_process()
+            key = (trace_id, label)
+            if key not in self.spans:
+                self.spans[key] = {'count': 0, 'total': 0., 'min': elapsed, 'max': elapsed, 'start': start, 'end': end}
+            span = self.spans[key]
+            span['count'] += 1
+            span['total'] += elapsed
+            span['min'] = min(span['min'], elapsed)
+            span['max'] = max(span['max'], elapsed)
+            span['start'] = min(span['start'], start)
+            span['end'] = max(span['end'], end)
+            flush = end - self.last_flush > self.FLUSH_INTERVAL
+
+        if flush:
+            self.flush()
+
+    def _check_process(self):
+        # A forked process starts with a copy of the parent spans: drop them and save its own at exit
+        if self.pid != os.getpid():
+            self.pid = os.getpid()
+            self.spans = {}
+            self.last_flush = time.time()
+            atexit.register(self.flush)
+            Finalize(None, self.flush, exitpriority=10)
+
+    def collect(self):
+        """
+        Take the spans aggregated so far.
+        :return: List of dictionaries (trace_id, label, count, total, min, max, start, end)
+        """
+        with self.lock:
+            spans, self.spans = self.spans, {}
+            self.last_flush = time.time()
+        return [dict(span, trace_id=trace_id, label=label) for (trace_id, label), span in spans.items()]
+
+    def flush(self):
+        spans = self.collect()
+        if not spans:
+            return
+
+        from simtools.DataAccess.LoggingDataStore import LoggingDataStore
+        try:
+            LoggingDataStore.save_spans(spans)
+        except Exception as e:
+            logger.debug("Could not save %d span(s): %s" % (len(spans), e))
+
+
+tracer = Tracer()
+
+
+def call_traced(label, trace_id, function, *args):
+    """
+    Call function(*args) in a span. Can be sent to a process pool (e.g. to time the analyzers finalize).
+    """
+    with tracer.span(label, trace_id):
+        return function(*args)
@@ -75,10 +75,12 @@ class ExperimentDataStore:
     def get_active_experiments(cls, location=None):
         logger.debug("Get active experiments")
         with session_scope() as session:
-            experiments = session.query(Experiment).distinct(Experiment.exp_id) \
-                .join(Experiment.simulations) \
-                .options(joinedload('simulations').joinedload('experiment')) \
+            # Find the experiments with unfinished simulations first (indexed) then load only those
+            active_ids = session.query(Simulation.experiment_id).distinct() \
                 .filter(~Simulation.status_s.in_((SimulationState.Succeeded.name, SimulationState.Failed.name, SimulationState.Canceled.name)))
+            experiments = session.query(Experiment) \
+                .options(joinedload('simulations').joinedload('experiment')) \
+                .filter(Experiment.exp_id.in_(active_ids.subquery()))
             if location:
                 experiments = experiments.filter(Experiment.location == location)
 
@@ -4,9 +4,10 @@ from datetime import date,timedelta
 
 from sqlalchemy import and_
 from sqlalchemy import distinct
+from sqlalchemy import func
 
 from simtools.DataAccess import  session_scope, Session_logs, engine_logs
-from simtools.DBLogging.Schema import LogRecord, Timing
+from simtools.DBLogging.Schema import LogRecord, Span
 
 
 class LoggingDataStore:
@@ -70,8 +71,35 @@ class LoggingDataStore:
 
     @classmethod
     def record_time(cls, label, extra_info=None):
+        """
+        Record the time elapsed since start_timer(label). The times are aggregated by the Tracer and saved in batches,
+        extra_info is not kept.
+        """
+        from simtools.DBLogging.Tracer import tracer
         current_thread = str(threading.current_thread().ident)
-        elapsed = timeit.default_timer() - cls.start_times[current_thread+label]
+        elapsed = timeit.default_timer() - cls.start_times.pop(current_thread+label)
+        tracer.add(label, elapsed)
+        return elapsed
+
+    @classmethod
+    def save_spans(cls, spans):
+        """
+        Save aggregated spans (dictionaries with the Span columns) in a single transaction.
+        """
+        with session_scope(Session_logs()) as session:
+            session.bulk_insert_mappings(Span, spans)
+
+    @classmethod
+    def get_spans(cls, trace_id):
+        """
+        Aggregate the spans saved for a trace by label.
+        :return: List of (label, count, total, min, max, start, end) ordered by start
+        """
         with session_scope(Session_logs()) as session:
-            session.add(Timing(elapsed_time=elapsed, label=label, timing_id=cls.timing_id, extra_info=extra_info))
-        return elapsed
\ No newline at end of file
+            spans = session.query(Span.label, func.sum(Span.count), func.sum(Span.total), func.min(Span.min),
+                                  func.max(Span.max), func.min(Span.start), func.max(Span.end)) \
+                .filter(Span.trace_id == trace_id) \
+                .group_by(Span.label) \
+                .order_by(func.min(Span.start)).all()
+
+        return spans
@@ -4,13 +4,17 @@ import os
 from sqlalchemy import Column
 from sqlalchemy import DateTime
 from sqlalchemy import ForeignKey
+from sqlalchemy import Index
 from sqlalchemy import Integer
 from sqlalchemy import PickleType
 from sqlalchemy import String
+from sqlalchemy import inspect as inspect_db
 from sqlalchemy.ext.hybrid import hybrid_property
+from sqlalchemy.orm import deferred
 from sqlalchemy.orm import relationship
+from sqlalchemy.orm.attributes import set_committed_value
 
-from simtools.DataAccess import Base, engine
+from simtools.DataAccess import Base, engine, session_scope
 from COMPS.Data.Simulation import SimulationState
 
 
@@ -23,14 +27,50 @@ class Simulation(Base):
     __tablename__ = "simulations"
 
     id = Column(String, primary_key=True)
-    status_s = Column(String, default=SimulationState.Created.name)
+    status_s = Column(String, default=SimulationState.Created.name, index=True)
     message = Column(String)
     experiment = relationship("Experiment", back_populates="simulations")
-    experiment_id = Column(String, ForeignKey('experiments.exp_id'))
-    tags = Column(PickleType())
-    date_created = Column(DateTime(timezone=True), default=datetime.datetime.now())
+    experiment_id = Column(String, ForeignKey('experiments.exp_id'), index=True)
+    _tags = deferred(Column('tags', PickleType()))
+    date_created = Column(DateTime(timezone=True), default=datetime.datetime.now(), index=True)
     pid = Column(String)
 
+    # The states of an experiment are counted from the index alone
+    __table_args__ = (Index('ix_simulations_experiment_status', 'experiment_id', 'status_s'),)
+
+    @property
+    def tags(self):
+        """
+        The tags are not loaded with the simulation as most queries only need the states.
+        They are loaded at first access, for all the simulations of the experiment at once.
+        """
+        state = inspect_db(self)
+        if state.detached and '_tags' in state.unloaded:
+            self._load_tags()
+        return self._tags
+
+    @tags.setter
+    def tags(self, tags):
+        self._tags = tags
+
+    def _load_tags(self):
+        simulations = {self.id: self}
+        if 'experiment' not in inspect_db(self).unloaded and self.experiment \
+                and 'simulations' not in inspect_db(self.experiment).unloaded:
+            simulations.update((sim.id, sim) for sim in self.experiment.simulations
+                               if '_tags' in inspect_db(sim).unloaded)
+
+        with session_scope() as session:
+            query = session.query(Simulation.id, Simulation._tags)
+            if len(simulations) > 1:
+                query = query.filter(Simulation.experiment_id == self.experiment_id)
+            else:
+                query = query.filter(Simulation.id == self.id)
+
+            for sim_id, tags in query:
+                if sim_id in simulations:
+                    set_committed_value(simulations[sim_id], '_tags', tags)
+
     # A pair of accessors to support SumulationState-only status comparison external to DB access.
     @property
     def status(self):
@@ -65,7 +105,7 @@ class Experiment(Base):
     dtk_tools_revision = Column(String)
     exe_name = Column(String)
     exp_name = Column(String)
-    location = Column(String)
+    location = Column(String, index=True)
     selected_block = Column(String)
     setup_overlay_file = Column(String)
     sim_root = Column(String)
@@ -73,7 +113,7 @@ class Experiment(Base):
     tags = Column(PickleType())
     command_line = Column(String)
     working_directory = Column(String)
-    date_created = Column(DateTime(timezone=True), default=datetime.datetime.now())
+    date_created = Column(DateTime(timezone=True), default=datetime.datetime.now(), index=True)
     endpoint = Column(String)
 
     simulations = relationship("Simulation", back_populates='experiment', cascade="all, delete-orphan", order_by="Simulation.date_created")
@@ -204,4 +244,12 @@ class BatchSimulation(Base):
     def __repr__(self):
         return "batch_simulation"
 
-Base.metadata.create_all(engine)
\ No newline at end of file
+Base.metadata.create_all(engine)
+
+# create_all does not add the indexes to the tables of an existing database
+inspector = inspect_db(engine)
+for table in Base.metadata.sorted_tables:
+    existing_indexes = {index['name'] for index in inspector.get_indexes(table.name)}
+    for index in table.indexes:
+        if index.name not in existing_indexes:
+            index.create(engine)
@@ -4,6 +4,7 @@ from simtools.DataAccess import session_scope
 from simtools.DataAccess.Schema import Simulation
 from sqlalchemy import and_
 from sqlalchemy import bindparam
+from sqlalchemy import func
 from sqlalchemy import not_
 from sqlalchemy import update
 
@@ -21,11 +22,12 @@ class SimulationDataStore:
         """
         Takes a batch of simulations and update their status in the DB.
         This function provides performance considerations when updating large number of simulations in the db.
+        Simulations already finished (Succeeded, Failed or Canceled) are not updated.
 
-        The batch needs to be formatted as follow:
+        The batch needs to be formatted as follow (message and pid are optional):
         [
             {'sid':'simid', "status": 'simstatus'},
-            {'sid':'simid', "status": 'simstatus'}
+            {'sid':'simid', "status": 'simstatus', "message": 'message', "pid": 'pid'}
         ]
 
         Args:
@@ -33,14 +35,22 @@ class SimulationDataStore:
         """
         if len(simulation_batch) == 0: return
 
+        # One statement per set of updated columns
+        columns = {'status': 'status_s', 'message': 'message', 'pid': 'pid'}
+        groups = {}
+        for sim in simulation_batch:
+            sim = dict(sim, status=getattr(sim['status'], 'name', sim['status']))
+            groups.setdefault(tuple(sorted(key for key in sim if key in columns)), []).append(sim)
+
         with session_scope() as session:
-            stmt = update(Simulation).where(and_(Simulation.id == bindparam("sid"),
-                                                 not_(Simulation.status in (
-                                                 SimulationState.Succeeded, SimulationState.Failed,
-                                                 SimulationState.Canceled)))) \
-                .values(status_s=bindparam("status"))
-            for sim_batch in batch_list(simulation_batch, 2500):
-                session.execute(stmt, sim_batch)
+            for keys, sims in groups.items():
+                stmt = update(Simulation).where(and_(Simulation.id == bindparam("sid"),
+                                                     not_(Simulation.status_s.in_((
+                                                     SimulationState.Succeeded.name, SimulationState.Failed.name,
+                                                     SimulationState.Canceled.name))))) \
+                    .values(**{columns[key]: bindparam(key) for key in keys})
+                for sim_batch in batch_list(sims, 2500):
+                    session.execute(stmt, sim_batch)
 
     @classmethod
     def bulk_insert_simulations(cls, simulations):
@@ -67,6 +77,31 @@ class SimulationDataStore:
 
         return simulation
 
+    @classmethod
+    def get_simulation_states(cls, exp_id):
+        """
+        Get the status and message of the simulations of an experiment without loading the simulations.
+        :return: List of (sim_id, status_s, message)
+        """
+        with session_scope() as session:
+            states = session.query(Simulation.id, Simulation.status_s, Simulation.message) \
+                .filter(Simulation.experiment_id == exp_id).all()
+
+        return states
+
+    @classmethod
+    def count_simulation_states(cls, exp_id):
+        """
+        Count the simulations of an experiment by status.
+        :return: Dictionary status_s -> number of simulations
+        """
+        with session_scope() as session:
+            counts = session.query(Simulation.status_s, func.count()) \
+                .filter(Simulation.experiment_id == exp_id) \
+                .group_by(Simulation.status_s).all()
+
+        return dict(counts)
+
     @classmethod
     def delete_simulation(cls, simulation):
         with session_scope() as session:
@@ -0,0 +1,106 @@
+import multiprocessing
+import queue
+import threading
+import time
+
+from simtools.DataAccess.DataStore import DataStore
+from simtools.Utilities.General import init_logging
+
+logger = init_logging('DataAccess')
+
+
+class StatusChannel(object):
+    """
+    Side of the StatusWriter given to the runner processes: the state changes are sent over a queue and the states
+    are read from a dictionary shared by the processes instead of the database.
+    """
+
+    def __init__(self, changes, states):
+        self.changes = changes
+        self.states = states
+
+    def put(self, simulation):
+        pid = simulation.pid
+        self.changes.put({'sid': simulation.id, 'status': simulation.status.name, 'message': simulation.message,
+                          'pid': str(pid) if pid is not None else None})
+
+    def set_status(self, sim_id, status):
+        self.states[sim_id] = status.name
+
+    def get_status(self, sim_id):
+        """
+        :return: The name of the last status sent for the simulation, None if it was not sent through the channel
+        """
+        return self.states.get(sim_id)
+
+
+class StatusWriter(object):
+    """
+    Single writer of the simulation states of the local runners.
+    The changes received are coalesced by simulation (last one wins) and saved every FLUSH_INTERVAL seconds with
+    DataStore.batch_simulations_update, so the runners do not contend on the database lock.
+    """
+    FLUSH_INTERVAL = 1  # seconds
+
+    def __init__(self, manager=None):
+        self.manager = manager or multiprocessing.Manager()
+        self.channel = StatusChannel(multiprocessing.Queue(), self.manager.dict())
+        self.pending = {}
+        self.lock = threading.Lock()
+        self.stopped = threading.Event()
+        self.thread = None
+
+    def start(self):
+        self.thread = threading.Thread(target=self.run)
+        self.thread.daemon = True
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.stopped.set()
+        if self.thread:
+            self.thread.join()
+        self.flush()
+
+    def run(self):
+        while not self.stopped.is_set():
+            deadline = time.time() + self.FLUSH_INTERVAL
+            while not self.stopped.is_set() and time.time() < deadline:
+                self.receive(max(deadline - time.time(), 0))
+            self.flush()
+
+    def receive(self, timeout=0):
+        """
+        Wait at most timeout seconds for a change, then take all the changes waiting.
+        """
+        changes = []
+        try:
+            changes.append(self.channel.changes.get(timeout=timeout) if timeout else self.channel.changes.get_nowait())
+            while True:
+                changes.append(self.channel.changes.get_nowait())
+        except queue.Empty:
+            pass
+
+        if not changes:
+            return
+        with self.lock:
+            for change in changes:
+                self.pending.setdefault(change['sid'], {}).update(change)
+                self.channel.states[change['sid']] = change['status']
+
+    def flush(self):
+        """
+        Save the pending changes, including the ones still in the queue.
+        """
+        self.receive(0)
+        with self.lock:
+            pending, self.pending = list(self.pending.values()), {}
+        if pending:
+            try:
+                DataStore.batch_simulations_update(pending)
+            except Exception as e:
+                logger.error('Could not save the state of %d simulation(s)' % len(pending))
+                logger.error(e)
+                with self.lock:
+                    for change in pending:
+                        self.pending.setdefault(change['sid'], change)
@@ -1,6 +1,7 @@
 import os
 from contextlib import contextmanager
 from sqlalchemy import create_engine
+from sqlalchemy import event
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 
@@ -11,6 +12,16 @@ engine = create_engine('sqlite:///%s/db.sqlite' % current_dir, echo=False, conne
 Session = sessionmaker(bind=engine)
 Base = declarative_base()
 
+
+@event.listens_for(engine, "connect")
+def set_sqlite_pragma(dbapi_connection, connection_record):
+    # Write-ahead logging: the readers (runners, commands) do not block the writer and the other way around
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.close()
+
+
 # Logs DB
 engine_logs = create_engine('sqlite:///%s/logs.sqlite' % current_dir, echo=False, connect_args={'timeout': 90})
 Session_logs = sessionmaker(bind=engine_logs)
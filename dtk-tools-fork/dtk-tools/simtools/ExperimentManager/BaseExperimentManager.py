@@ -19,6 +19,7 @@ from collections import Counter
 import fasteners
 
 from simtools.DataAccess.DataStore import DataStore
+from simtools.DBLogging.Tracer import tracer
 from simtools.ModBuilder import SingleSimulationBuilder
 from simtools.Monitor import SimulationMonitor
 from simtools.SetupParser import SetupParser
@@ -127,6 +128,14 @@ class BaseExperimentManager(CacheEnabled):
         states, msgs = SimulationMonitor(self.experiment.exp_id).query()
         return states, msgs
 
+    def get_simulation_counts(self):
+        """
+        Count the simulations of the currently managed experiment by state.
+        Cheaper than get_simulation_status for large experiments as the counting is done by the database.
+        """
+        self.check_overseer()
+        return SimulationMonitor(self.experiment.exp_id).count()
+
     def run_simulations(self, config_builder=None, exp_name='test', exp_builder=None,
                         suite_id=None, blocking=False, quiet=False, experiment_tags=None):
         """
@@ -210,6 +219,10 @@ class BaseExperimentManager(CacheEnabled):
         # Save the experiment in the DB
         DataStore.save_experiment(self.experiment, verbose=verbose)
 
+        # The timings of the experiment phases are traced under its id
+        tracer.trace_id = self.experiment.exp_id
+        creation_span = tracer.span('create.simulations').start()
+
         # Separate the experiment builder generator into batches
         sim_per_batch = int(SetupParser.get('sims_per_thread', default=50))
         mods = self.exp_builder.mod_generator
@@ -260,8 +273,10 @@ class BaseExperimentManager(CacheEnabled):
         sys.stdout.flush()
 
         # Insert simulations in the cache
-        DataStore.bulk_insert_simulations(self.cache)
+        with tracer.span('create.insert'):
+            DataStore.bulk_insert_simulations(self.cache)
         self.cache.clear()
+        creation_span.stop()
 
         # Refresh the experiment
         self.refresh_experiment()
@@ -285,9 +300,11 @@ class BaseExperimentManager(CacheEnabled):
         # Refresh the experiment
         self.experiment = DataStore.get_experiment(self.experiment.exp_id)
 
-    def print_status(self, states=None, msgs=None, verbose=True):
+    def print_status(self, states=None, msgs=None, verbose=True, counts=None):
         if not states:
-            states, msgs = self.get_simulation_status()
+            # The state of each simulation is only retrieved if it is going to be displayed
+            counts = counts if counts is not None else self.get_simulation_counts()
+            states, msgs = self.get_simulation_status() if verbose and sum(counts.values()) < 20 else ({}, {})
 
         long_states = copy.deepcopy(states)
 
@@ -308,14 +325,16 @@ class BaseExperimentManager(CacheEnabled):
             print(json.dumps(long_states, sort_keys=True, indent=4))
 
         # Display the counter no matter the number of simulations
-        print(dict(Counter([st.name for st in states.values()])))
+        counts = Counter(states.values()) if states else counts
+        print(dict((st.name, count) for st, count in counts.items()))
 
     def wait_for_finished(self, verbose=False, sleep_time=5):
         timeout = 3600 * 24  # 48 hours timeout
         while True:
             # Get the new status
+            # Only the counts are queried, which does not depend on the size of the DataStore
             try:
-                states, msgs = self.get_simulation_status()
+                counts = self.get_simulation_counts()
             except Exception as e:
                 print("Exception occurred while retrieving status")
                 print(e)
@@ -325,11 +344,11 @@ class BaseExperimentManager(CacheEnabled):
                 raise Exception("Timeout exhausted for experiment {}".format(self.experiment.exp_id))
 
             # If we are done, exit the loop
-            if self.status_finished(states): break
+            if self.counts_finished(counts): break
 
             # Display if verbose
             if verbose:
-                self.print_status(states, msgs)
+                self.print_status(counts=counts)
                 print("")
 
             # Wait before going through the loop again
@@ -337,7 +356,7 @@ class BaseExperimentManager(CacheEnabled):
             timeout -= sleep_time
 
         # SHow status one last time
-        if verbose: self.print_status(states, msgs)
+        if verbose: self.print_status(counts=counts)
 
         # Refresh the experiment
         self.refresh_experiment()
@@ -389,6 +408,12 @@ class BaseExperimentManager(CacheEnabled):
         return all(
             v in (SimulationState.Succeeded, SimulationState.Failed, SimulationState.Canceled) for v in states.values())
 
+    @staticmethod
+    def counts_finished(counts):
+        return all(
+            state in (SimulationState.Succeeded, SimulationState.Failed, SimulationState.Canceled)
+            for state, count in counts.items() if count)
+
     def finished(self):
         return self.experiment.is_done()
 
@@ -1,9 +1,8 @@
-from multiprocessing import Process
-
 from simtools.Utilities.General import init_logging
 
 logger = init_logging("LocalExperimentManager")
 
+import json
 import os
 import re
 import shutil
@@ -23,6 +22,10 @@ class LocalExperimentManager(BaseExperimentManager):
     """
     location = 'LOCAL'
 
+    # Simulation tags / config parameters giving the expected cost of a simulation (see simulation_cost)
+    SLOTS_KEY = 'Num_Cores'
+    RUNTIME_KEYS = ('Simulation_Duration', 'Node_Count')
+
     @property
     def experiment(self):
         return self._experiment
@@ -41,9 +44,11 @@ class LocalExperimentManager(BaseExperimentManager):
                             self.unfinished_simulations[sim.id] = sim
 
     def __init__(self, experiment, config_builder):
-        self.local_queue = None
+        self.local_scheduler = None
+        self.status_channel = None
         self.simulations_commissioned = 0
         self.unfinished_simulations = {}
+        self.simulation_costs = {}
         self._experiment = None
         self.experiment = experiment
 
@@ -51,25 +56,83 @@ class LocalExperimentManager(BaseExperimentManager):
 
     def commission_simulations(self):
         """
-         Commissions all simulations that need to (and can be) commissioned.
-        :param states: a multiprocessing.Queue for simulations to use to update their status.
+        Commissions all simulations that need to (and can be) commissioned on the free slots of the local scheduler.
+        The longest simulations are started first (shortest makespan) and smaller simulations fill the slots too few
+        for the next one.
         :return: The number of simulations commissioned.
         """
-        to_commission = self.needs_commissioning()
+        to_commission = [simulation for simulation in self.needs_commissioning()
+                         if not self.local_scheduler.is_running(simulation.id)]
+        costs = {simulation.id: self.simulation_cost(simulation) for simulation in to_commission}
+        to_commission.sort(key=lambda simulation: costs[simulation.id][1], reverse=True)
+
         commissioned = []
         for simulation in to_commission:
-            if self.local_queue.full():
+            if self.local_scheduler.free_slots <= 0:
                 break
-            else:
-                logger.debug("Commissioning simulation: %s, its status was: %s" % (simulation.id, simulation.status.name))
-                t1 = Process(target=LocalSimulationRunner,
-                             args=(simulation, self.experiment, self.local_queue))
-                t1.daemon = True
-                t1.start()
-                self.local_queue.put('run 1')
-                commissioned.append(simulation)
+            slots, runtime = costs[simulation.id]
+            if not self.local_scheduler.fits(slots):
+                continue
+            logger.debug("Commissioning simulation: %s, its status was: %s" % (simulation.id, simulation.status.name))
+            if self.status_channel is not None:
+                # The database state (e.g. Created for a resubmitted simulation) replaces the last one sent
+                self.status_channel.set_status(simulation.id, simulation.status)
+            self.local_scheduler.start(simulation.id, LocalSimulationRunner,
+                                       (simulation, self.experiment, self.status_channel), slots)
+            commissioned.append(simulation)
         return len(commissioned)
 
+    def simulation_cost(self, simulation):
+        """
+        Expected cost of a simulation: the number of slots it takes (SLOTS_KEY, e.g. its cores, 1 by default) and its
+        relative runtime (product of the RUNTIME_KEYS found, e.g. Simulation_Duration x Node_Count, 1 if none).
+        The values are looked up in the simulation tags, then in the parameters of its config.json (only read if a key
+        is missing from the tags). The cost is computed once per simulation.
+        """
+        if simulation.id in self.simulation_costs:
+            return self.simulation_costs[simulation.id]
+
+        tags = simulation.tags or {}
+        parameters = None
+
+        def lookup(key):
+            nonlocal parameters
+            if key in tags:
+                value = tags[key]
+            else:
+                if parameters is None:
+                    parameters = self.simulation_parameters(simulation)
+                value = parameters.get(key)
+            try:
+                return float(value)
+            except (TypeError, ValueError):
+                return None
+
+        slots = lookup(self.SLOTS_KEY)
+        runtime = 1
+        for key in self.RUNTIME_KEYS:
+            value = lookup(key)
+            if value:
+                runtime *= value
+
+        self.simulation_costs[simulation.id] = max(int(slots or 1), 1), runtime
+        return self.simulation_costs[simulation.id]
+
+    @staticmethod
+    def simulation_parameters(simulation):
+        """
+        Parameters of the config.json of a simulation (empty if it cannot be read).
+        """
+        config_path = os.path.join(simulation.get_path(), 'config.json')
+        if not os.path.exists(config_path):
+            return {}
+        try:
+            with open(config_path) as config_file:
+                return json.load(config_file).get('parameters', {})
+        except (ValueError, AttributeError):
+            logger.debug("Could not read the parameters of %s" % config_path)
+            return {}
+
     def needs_commissioning(self):
         """
         Determines which simulations need to be (re)started.
@@ -1,4 +1,5 @@
 import json
+import time
 from collections import Counter
 
 from simtools.DataAccess.DataStore import DataStore
@@ -20,18 +21,26 @@ class SimulationMonitor:
     def query(self):
         logger.debug("Query the DB Monitor for Experiment %s" % self.exp_id)
         states, msgs = {}, {}
-        experiment = DataStore.get_experiment(self.exp_id)
 
-        if not experiment or not experiment.simulations:
-            return states,msgs
-
-        for sim in experiment.simulations:
-            states[sim.id] = sim.status if sim.status else SimulationState.CommissionRequested
-            msgs[sim.id] = sim.message if sim.message else ""
+        # Only the states are queried, the simulations (and their tags) are not loaded
+        for sim_id, status, message in DataStore.get_simulation_states(self.exp_id):
+            states[sim_id] = SimulationState[status] if status else SimulationState.CommissionRequested
+            msgs[sim_id] = message if message else ""
         logger.debug("States returned")
         logger.debug(Counter(states.values()))
         return states, msgs
 
+    def count(self):
+        """
+        Count the simulations by state with a single aggregate query.
+        :return: Counter SimulationState -> number of simulations
+        """
+        logger.debug("Count the states of Experiment %s" % self.exp_id)
+        counts = Counter()
+        for status, count in DataStore.count_simulation_states(self.exp_id).items():
+            counts[SimulationState[status] if status else SimulationState.CommissionRequested] += count
+        return counts
+
 
 class CompsSimulationMonitor(SimulationMonitor):
     """
@@ -45,6 +54,11 @@ class CompsSimulationMonitor(SimulationMonitor):
         self.suite_id = suite_id
         self.server_endpoint = endpoint
 
+        # The states are kept between queries so only the simulations modified since are retrieved
+        self.states = {}
+        self.last_modified = None
+        self.incremental = True
+
     @retry_function
     def query(self):
         logger.debug("Query the HPC Monitor for Experiment %s" % self.exp_id)
@@ -52,20 +66,124 @@ class CompsSimulationMonitor(SimulationMonitor):
         COMPS_login(self.server_endpoint)
         if self.suite_id:
             sims = sims_from_suite_id(self.suite_id)
+            self.states = {}
         elif self.exp_id:
-            sims = sims_from_experiment_id(self.exp_id)
+            sims = self.query_experiment()
         else:
             raise Exception(
                 'Unable to monitor COMPS simulations as metadata contains no Suite or Experiment ID:\n'
                 '(Suite ID: %s, Experiment ID:%s)' % (self.suite_id, self.exp_id))
 
-        states, msgs = {}, {}
         for sim in sims:
-            id_string = str(sim.id)
-            states[id_string] = sim.state  # this is already a SimulationState object
-            msgs[id_string] = ''
+            self.states[str(sim.id)] = sim.state  # this is already a SimulationState object
+
+        states = dict(self.states)
+        msgs = {sim_id: '' for sim_id in states}
 
         logger.debug("States returned")
         logger.debug(json.dumps(Counter([st.name for st in states.values()]), indent=3))
 
         return states, msgs
+
+    def count(self):
+        states, msgs = self.query()
+        return Counter(states.values())
+
+    def query_experiment(self):
+        """
+        Retrieve the simulations of the experiment modified since the last query (all of them the first time).
+        The last modification date is taken from COMPS so it does not depend on the local clock.
+        """
+        if self.incremental:
+            try:
+                sims = sims_from_experiment_id(self.exp_id, modified_since=self.last_modified,
+                                               select_last_modified=True)
+            except Exception as e:
+                logger.debug("Incremental query failed, querying all the simulations from now on: %s" % e)
+                self.incremental = False
+
+        if not self.incremental:
+            self.states = {}
+            return sims_from_experiment_id(self.exp_id)
+
+        for sim in sims:
+            last_modified = getattr(sim, 'last_modified', None)
+            if last_modified and (self.last_modified is None or last_modified > self.last_modified):
+                self.last_modified = last_modified
+        return sims
+
+
+class StatusPoller:
+    """
+    Poll the states of simulations until they are all finished.
+    The interval between two polls grows by BACKOFF (up to max_interval) while nothing changes and shrinks when the
+    states change. It is also capped by the expected time left, estimated from the completion rate observed so far and
+    the number of simulations remaining.
+    on_change is called with the states that changed at each poll (all the states at the first poll).
+    """
+    BACKOFF = 2
+    FINISHED = (SimulationState.Succeeded, SimulationState.Failed, SimulationState.Canceled)
+
+    def __init__(self, query, min_interval=5, max_interval=300, on_change=None):
+        """
+        :param query: Function returning the current states as a dictionary sim_id -> SimulationState
+        """
+        self.query = query
+        self.min_interval = min_interval
+        self.max_interval = max(max_interval, min_interval)
+        self.on_change = on_change
+        self.interval = min_interval
+        self.states = {}
+        self.start_time = None
+        self.start_finished = 0
+
+    @property
+    def remaining(self):
+        return sum(1 for state in self.states.values() if state not in self.FINISHED)
+
+    @property
+    def finished(self):
+        return self.start_time is not None and self.remaining == 0
+
+    def poll(self):
+        """
+        Query the states and compute the next interval.
+        :return: The states that changed since the last poll
+        """
+        states = self.query()
+        changes = {sim_id: state for sim_id, state in states.items() if self.states.get(sim_id) != state}
+        self.states.update(states)
+
+        now = time.time()
+        finished = len(self.states) - self.remaining
+        if self.start_time is None:
+            self.start_time, self.start_finished = now, finished
+
+        # Back off while nothing happens
+        if changes:
+            self.interval = max(self.min_interval, self.interval / self.BACKOFF)
+        else:
+            self.interval = min(self.max_interval, self.interval * self.BACKOFF)
+
+        # But do not sleep much longer than the time expected for the remaining simulations to finish
+        rate = (finished - self.start_finished) / (now - self.start_time) if now > self.start_time else 0
+        if rate > 0 and self.remaining:
+            self.interval = max(self.min_interval, min(self.interval, self.remaining / rate))
+
+        if changes and self.on_change:
+            self.on_change(changes)
+        return changes
+
+    def wait(self, timeout=None):
+        """
+        Poll until all the simulations are finished or the timeout (in seconds) is exhausted.
+        :return: The final states
+        """
+        deadline = time.time() + timeout if timeout else None
+        while True:
+            self.poll()
+            if self.finished:
+                return self.states
+            if deadline and time.time() + self.interval > deadline:
+                raise Exception("Timeout exhausted while waiting for the simulations to finish")
+            time.sleep(self.interval)
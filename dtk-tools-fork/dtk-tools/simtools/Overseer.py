@@ -1,4 +1,3 @@
-import multiprocessing
 import os
 import sys
 # Add the tools to the path
@@ -6,14 +5,15 @@ from multiprocessing import Manager
 
 sys.path.append(os.path.abspath('..'))
 import threading
-import time
 import traceback
 from collections import OrderedDict
 from datetime import datetime
 
 from simtools.DataAccess.DataStore import DataStore
+from simtools.DataAccess.StatusWriter import StatusWriter
 from simtools.ExperimentManager.ExperimentManagerFactory import ExperimentManagerFactory
 from simtools.SetupParser import SetupParser
+from simtools.SimulationRunner.LocalScheduler import LocalScheduler
 from simtools.Utilities.General import init_logging
 
 logger = init_logging('Overseer')
@@ -38,13 +38,13 @@ if __name__ == "__main__":
     SetupParser.init() # default block
     max_local_sims = int(SetupParser.get('max_local_sims'))
 
-    # Create the queue
-    local_queue = multiprocessing.Queue(max_local_sims)
+    # Runs the local simulations, notified as soon as one exits
+    local_scheduler = LocalScheduler(max_local_sims)
 
     managers = OrderedDict()
 
     # Queue to be shared among all runners in order to update the individual simulation states in the DB
-    manager = Manager()
+    status_writer = StatusWriter(Manager()).start()
 
     # Take this opportunity to cleanup the logs
     lc = threading.Thread(target=LogCleaner)
@@ -53,6 +53,9 @@ if __name__ == "__main__":
     count = 0
 
     while True:
+        # Save the last states sent by the runners before reading them
+        status_writer.flush()
+
         # Retrieve the active LOCAL experiments
         active_experiments = DataStore.get_active_experiments()
         logger.debug('Waiting loop pass number %d, pid %d' % (count, os.getpid()))
@@ -76,7 +79,9 @@ if __name__ == "__main__":
                     logger.debug(traceback.format_exc())
 
                 if manager:
-                    if manager.location == "LOCAL": manager.local_queue = local_queue
+                    if manager.location == "LOCAL":
+                        manager.local_scheduler = local_scheduler
+                        manager.status_channel = status_writer.channel
                     managers[experiment.id] = manager
 
             else:
@@ -110,7 +115,10 @@ if __name__ == "__main__":
         # Do not use len() to not block anything
         if not managers: break
 
-        time.sleep(10)
+        # Check again in 10s for new experiments or as soon as a local simulation exits to backfill its slots
+        local_scheduler.wait(10)
         count += 1
 
+    status_writer.stop()
+
 logger.debug('No more work to do, Overseer pid: %d exiting...' % os.getpid())
@@ -1,5 +1,6 @@
 import logging
 import os
+import pickle
 from abc import abstractmethod, ABCMeta
 
 from simtools.AssetManager.SimulationAssets import SimulationAssets
@@ -22,9 +23,51 @@ class SimConfigBuilder(metaclass=ABCMeta):
         self.human_readability = True
         if kwargs: self.update_params(kwargs, validate=True)
 
+    def __getattr__(self, name):
+        # Only called for missing attributes: the copies of a frozen builder deserialize an attribute on first access
+        frozen = self.__dict__.get('_frozen_base')
+        if frozen is None or name not in frozen.attributes:
+            raise AttributeError("'%s' object has no attribute '%s'" % (self.__class__.__name__, name))
+
+        value = frozen.copy_attribute(name)
+        self.__dict__[name] = value
+        return value
+
+    def __getstate__(self):
+        # Pickle the copies of a frozen builder as a regular builder
+        state = self.__dict__.copy()
+        frozen = state.pop('_frozen_base', None)
+        if frozen is not None:
+            for name in frozen.attributes:
+                if name not in state:
+                    state[name] = frozen.copy_attribute(name)
+        return state
+
     def copy_from(self, other):
         self.__dict__ = other.__dict__.copy()
 
+    def freeze(self):
+        """
+        Take a snapshot of the builder to be used as the shared base of many simulations.
+        Modifying the builder afterwards does not change the snapshot.
+        :return: A FrozenConfigBuilder
+        """
+        return FrozenConfigBuilder(self)
+
+    def shared_value(self, attribute, key, compute):
+        """
+        Compute a value derived from an attribute (for example the serialized campaign).
+        For a copy of a frozen builder which never accessed the attribute, the value is computed once on the frozen
+        base and shared by all the copies.
+        :param attribute: Name of the attribute the value is derived from
+        :param key: Identifies the derived value
+        :param compute: Function taking the attribute and returning the value
+        """
+        frozen = self.__dict__.get('_frozen_base')
+        if frozen is not None and attribute not in self.__dict__:
+            return frozen.derived_value(attribute, key, compute)
+        return compute(getattr(self, attribute))
+
     @property
     def params(self):
         return self.config
@@ -63,12 +106,19 @@ class SimConfigBuilder(metaclass=ABCMeta):
     def get_commandline(self):
         return CommandlineGenerator('executable', [], {})
 
-    def dump_files(self, working_directory):
+    def dump_files(self, working_directory, content_store=None):
+        """
+        Write the simulation files in working_directory.
+        If a ContentStore is given, the files are links to the deduplicated contents of the store.
+        """
         if not os.path.exists(working_directory):
             os.makedirs(working_directory)
 
         def write_file(name, content):
             filename = os.path.join(working_directory, '%s' % name)
+            if content_store is not None:
+                content_store.write_text(filename, content)
+                return
             with open(filename, 'w') as f:
                 f.write(content)
 
@@ -138,3 +188,37 @@ class SimConfigBuilder(metaclass=ABCMeta):
 
         return set.union(dlls, inputs, exe, experiment_files)
 
+
+
+class FrozenConfigBuilder(object):
+    """
+    Read-only snapshot of a config builder.
+    Every attribute is serialized once. The copies returned by copy() only deserialize the attributes they access
+    (for example the config when a parameter is set, the campaign when an event is added) and share the others with
+    the snapshot, avoiding a full copy of the builder for every simulation.
+    """
+    def __init__(self, config_builder):
+        self.builder_class = config_builder.__class__
+        self.attributes = {name: pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+                           for name, value in config_builder.__getstate__().items()}
+        self.values = {}
+        self.derived = {}
+
+    def copy(self):
+        """
+        :return: A new builder of the original class, behaving as an independent copy of the snapshot
+        """
+        cb = self.builder_class.__new__(self.builder_class)
+        cb.__dict__['_frozen_base'] = self
+        return cb
+
+    def copy_attribute(self, name):
+        return pickle.loads(self.attributes[name])
+
+    def derived_value(self, attribute, key, compute):
+        if (attribute, key) not in self.derived:
+            # The shared instance is only given to compute and never modified
+            if attribute not in self.values:
+                self.values[attribute] = self.copy_attribute(attribute)
+            self.derived[(attribute, key)] = compute(self.values[attribute])
+        return self.derived[(attribute, key)]
@@ -3,6 +3,7 @@ from abc import abstractmethod, ABCMeta
 from multiprocessing import Process
 
 from simtools.DataAccess.DataStore import DataStore
+from simtools.DBLogging.Tracer import tracer
 from simtools.SetupParser import SetupParser
 
 
@@ -20,6 +21,7 @@ class BaseSimulationCreator(Process):
         self.work_queue = work_queue
         self.cache = cache
         self.created_simulations = []
+        self.prepared_assets = {}
         self.setup_parser_singleton = SetupParser.singleton
 
     def run(self):
@@ -35,9 +37,14 @@ class BaseSimulationCreator(Process):
     def process(self):
         self.pre_creation()
 
+        # Every simulation starts from a copy of the frozen builder only copying what the mod functions access
+        base = self.config_builder.freeze()
+
+        trace_id = self.experiment.exp_id
         for batch in iter(self.work_queue.get, None):
+            batch_span = tracer.span('create.batch', trace_id).start()
             for mod_fn_list in batch:
-                cb = pickle.loads(pickle.dumps(self.config_builder, protocol=pickle.HIGHEST_PROTOCOL))
+                cb = base.copy()
 
                 # modify next simulation according to experiment builder
                 # also retrieve the returned metadata
@@ -46,8 +53,8 @@ class BaseSimulationCreator(Process):
                     md = func(cb)
                     tags.update(md)
 
-                # Prepare the assets assets
-                cb.assets.prepare(cb)
+                # Prepare the assets
+                cb.assets = self.prepare_assets(cb)
 
                 # Create the simulation
                 s = self.create_simulation(cb)
@@ -56,13 +63,33 @@ class BaseSimulationCreator(Process):
                 self.set_tags_to_simulation(s, tags, cb)
 
                 # Add the files
-                self.add_files_to_simulation(s, cb)
+                with tracer.span('create.files', trace_id):
+                    self.add_files_to_simulation(s, cb)
 
                 # Add to the created simulations array
                 self.created_simulations.append(s)
 
-            self.process_batch()
+            with tracer.span('create.save_batch', trace_id):
+                self.process_batch()
             self.post_creation()
+            batch_span.stop()
+
+    def prepare_assets(self, cb):
+        """
+        Prepare the assets of a simulation. The assets only depend on their own settings and on the files needed by the
+        config builder so they are prepared once for all the simulations sharing those.
+        :return: The prepared assets
+        """
+        key = (cb.shared_value('assets', 'pickle', lambda assets: pickle.dumps(assets, protocol=pickle.HIGHEST_PROTOCOL)),
+               tuple(sorted(cb.get_input_file_paths())),
+               tuple(sorted(cb.get_dll_paths_for_asset_manager())))
+
+        if key not in self.prepared_assets:
+            with tracer.span('create.assets', self.experiment.exp_id):
+                cb.assets.prepare(cb)
+            self.prepared_assets[key] = cb.assets
+
+        return self.prepared_assets[key]
 
     def process_batch(self):
         self.save_batch()
@@ -0,0 +1,142 @@
+import hashlib
+import os
+import shutil
+import tempfile
+
+from simtools.Utilities.General import init_logging
+
+logger = init_logging('ContentStore')
+
+
+class ContentStore:
+    """
+    Content-addressed store of the simulation files of a LOCAL experiment.
+    Every distinct content is written once in the store (named after its hash) and the simulation directories get
+    links to it. Hard links are used when possible, then symbolic links, and finally plain copies if the file system
+    does not support links.
+
+    As the links share their content with the store, the files of a simulation directory should not be modified in
+    place once created.
+    """
+    DIRECTORY = '.store'
+    LINK_MODES = ('hard', 'symbolic', 'copy')
+
+    def __init__(self, root, link_mode='hard'):
+        """
+        :param root: Directory of the store (created if needed)
+        :param link_mode: Preferred way to link the files ('hard', 'symbolic' or 'copy'). Degrades to the next modes
+        if not supported
+        """
+        if link_mode not in self.LINK_MODES:
+            raise ValueError("link_mode should be one of {}, got {}".format(self.LINK_MODES, link_mode))
+
+        self.root = os.path.abspath(root)
+        self.link_mode = link_mode
+        self.file_digests = {}
+        self.stats = {'stored': 0, 'linked': 0, 'bytes_stored': 0, 'bytes_linked': 0}
+        os.makedirs(self.root, exist_ok=True)
+
+    def path(self, digest):
+        return os.path.join(self.root, digest[0:2], digest)
+
+    def add_text(self, content):
+        """
+        Store a text content (written in text mode, as the files of the config builder).
+        :return: The digest of the content
+        """
+        digest = hashlib.sha1(content.encode('utf-8')).hexdigest()
+        path = self.path(digest)
+        if not os.path.exists(path):
+            self._write(path, lambda f: f.write(content), 'w')
+            self._count('stored', os.path.getsize(path))
+        return digest
+
+    def add_file(self, source):
+        """
+        Store the content of an existing file. Files are only hashed again if their size or modification time changed.
+        :return: The digest of the content
+        """
+        source = os.path.abspath(source)
+        st = os.stat(source)
+        key = (source, st.st_size, st.st_mtime)
+
+        digest = self.file_digests.get(key)
+        if digest is None:
+            digest = self.hash_file(source)
+            self.file_digests[key] = digest
+
+        path = self.path(digest)
+        if not os.path.exists(path):
+            self._write(path, lambda f: self._copy_content(source, f), 'wb')
+            self._count('stored', st.st_size)
+        return digest
+
+    def write_text(self, destination, content):
+        """
+        Write a text file as a link to the store.
+        """
+        self.link(self.add_text(content), destination)
+
+    def copy_file(self, source, destination):
+        """
+        Copy a file as a link to the store. destination can be a directory as for shutil.copy.
+        """
+        if os.path.isdir(destination):
+            destination = os.path.join(destination, os.path.basename(source))
+        self.link(self.add_file(source), destination)
+
+    def link(self, digest, destination):
+        path = self.path(digest)
+        if os.path.lexists(destination):
+            os.remove(destination)
+
+        while True:
+            try:
+                if self.link_mode == 'hard':
+                    os.link(path, destination)
+                elif self.link_mode == 'symbolic':
+                    os.symlink(path, destination)
+                else:
+                    shutil.copyfile(path, destination)
+                break
+            except (OSError, NotImplementedError) as e:
+                if self.link_mode == 'copy':
+                    raise
+                fallback = self.LINK_MODES[self.LINK_MODES.index(self.link_mode) + 1]
+                logger.debug("Cannot create %s links in %s (%s), using %s" % (self.link_mode, self.root, e, fallback))
+                self.link_mode = fallback
+
+        self._count('linked', os.path.getsize(path))
+
+    @staticmethod
+    def hash_file(source, block_size=2**20):
+        sha = hashlib.sha1()
+        with open(source, 'rb') as f:
+            for block in iter(lambda: f.read(block_size), b''):
+                sha.update(block)
+        return sha.hexdigest()
+
+    @staticmethod
+    def _copy_content(source, f):
+        with open(source, 'rb') as src:
+            shutil.copyfileobj(src, f)
+
+    def _write(self, path, write, mode):
+        # Write in a temporary file then rename to never expose a partial file to the other creator processes
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.tmp')
+        try:
+            with os.fdopen(fd, mode) as f:
+                write(f)
+            # mkstemp only gives access to the owner
+            os.chmod(tmp_path, 0o644)
+            os.replace(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def _count(self, kind, size):
+        self.stats[kind] += 1
+        self.stats['bytes_%s' % kind] += size
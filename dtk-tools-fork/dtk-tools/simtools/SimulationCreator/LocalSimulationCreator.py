@@ -2,7 +2,9 @@ import os
 import random
 import string
 
+from simtools.SetupParser import SetupParser
 from simtools.SimulationCreator.BaseSimulationCreator import BaseSimulationCreator
+from simtools.SimulationCreator.ContentStore import ContentStore
 
 
 class LocalSim:
@@ -36,10 +38,14 @@ class LocalSimulationCreator(BaseSimulationCreator):
         pass
 
     def pre_creation(self):
-        pass
+        # Identical files (input files, campaign...) are stored once in the experiment directory and linked
+        self.content_store = None
+        if SetupParser.getboolean('dedup_simulation_files', default=True):
+            self.content_store = ContentStore(os.path.join(self.experiment.get_path(), ContentStore.DIRECTORY),
+                                              link_mode=SetupParser.get('simulation_files_link', default='hard'))
 
     def add_files_to_simulation(self, s, cb):
-       cb.dump_files(s.sim_dir)
+       cb.dump_files(s.sim_dir, content_store=self.content_store)
 
     def set_tags_to_simulation(self,s, tags, cb):
         s.tags = tags
\ No newline at end of file
@@ -1,10 +1,7 @@
-import time
-
 from COMPS.Data.Simulation import SimulationState
 
 from simtools.DataAccess.DataStore import DataStore
-from simtools.ExperimentManager.CompsExperimentManager import CompsExperimentManager
-from simtools.Monitor import CompsSimulationMonitor
+from simtools.Monitor import CompsSimulationMonitor, StatusPoller
 from simtools.SimulationRunner.BaseSimulationRunner import BaseSimulationRunner
 from simtools.Utilities.COMPSUtilities import experiment_needs_commission, COMPS_login
 from simtools.Utilities.General import init_logging
@@ -13,6 +10,8 @@ logger = init_logging('Runner')
 
 
 class COMPSSimulationRunner(BaseSimulationRunner):
+    MAX_MONITOR_SLEEP = 60  # seconds
+
     def __init__(self, experiment, comps_experiment):
         logger.debug('Create COMPSSimulationRunner with experiment: %s' % experiment.id)
         super(COMPSSimulationRunner, self).__init__(experiment)
@@ -41,26 +40,25 @@ class COMPSSimulationRunner(BaseSimulationRunner):
         # Create the monitor
         monitor = CompsSimulationMonitor(self.experiment.exp_id, None, self.experiment.endpoint)
 
-        # Until done, update the status
-        while True:
+        def query():
             try:
                 states, _ = monitor.query()
                 if states == {}:
                     # No states returned... Consider failed
-                    states = {sim_id:SimulationState.Failed for sim_id in last_states.keys()}
+                    states = {sim_id: SimulationState.Failed for sim_id in last_states.keys()}
+                return states
             except Exception as e:
                 logger.error('Exception in the COMPS Monitor for experiment %s' % self.experiment.id)
                 logger.error(e)
-
-            # Only update the simulations that changed since last check
-            # We are also including simulations that were not present (in case we add some later)
-            DataStore.batch_simulations_update(list({"sid": key, "status":states[key].name} for key in states if (key in last_states and last_states[key] != states[key]) or key not in last_states))
-
-            # Store the last state
-            last_states = states
-
-            if CompsExperimentManager.status_finished(states):
-                logger.debug('Stop monitoring for experiment %s because all simulations finished' % self.experiment.id)
-                break
-
-            time.sleep(self.MONITOR_SLEEP)
+                return {}
+
+        # Only update the simulations that changed since last check
+        # We are also including simulations that were not present (in case we add some later)
+        def save(changes):
+            DataStore.batch_simulations_update([{"sid": key, "status": state.name} for key, state in changes.items()])
+
+        # Poll less often while nothing changes
+        poller = StatusPoller(query, min_interval=self.MONITOR_SLEEP, max_interval=self.MAX_MONITOR_SLEEP, on_change=save)
+        poller.states.update(last_states)
+        poller.wait()
+        logger.debug('Stop monitoring for experiment %s because all simulations finished' % self.experiment.id)
@@ -4,6 +4,7 @@ import subprocess
 import time
 
 from simtools.DataAccess.DataStore import DataStore
+from simtools.DBLogging.Tracer import tracer
 from simtools.SimulationRunner.BaseSimulationRunner import BaseSimulationRunner
 from simtools.Utilities.General import init_logging, is_running
 logger = init_logging("LocalRunner")
@@ -14,20 +15,34 @@ class LocalSimulationRunner(BaseSimulationRunner):
     """
     Run one simulation.
     """
-    def __init__(self, simulation, experiment, thread_queue):
+    # The status message changes at every time step, only save it every MESSAGE_SAVE_INTERVAL seconds
+    MESSAGE_SAVE_INTERVAL = 30
+
+    def __init__(self, simulation, experiment, status_channel=None):
         super(LocalSimulationRunner, self).__init__(experiment)
-        self.queue = thread_queue # used to limit the number of concurrently running simulations
         self.simulation = simulation
+        self.status_channel = status_channel    # StatusChannel of the Overseer StatusWriter, DataStore if None
         self.sim_dir = self.simulation.get_path()
+        self.process = None     # Popen of the simulation we started, psutil.Process of the one we attach to
+
+        # status.txt is tailed from the last offset read
+        self._status_offset = 0
+        self._status_partial = ""
+        self._status_line = ""
+
+        # Last values saved in the DataStore
+        self._saved = None
+        self._saved_time = 0
 
+        # The slots are released by the LocalScheduler when this process exits
         if self.check_state() == SimulationState.Created:
             self.run()
         else:
-            self.queue.get()
             if self.simulation.status not in (SimulationState.Failed, SimulationState.Succeeded, SimulationState.Canceled):
                 self.monitor()
 
     def run(self):
+        span = tracer.span('run.simulation', self.experiment.exp_id).start()
         try:
             with open(os.path.join(self.sim_dir, "StdOut.txt"), "w") as out, open(os.path.join(self.sim_dir, "StdErr.txt"), "w") as err:
                 # On windows we want to pass the command to popen as a string
@@ -39,10 +54,10 @@ class LocalSimulationRunner(BaseSimulationRunner):
                     command = shlex.split(self.experiment.command_line)
 
                 # Launch the command
-                p = subprocess.Popen(command, cwd=self.sim_dir, shell=False, stdout=out, stderr=err)
+                self.process = subprocess.Popen(command, cwd=self.sim_dir, shell=False, stdout=out, stderr=err)
 
                 # We are now running
-                self.simulation.pid = p.pid
+                self.simulation.pid = self.process.pid
                 self.simulation.status = SimulationState.Running
                 self.update_status()
 
@@ -50,25 +65,22 @@ class LocalSimulationRunner(BaseSimulationRunner):
         except Exception as e:
             print("Error encountered while running the simulation.")
             print(e)
-        finally:
-            # Allow another different thread to run now that this one is done.
-            self.queue.get()
+        span.stop()
 
     def monitor(self):
         """
         Monitors the simulation process and update its status.
         """
         sim_pid = self.simulation.pid
+        logger.debug("monitor: waiting on pid: %s" % sim_pid)
 
-        while is_running(sim_pid, name_part=self.experiment.exe_name) and self.simulation.status != "Cancelled":
-            logger.debug("monitor: waiting on pid: %s" % sim_pid)
+        while not self.wait_for_exit(self.MONITOR_SLEEP):
             self.simulation.message = self.last_status_line()
             self.update_status()
-            time.sleep(self.MONITOR_SLEEP)
 
         logger.debug("monitor: done waiting on pid: %s" % sim_pid)
 
-        # When poll returns None, the process is done, test if succeeded or failed
+        # The process is done, test if succeeded or failed
         last_message = self.last_status_line()
         last_state = self.check_state()
 
@@ -83,31 +95,111 @@ class LocalSimulationRunner(BaseSimulationRunner):
         logger.debug("monitor: Updating sim: %s with pid: %s to status: %s" % (self.simulation.id, sim_pid, self.simulation.status.name))
         self.simulation.message = last_message
         self.simulation.pid = None
-        self.update_status()
+        self.update_status(force=True)
+
+    def wait_for_exit(self, timeout):
+        """
+        Wait for the simulation process to exit, at most timeout seconds.
+        The process we started is waited on directly. A process started before (e.g. by a previous Overseer) is
+        identified once by its pid and name, then only checked for being alive.
+        :return: True if the process exited
+        """
+        if self.process is None:
+            self.process = self.attach(self.simulation.pid)
+            if self.process is None:
+                return True
+
+        if isinstance(self.process, subprocess.Popen):
+            try:
+                self.process.wait(timeout)
+                return True
+            except subprocess.TimeoutExpired:
+                return False
+
+        import psutil
+        try:
+            self.process.wait(timeout)
+            return True
+        except psutil.TimeoutExpired:
+            return False
 
-    def update_status(self):
-        # For local sim, we save the object so we have the info we need
-        DataStore.save_simulation(self.simulation)
+    def attach(self, pid):
+        """
+        :return: The psutil.Process of the simulation if it is still running, None otherwise
+        """
+        if not is_running(pid, name_part=self.experiment.exe_name):
+            return None
+
+        import psutil
+        try:
+            return psutil.Process(int(pid))
+        except psutil.NoSuchProcess:
+            return None
+
+    def update_status(self, force=False):
+        """
+        Save the simulation if it changed. Changes of the status message alone are saved every
+        MESSAGE_SAVE_INTERVAL seconds unless force is True.
+        """
+        values = (self.simulation.status, self.simulation.pid, self.simulation.message)
+        if values == self._saved:
+            return
+        if not force and self._saved is not None and values[0:2] == self._saved[0:2] \
+                and time.time() - self._saved_time < self.MESSAGE_SAVE_INTERVAL:
+            return
+
+        if self.status_channel is not None:
+            self.status_channel.put(self.simulation)
+        else:
+            # For local sim, we save the object so we have the info we need
+            DataStore.save_simulation(self.simulation)
+        self._saved = values
+        self._saved_time = time.time()
 
     def last_status_line(self):
         """
         Returns the last line of the status.txt file for the simulation.
-        None if the file doesnt exist or is empty
+        Only the part of the file written since the last call is read.
+        Empty string if the file doesnt exist or is empty
         :return:
         """
         status_path = os.path.join(self.sim_dir, 'status.txt')
-        msg = None
-        if os.path.exists(status_path) and os.stat(status_path).st_size != 0:
-            with open(status_path, 'r') as status_file:
-                msg = list(status_file)[-1]
-
-        return msg.strip('\n') if msg else ""
+        try:
+            size = os.path.getsize(status_path)
+        except OSError:
+            return self._status_line
+
+        if size < self._status_offset:
+            # The file was rewritten
+            self._status_offset = 0
+            self._status_partial = ""
+            self._status_line = ""
+
+        if size > self._status_offset:
+            with open(status_path, 'rb') as status_file:
+                status_file.seek(self._status_offset)
+                data = status_file.read(size - self._status_offset)
+            self._status_offset += len(data)
+
+            lines = (self._status_partial + data.decode(errors='replace')).split('\n')
+            # The last line may still be being written
+            self._status_partial = lines.pop()
+            complete = [line.rstrip('\r') for line in lines if line.strip()]
+            if complete:
+                self._status_line = complete[-1]
+
+        partial = self._status_partial.rstrip('\r')
+        return partial if partial.strip() else self._status_line
 
     def check_state(self):
         """
         Update the simulation and check its state
         Returns: state of the simulation or None
         """
+        status = self.status_channel.get_status(self.simulation.id) if self.status_channel is not None else None
+        if status is not None:
+            self.simulation.status = SimulationState[status]
+            return self.simulation.status
+
         self.simulation = DataStore.get_simulation(self.simulation.id)
         return self.simulation.status
-
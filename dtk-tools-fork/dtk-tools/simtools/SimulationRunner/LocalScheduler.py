@@ -0,0 +1,79 @@
+import time
+from collections import OrderedDict
+from multiprocessing import Process
+from multiprocessing.connection import wait
+
+from simtools.Utilities.General import init_logging
+
+logger = init_logging("LocalScheduler")
+
+
+class LocalScheduler(object):
+    """
+    Runs the local simulations (one process each) on a fixed number of slots.
+    A simulation takes one or more slots (e.g. its cores or its share of the memory) and the scheduler is notified
+    as soon as a process exits (wait() blocks on the process sentinels) so the freed slots can be filled right away.
+    """
+
+    def __init__(self, max_slots):
+        self.max_slots = max(int(max_slots), 1)
+        self.running = OrderedDict()    # simulation id -> (process, slots)
+
+    @property
+    def used_slots(self):
+        return sum(slots for process, slots in self.running.values())
+
+    @property
+    def free_slots(self):
+        return self.max_slots - self.used_slots
+
+    def fits(self, slots):
+        """
+        A simulation fits if its slots are free. Simulations larger than the machine are run alone.
+        """
+        return min(slots, self.max_slots) <= self.free_slots
+
+    def is_running(self, sim_id):
+        return sim_id in self.running and self.running[sim_id][0].is_alive()
+
+    def start(self, sim_id, target, args, slots=1):
+        """
+        Start target(*args) in a new process occupying the given slots.
+        """
+        process = Process(target=target, args=args)
+        process.daemon = True
+        process.start()
+        self.running[sim_id] = (process, min(slots, self.max_slots))
+        logger.debug("Started simulation %s (pid %s) on %d slot(s), %d/%d used"
+                     % (sim_id, process.pid, min(slots, self.max_slots), self.used_slots, self.max_slots))
+        return process
+
+    def reap(self):
+        """
+        Release the slots of the processes that exited.
+        :return: The ids of their simulations
+        """
+        finished = [sim_id for sim_id, (process, slots) in self.running.items() if not process.is_alive()]
+        for sim_id in finished:
+            process, slots = self.running.pop(sim_id)
+            process.join()
+            logger.debug("Simulation %s exited (code %s), %d/%d slots used"
+                         % (sim_id, process.exitcode, self.used_slots, self.max_slots))
+        return finished
+
+    def wait(self, timeout=None):
+        """
+        Wait until a process exits or the timeout (in seconds) elapses.
+        :return: The ids of the simulations whose process exited
+        """
+        if not self.running:
+            if timeout:
+                time.sleep(timeout)
+            return []
+
+        ready = wait([process.sentinel for process, slots in self.running.values()], timeout)
+        # The sentinel is ready as the process exits, join it to collect its exit code
+        for process, slots in self.running.values():
+            if process.sentinel in ready:
+                process.join()
+        return self.reap()
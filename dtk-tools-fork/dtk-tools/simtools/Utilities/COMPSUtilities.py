@@ -347,8 +347,17 @@ def experiment_needs_commission(e):
     return e.get_simulations(QueryCriteria().select(['id']).where("state=%d" % SimulationState.Created.value))
 
 
-def sims_from_experiment_id(exp_id):
-    return Simulation.get(query_criteria=QueryCriteria().select(['id', 'state']).where('experiment_id=%s' % exp_id))
+def sims_from_experiment_id(exp_id, modified_since=None, select_last_modified=False):
+    """
+    Get the id and state of the simulations of an experiment.
+    :param modified_since: If given, only the simulations modified at or after this (COMPS) date are returned
+    :param select_last_modified: Also retrieve the last modification date of the simulations
+    """
+    fields = ['id', 'state', 'last_modified'] if select_last_modified or modified_since else ['id', 'state']
+    criteria = ['experiment_id=%s' % exp_id]
+    if modified_since:
+        criteria.append('last_modified>=%s' % modified_since.strftime('%Y-%m-%d %T'))
+    return Simulation.get(query_criteria=QueryCriteria().select(fields).where(criteria))
 
 
 def sims_from_suite_id(suite_id):
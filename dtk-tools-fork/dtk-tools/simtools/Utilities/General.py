@@ -441,10 +441,9 @@ def batch(iterator, n=1):
                 res.append(next(iterator))
         except StopIteration:
             pass
-        finally:
-            if not res:
-                raise StopIteration()
-            yield res
+        if not res:
+            return
+        yield res
 
 
 def batch_list(iterable, n=1):
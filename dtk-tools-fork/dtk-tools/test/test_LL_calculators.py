@@ -0,0 +1,31 @@
+import unittest
+
+import numpy as np
+from scipy.stats import betabinom
+
+from calibtool.LL_calculators import beta_binomial_vectorized
+
+
+class TestBetaBinomialVectorized(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.RandomState(1)
+        self.trials = np.full((5, 20), 2.5e6)
+        self.sim = rng.poisson(500, size=(5, 20)).astype(float)
+        self.ref = rng.poisson(400, size=20).astype(float)
+
+    def expected(self, ref, sim, trials):
+        return betabinom.logpmf(ref, trials, 1 + sim, 1 + trials - sim).sum(axis=-1)
+
+    def test_single_sample(self):
+        LL = beta_binomial_vectorized(self.ref, self.sim[0], self.trials[0])
+        self.assertAlmostEqual(LL, self.expected(self.ref, self.sim[0], self.trials[0]), places=5)
+
+    def test_all_samples(self):
+        LL = beta_binomial_vectorized(self.ref, self.sim, self.trials)
+        self.assertEqual(LL.shape, (5,))
+        np.testing.assert_allclose(LL, self.expected(self.ref, self.sim, self.trials), rtol=1e-9)
+
+
+if __name__ == '__main__':
+    unittest.main()
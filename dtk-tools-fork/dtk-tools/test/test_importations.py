@@ -0,0 +1,97 @@
+import unittest
+
+import numpy as np
+
+from scipy.stats import norm
+
+from dtk.interventions.importation_sampler import ImportationSampler
+from dtk.interventions.outbreakindividualdengue import group_importations
+
+
+class TestGroupImportations(unittest.TestCase):
+
+    def setUp(self):
+        self.node_ids = [10, 11, 12]
+        self.populations = [100, 100, 50]
+        self.importations = np.zeros((3, 20))
+
+    def test_same_day_same_coverage(self):
+        self.importations[0, 3] = 1
+        self.importations[1, 3] = 1
+        self.importations[2, 3] = 1
+        events = group_importations(self.importations, self.node_ids, self.populations)
+        self.assertEqual(len(events), 2)
+        self.assertEqual(events[0]['nodes'], [10, 11])
+        self.assertEqual(events[0]['coverage'], 0.01)
+        self.assertEqual(events[1]['nodes'], [12])
+        self.assertEqual(events[1]['coverage'], 0.02)
+
+    def test_repetitions(self):
+        self.importations[0, [2, 4, 6, 8, 15]] = 2
+        events = group_importations(self.importations, self.node_ids, self.populations, start_day=1)
+        self.assertEqual([(e['start_day'], e['repetitions'], e['interval']) for e in events], [(3, 4, 2), (16, 1, -1)])
+
+    def test_all_importations_covered(self):
+        rng = np.random.RandomState(0)
+        importations = rng.poisson(0.3, size=(3, 200))
+        events = group_importations(importations, self.node_ids, self.populations)
+        self.assertLess(len(events), np.count_nonzero(importations))
+
+        rebuilt = np.zeros((3, 200))
+        for e in events:
+            for r in range(e['repetitions']):
+                day = e['start_day'] + r * e['interval'] if e['repetitions'] > 1 else e['start_day']
+                for node in e['nodes']:
+                    i = self.node_ids.index(node)
+                    rebuilt[i, day] += e['coverage'] * self.populations[i]
+        np.testing.assert_allclose(rebuilt, importations)
+
+
+class TestImportationSampler(unittest.TestCase):
+
+    def setUp(self):
+        self.sampler = ImportationSampler([10, 11, 12, 13], [100, 400, 100, 400], import_node_cnt=2)
+        self.days = range(1, 300)
+        self.params = ([[0.5], [0.7]], [[10], [20]], [[100], [50]])
+
+    def test_import_nodes(self):
+        self.assertEqual(self.sampler.import_nodes, [11, 13])
+        np.testing.assert_allclose(self.sampler.p_vals, [0.1, 0.4, 0.1, 0.4])
+
+    def test_force_of_importation(self):
+        foi = ImportationSampler.force_of_importation([[0.5, 0.2]], [[10, 5]], [[100, 3]], self.days)
+        expected = 100 * norm(0.5 * len(self.days), 10).pdf(self.days) + 3 * norm(0.2 * len(self.days), 5).pdf(self.days)
+        np.testing.assert_allclose(foi[0], expected)
+
+    def test_not_distributed(self):
+        matrix = self.sampler.sample(*self.params, days=self.days, distribute=False, seed=1)
+        self.assertEqual(matrix.shape, (4, len(self.days)))
+        self.assertEqual(matrix[[0, 2]].sum(), 0)
+        self.assertGreater(matrix[1].sum(), 0)
+        self.assertGreater(matrix[3].sum(), 0)
+
+    def test_distributed(self):
+        kept = self.sampler.sample(*self.params, days=self.days, distribute=False, seed=1)
+        spread = self.sampler.sample(*self.params, days=self.days, seed=1)
+        # Same Poisson draws, only the nodes change
+        np.testing.assert_array_equal(kept.sum(axis=0), spread.sum(axis=0))
+        self.assertGreater(spread[[0, 2]].sum(), 0)
+
+    def test_reproducible(self):
+        seed = ImportationSampler.seed_from_params({'Import_Times_11_0': 0.5, 'TEMPORARY_RAINFALL': 10})
+        self.assertEqual(seed, ImportationSampler.seed_from_params({'TEMPORARY_RAINFALL': 10, 'Import_Times_11_0': 0.5}))
+        np.testing.assert_array_equal(self.sampler.sample(*self.params, days=self.days, seed=seed),
+                                      self.sampler.sample(*self.params, days=self.days, seed=seed))
+
+    def test_replicates(self):
+        params = {'Import_Times_11_0': 0.5, 'TEMPORARY_RAINFALL': 10}
+        seeds = [ImportationSampler.seed_from_params(params, run_number) for run_number in (1, 2)]
+        self.assertNotEqual(seeds[0], seeds[1])
+        self.assertEqual(seeds[0], ImportationSampler.seed_from_params(params, 1))
+
+        matrices = [self.sampler.sample(*self.params, days=self.days, seed=seed) for seed in seeds]
+        self.assertFalse(np.array_equal(matrices[0], matrices[1]))
+
+
+if __name__ == '__main__':
+    unittest.main()
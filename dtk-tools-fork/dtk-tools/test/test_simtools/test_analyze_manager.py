@@ -0,0 +1,85 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from COMPS.Data.Simulation import SimulationState
+from sqlalchemy import create_engine
+
+import simtools.DataAccess as DataAccess
+from simtools.Analysis.AnalyzeManager import AnalyzeManager
+from simtools.Analysis.BaseAnalyzers.BaseAnalyzer import BaseAnalyzer
+from simtools.DataAccess.DataStore import DataStore
+from simtools.DataAccess.Schema import Base
+
+
+class SumAnalyzer(BaseAnalyzer):
+    """
+    Sum the "value" of the output of the simulations, skipping the ones tagged skip.
+    """
+
+    def __init__(self):
+        super().__init__(filenames=['output/result.json'])
+        self.reduced = []
+
+    def filter(self, simulation):
+        return not simulation.tags.get('skip')
+
+    def select_simulation_data(self, data, simulation):
+        return data['output/result.json']['value']
+
+    def initial_accumulator(self):
+        return 0
+
+    def reduce(self, accumulator, simulation, data):
+        self.reduced.append(simulation.id)
+        return accumulator + data
+
+    def finalize(self, all_data):
+        return all_data
+
+
+class TestAnalyzeManagerReduce(unittest.TestCase):
+
+    def setUp(self):
+        # Work on a temporary database and simulation root
+        self.directory = tempfile.mkdtemp()
+        self.engine = create_engine('sqlite:///%s' % os.path.join(self.directory, 'db.sqlite'))
+        Base.metadata.create_all(self.engine)
+        DataAccess.Session.configure(bind=self.engine)
+
+        experiment = DataStore.create_experiment(exp_id='exp_1', exp_name='test', location='LOCAL',
+                                                 sim_root=self.directory)
+        simulations = []
+        for i in range(5):
+            status = SimulationState.Failed if i == 4 else SimulationState.Succeeded
+            simulation = DataStore.create_simulation(id='sim_%d' % i, status=status, tags={'skip': i == 3})
+            output = os.path.join(self.directory, experiment.id, simulation.id, 'output')
+            os.makedirs(output)
+            with open(os.path.join(output, 'result.json'), 'w') as result:
+                json.dump({'value': 10 ** i}, result)
+            simulations.append(simulation)
+        experiment.simulations = simulations
+        DataStore.save_experiment(experiment, verbose=False)
+
+    def tearDown(self):
+        DataAccess.Session.configure(bind=DataAccess.engine)
+        self.engine.dispose()
+        shutil.rmtree(self.directory)
+
+    def test_reduce(self):
+        analyzer = SumAnalyzer()
+        self.assertTrue(analyzer.uses_reduce)
+
+        am = AnalyzeManager(exp_list=DataStore.get_experiment('exp_1'), analyzers=analyzer, verbose=False)
+        am.analyze()
+
+        # The failed simulation is ignored and the skipped one is not reduced
+        self.assertEqual(sorted(analyzer.reduced), ['sim_0', 'sim_1', 'sim_2'])
+        # finalize only received the accumulator
+        self.assertEqual(analyzer.results, 111)
+
+
+if __name__ == '__main__':
+    unittest.main()
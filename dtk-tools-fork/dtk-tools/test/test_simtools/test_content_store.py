@@ -0,0 +1,67 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from simtools.SimulationCreator.ContentStore import ContentStore
+
+
+class TestContentStore(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.store = ContentStore(os.path.join(self.directory, ContentStore.DIRECTORY))
+        self.sims = [os.path.join(self.directory, 'Simulation_%d' % i) for i in range(3)]
+        for sim in self.sims:
+            os.makedirs(sim)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def read(self, path):
+        with open(path) as f:
+            return f.read()
+
+    def test_dedup_text(self):
+        for i, sim in enumerate(self.sims):
+            self.store.write_text(os.path.join(sim, 'campaign.json'), '{"Events": []}')
+            self.store.write_text(os.path.join(sim, 'config.json'), '{"Run_Number": %d}' % i)
+
+        self.assertEqual(self.store.stats['stored'], 4)
+        self.assertEqual(self.store.stats['linked'], 6)
+        for i, sim in enumerate(self.sims):
+            self.assertEqual(self.read(os.path.join(sim, 'campaign.json')), '{"Events": []}')
+            self.assertEqual(self.read(os.path.join(sim, 'config.json')), '{"Run_Number": %d}' % i)
+
+        if self.store.link_mode == 'hard':
+            self.assertTrue(os.path.samefile(os.path.join(self.sims[0], 'campaign.json'),
+                                             os.path.join(self.sims[1], 'campaign.json')))
+
+    def test_copy_file(self):
+        source = os.path.join(self.directory, 'demographics.json')
+        with open(source, 'w') as f:
+            f.write('{"Nodes": []}')
+
+        for sim in self.sims:
+            self.store.copy_file(source, sim)
+
+        self.assertEqual(self.store.stats['stored'], 1)
+        self.assertEqual(len(self.store.file_digests), 1)
+        for sim in self.sims:
+            self.assertEqual(self.read(os.path.join(sim, 'demographics.json')), '{"Nodes": []}')
+
+    def test_copy_fallback(self):
+        store = ContentStore(os.path.join(self.directory, 'copies'), link_mode='copy')
+        store.write_text(os.path.join(self.sims[0], 'config.json'), '{}')
+        store.write_text(os.path.join(self.sims[1], 'config.json'), '{}')
+        self.assertFalse(os.path.samefile(os.path.join(self.sims[0], 'config.json'),
+                                          os.path.join(self.sims[1], 'config.json')))
+        self.assertEqual(self.read(os.path.join(self.sims[1], 'config.json')), '{}')
+
+    def test_invalid_link_mode(self):
+        with self.assertRaises(ValueError):
+            ContentStore(self.directory, link_mode='junction')
+
+
+if __name__ == '__main__':
+    unittest.main()
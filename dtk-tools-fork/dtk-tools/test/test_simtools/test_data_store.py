@@ -0,0 +1,79 @@
+import os
+import tempfile
+import unittest
+
+from COMPS.Data.Simulation import SimulationState
+from sqlalchemy import create_engine
+from sqlalchemy import inspect as inspect_db
+
+import simtools.DataAccess as DataAccess
+from simtools.DataAccess.DataStore import DataStore
+from simtools.DataAccess.Schema import Base
+from simtools.Monitor import SimulationMonitor
+
+
+class TestDataStoreQueries(unittest.TestCase):
+
+    def setUp(self):
+        # Work on a temporary database instead of the one of the tools
+        self.directory = tempfile.mkdtemp()
+        self.engine = create_engine('sqlite:///%s' % os.path.join(self.directory, 'db.sqlite'))
+        Base.metadata.create_all(self.engine)
+        DataAccess.Session.configure(bind=self.engine)
+
+        self.experiment = DataStore.create_experiment(exp_id='exp_1', exp_name='test', location='LOCAL')
+        statuses = [SimulationState.Succeeded] * 3 + [SimulationState.Running, SimulationState.Failed]
+        self.experiment.simulations = [DataStore.create_simulation(id='sim_%d' % i, status=status, tags={'i': i})
+                                       for i, status in enumerate(statuses)]
+        DataStore.save_experiment(self.experiment, verbose=False)
+
+        finished = DataStore.create_experiment(exp_id='exp_2', exp_name='done', location='HPC')
+        finished.simulations = [DataStore.create_simulation(id='sim_done', status=SimulationState.Succeeded)]
+        DataStore.save_experiment(finished, verbose=False)
+
+    def tearDown(self):
+        DataAccess.Session.configure(bind=DataAccess.engine)
+        self.engine.dispose()
+
+    def test_count_states(self):
+        self.assertEqual(DataStore.count_simulation_states('exp_1'), {'Succeeded': 3, 'Running': 1, 'Failed': 1})
+
+        monitor = SimulationMonitor('exp_1')
+        self.assertEqual(monitor.count(), {SimulationState.Succeeded: 3, SimulationState.Running: 1,
+                                           SimulationState.Failed: 1})
+        states, msgs = monitor.query()
+        self.assertEqual(states['sim_3'], SimulationState.Running)
+        self.assertEqual(msgs['sim_3'], '')
+
+    def test_indexes(self):
+        indexes = {index['name'] for index in inspect_db(self.engine).get_indexes('simulations')}
+        self.assertIn('ix_simulations_experiment_status', indexes)
+        self.assertIn('ix_simulations_date_created', indexes)
+        indexes = {index['name'] for index in inspect_db(self.engine).get_indexes('experiments')}
+        self.assertIn('ix_experiments_location', indexes)
+
+    def test_lazy_tags(self):
+        experiment = DataStore.get_experiment('exp_1')
+        simulations = sorted(experiment.simulations, key=lambda sim: sim.id)
+        self.assertTrue(all('_tags' in inspect_db(sim).unloaded for sim in simulations))
+
+        # Loading the tags of one simulation loads the ones of the experiment
+        self.assertEqual(simulations[0].tags, {'i': 0})
+        self.assertFalse(any('_tags' in inspect_db(sim).unloaded for sim in simulations))
+        self.assertEqual([sim.tags['i'] for sim in simulations], list(range(5)))
+
+        # Saving a simulation whose tags are not loaded keeps them
+        simulation = DataStore.get_simulation('sim_1')
+        simulation.status = SimulationState.Canceled
+        DataStore.save_simulation(simulation)
+        self.assertEqual(DataStore.get_simulation('sim_1').tags, {'i': 1})
+
+    def test_active_experiments(self):
+        experiments = DataStore.get_active_experiments()
+        self.assertEqual([experiment.exp_id for experiment in experiments], ['exp_1'])
+        self.assertEqual(len(experiments[0].simulations), 5)
+        self.assertEqual(DataStore.get_active_experiments(location='HPC'), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
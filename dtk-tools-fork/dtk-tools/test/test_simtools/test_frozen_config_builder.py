@@ -0,0 +1,67 @@
+import pickle
+import unittest
+from unittest import mock
+
+from dtk.interventions.outbreakindividual import recurring_outbreak
+from dtk.utils.core.DTKConfigBuilder import DTKConfigBuilder
+from simtools.AssetManager.SimulationAssets import SimulationAssets
+from simtools.ModBuilder import ModFn
+from simtools.SimulationCreator.BaseSimulationCreator import BaseSimulationCreator
+
+
+class TestFrozenConfigBuilder(unittest.TestCase):
+
+    def setUp(self):
+        self.cb = DTKConfigBuilder.from_defaults('DENGUE_SIM')
+
+    def test_frozen_copies(self):
+        recurring_outbreak(self.cb, start_day=10)
+        base = self.cb.freeze()
+
+        cb1 = base.copy()
+        fn = ModFn(DTKConfigBuilder.set_param, 'Simulation_Duration', 100)
+        fn(cb1)
+        recurring_outbreak(cb1, start_day=20)
+
+        cb2 = base.copy()
+        self.assertIsInstance(cb2, DTKConfigBuilder)
+        self.assertEqual(cb1.get_param('Simulation_Duration'), 100)
+        self.assertEqual(cb2.get_param('Simulation_Duration'), self.cb.get_param('Simulation_Duration'))
+        self.assertEqual(len(cb1.campaign.Events), 2)
+        self.assertEqual(len(self.cb.campaign.Events), 1)
+
+        # Untouched campaign is serialized once and shared
+        self.assertNotIn('campaign', cb2.__dict__)
+        self.assertIs(cb2.campaign_to_json(False), base.copy().campaign_to_json(False))
+        self.assertEqual(cb2.campaign_to_json(False), self.cb.campaign.to_json(self.cb.campaign.Use_Defaults, False))
+
+        # Modifying the original builder does not change the snapshot
+        self.cb.set_param('Simulation_Duration', 5)
+        self.assertNotEqual(base.copy().get_param('Simulation_Duration'), 5)
+
+        # A pickled copy is a regular builder
+        cb3 = pickle.loads(pickle.dumps(cb1))
+        self.assertNotIn('_frozen_base', cb3.__dict__)
+        self.assertEqual(cb3.get_param('Simulation_Duration'), 100)
+        self.assertEqual(len(cb3.campaign.Events), 2)
+
+    @mock.patch.object(SimulationAssets, 'prepare')
+    def test_prepare_assets(self, prepare):
+        creator = BaseSimulationCreator(None, None, None, mock.Mock(exp_id='exp_1'), None)
+        base = self.cb.freeze()
+
+        cb1 = base.copy()
+        cb2 = base.copy()
+        cb2.set_param('Simulation_Duration', 100)
+        cb3 = base.copy()
+        cb3.set_param('Demographics_Filenames', ['other_demographics.json'])
+
+        # The assets are prepared once per distinct set of input files
+        assets = [creator.prepare_assets(cb) for cb in (cb1, cb2, cb3)]
+        self.assertEqual(prepare.call_count, 2)
+        self.assertIs(assets[0], assets[1])
+        self.assertIsNot(assets[0], assets[2])
+
+
+if __name__ == '__main__':
+    unittest.main()
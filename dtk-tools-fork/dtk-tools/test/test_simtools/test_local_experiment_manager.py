@@ -0,0 +1,67 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from COMPS.Data.Simulation import SimulationState
+
+from simtools.ExperimentManager.BaseExperimentManager import BaseExperimentManager
+from simtools.ExperimentManager.LocalExperimentManager import LocalExperimentManager
+from simtools.Utilities.CacheEnabled import CacheEnabled
+
+
+class FakeSimulation(object):
+
+    def __init__(self, sim_id, path, tags=None, parameters=None):
+        self.id = sim_id
+        self.path = path
+        self.tags = tags
+        self.status = SimulationState.Created
+        os.makedirs(path)
+        if parameters is not None:
+            with open(os.path.join(path, 'config.json'), 'w') as config_file:
+                json.dump({'parameters': parameters}, config_file)
+
+    def get_path(self):
+        return self.path
+
+
+class TestSimulationCost(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        # Only the cost computation is tested, skip the setup of the experiment manager
+        base_init = lambda manager, *args: CacheEnabled.__init__(manager)
+        with mock.patch.object(BaseExperimentManager, '__init__', base_init):
+            self.manager = LocalExperimentManager(None, None)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def simulation(self, sim_id, tags=None, parameters=None):
+        return FakeSimulation(sim_id, os.path.join(self.directory, sim_id), tags, parameters)
+
+    def test_cost(self):
+        simulation = self.simulation('sim_1', tags={'Num_Cores': 2, 'Node_Count': 10},
+                                     parameters={'Simulation_Duration': 100, 'Num_Cores': 4})
+        self.assertEqual(self.manager.simulation_cost(simulation), (2, 1000))
+        self.assertEqual(self.manager.simulation_cost(self.simulation('sim_2', tags={'Num_Cores': 'x'})), (1, 1))
+
+    def test_config_read_once(self):
+        tagged = self.simulation('sim_1', tags={'Num_Cores': 1, 'Simulation_Duration': 10, 'Node_Count': 2})
+        untagged = self.simulation('sim_2', parameters={'Simulation_Duration': 100})
+
+        with mock.patch.object(LocalExperimentManager, 'simulation_parameters',
+                               wraps=LocalExperimentManager.simulation_parameters) as simulation_parameters:
+            for _ in range(3):
+                self.assertEqual(self.manager.simulation_cost(tagged), (1, 20))
+                self.assertEqual(self.manager.simulation_cost(untagged), (1, 100))
+
+        # The config.json is only read for the simulation missing tags, and only once
+        self.assertEqual(simulation_parameters.call_args_list, [mock.call(untagged)])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,80 @@
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+from COMPS.Data.Simulation import SimulationState
+
+from simtools.SimulationRunner.LocalRunner import LocalSimulationRunner
+
+SIMULATION = """
+import time
+with open('status.txt', 'w') as status:
+    for step in range(5):
+        status.write('Update(): Time: %d\\n' % step)
+        status.flush()
+        time.sleep(0.1)
+    status.write('Done - 0:00:01')
+"""
+
+
+class FakeSimulation(object):
+
+    def __init__(self, path):
+        self.id = 'Simulation_TEST'
+        self.path = path
+        self.status = SimulationState.Created
+        self.pid = None
+        self.message = None
+
+    def get_path(self):
+        return self.path
+
+
+class TestLocalSimulationRunner(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.simulation = FakeSimulation(self.directory)
+        with open(os.path.join(self.directory, 'simulation.py'), 'w') as f:
+            f.write(SIMULATION)
+        self.experiment = mock.Mock(command_line='"%s" simulation.py' % sys.executable, exe_name='python')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def run_simulation(self):
+        with mock.patch('simtools.SimulationRunner.LocalRunner.DataStore') as data_store, \
+                mock.patch.object(LocalSimulationRunner, 'MONITOR_SLEEP', 0.05):
+            data_store.get_simulation.return_value = self.simulation
+            runner = LocalSimulationRunner(self.simulation, self.experiment)
+        return runner, data_store
+
+    def test_run(self):
+        runner, data_store = self.run_simulation()
+        self.assertEqual(self.simulation.status, SimulationState.Succeeded)
+        self.assertEqual(self.simulation.message, 'Done - 0:00:01')
+        self.assertIsNone(self.simulation.pid)
+        # Running, then the final state: the step messages are not saved within MESSAGE_SAVE_INTERVAL
+        self.assertEqual(data_store.save_simulation.call_count, 2)
+
+    def test_tail_status(self):
+        runner, data_store = self.run_simulation()
+        status_path = os.path.join(self.directory, 'status.txt')
+        with open(status_path, 'a') as status:
+            status.write('\nExtra line\nPartial')
+        self.assertEqual(runner.last_status_line(), 'Partial')
+        with open(status_path, 'a') as status:
+            status.write(' line\n\n')
+        self.assertEqual(runner.last_status_line(), 'Partial line')
+
+        # Rewritten file
+        with open(status_path, 'w') as status:
+            status.write('New\n')
+        self.assertEqual(runner.last_status_line(), 'New')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,48 @@
+import time
+import unittest
+
+from simtools.SimulationRunner.LocalScheduler import LocalScheduler
+
+
+def sleep(seconds):
+    time.sleep(seconds)
+
+
+class TestLocalScheduler(unittest.TestCase):
+
+    def setUp(self):
+        self.scheduler = LocalScheduler(3)
+
+    def tearDown(self):
+        for process, slots in self.scheduler.running.values():
+            process.terminate()
+
+    def test_backfill_on_exit(self):
+        self.scheduler.start('short', sleep, (0.2,))
+        self.scheduler.start('long', sleep, (5,), slots=2)
+        self.assertEqual(self.scheduler.free_slots, 0)
+        self.assertFalse(self.scheduler.fits(1))
+
+        # Notified when the short simulation exits, not after the timeout
+        start = time.time()
+        self.assertEqual(self.scheduler.wait(10), ['short'])
+        self.assertLess(time.time() - start, 4)
+        self.assertTrue(self.scheduler.fits(1))
+        self.assertFalse(self.scheduler.fits(2))
+        self.assertTrue(self.scheduler.is_running('long'))
+
+    def test_oversized_simulation(self):
+        # Simulations larger than the machine run alone
+        self.assertTrue(self.scheduler.fits(8))
+        self.scheduler.start('large', sleep, (0.1,), slots=8)
+        self.assertEqual(self.scheduler.used_slots, 3)
+        self.assertFalse(self.scheduler.fits(1))
+        self.assertEqual(self.scheduler.wait(10), ['large'])
+        self.assertEqual(self.scheduler.free_slots, 3)
+
+    def test_wait_without_simulations(self):
+        self.assertEqual(self.scheduler.wait(0.1), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,112 @@
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+from simtools.Analysis.OutputDownloader import OutputDownloader, backoff_delay, call_with_backoff
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """
+    Stand-in for the COMPS file server: serves the path as content and drops the connection on the first hits.
+    """
+    failures = {}
+    lock = threading.Lock()
+    in_flight = 0
+    max_in_flight = 0
+
+    def do_GET(self):
+        cls = StandInHandler
+        with cls.lock:
+            remaining = cls.failures.get(self.path, 0)
+            cls.failures[self.path] = remaining - 1
+            cls.in_flight += 1
+            cls.max_in_flight = max(cls.max_in_flight, cls.in_flight)
+
+        try:
+            time.sleep(0.05)
+            if remaining > 0:
+                # Simulate a connection reset
+                self.close_connection = True
+                self.wfile.flush()
+                self.connection.shutdown(2)
+                return
+
+            content = self.path.encode()
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(content)))
+            self.end_headers()
+            self.wfile.write(content)
+        finally:
+            with cls.lock:
+                cls.in_flight -= 1
+
+    def log_message(self, *args):
+        pass
+
+
+class TestOutputDownloader(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), StandInHandler)
+        cls.url = "http://127.0.0.1:{}".format(cls.server.server_address[1])
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        StandInHandler.failures = {}
+        StandInHandler.max_in_flight = 0
+
+    def fetch(self, path):
+        return requests.get(self.url + path, timeout=5).content
+
+    def test_bounded_concurrency(self):
+        downloader = OutputDownloader(self.fetch, max_in_flight=3)
+        futures = [downloader.submit("/sim{}".format(i)) for i in range(12)]
+        self.assertEqual([f.result() for f in futures], [("/sim%d" % i).encode() for i in range(12)])
+        downloader.shutdown()
+        self.assertTrue(downloader.idle)
+        self.assertLessEqual(StandInHandler.max_in_flight, 3)
+
+    def test_retry_on_reset(self):
+        StandInHandler.failures = {"/flaky": 2}
+        downloader = OutputDownloader(self.fetch, max_in_flight=2, retries=3, backoff_base=0.01)
+        results = []
+        future = downloader.submit("/flaky", callback=lambda f: results.append(f.result()))
+        self.assertEqual(future.result(), b"/flaky")
+        downloader.shutdown()
+        self.assertEqual(results, [b"/flaky"])
+
+    def test_give_up(self):
+        StandInHandler.failures = {"/broken": 10}
+        downloader = OutputDownloader(self.fetch, retries=1, backoff_base=0.01)
+        future = downloader.submit("/broken")
+        with self.assertRaises(requests.exceptions.ConnectionError):
+            future.result()
+        downloader.shutdown()
+
+    def test_backoff(self):
+        for attempt in range(10):
+            self.assertLessEqual(backoff_delay(attempt, base=0.5, cap=4), min(4, 0.5 * 2 ** attempt))
+
+        calls = []
+
+        def fail_once():
+            calls.append(1)
+            if len(calls) == 1:
+                raise ConnectionResetError()
+            return "ok"
+
+        self.assertEqual(call_with_backoff(fail_once, base=0.01), "ok")
+        self.assertEqual(len(calls), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
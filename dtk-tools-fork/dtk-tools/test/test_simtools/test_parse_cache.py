@@ -0,0 +1,58 @@
+import json
+import unittest
+
+from simtools.Analysis.ParseCache import ParseCache
+
+
+class DummyAnalyzer:
+    def __init__(self, filenames, parse=True):
+        self.filenames = filenames
+        self.parse = parse
+
+
+class TestParseCache(unittest.TestCase):
+
+    def setUp(self):
+        self.byte_arrays = {
+            "output/InsetChart.json": json.dumps({"Channels": {"Infected": {"Data": [0, 1, 2]}}}).encode(),
+            "output/status.txt": b"Done",
+            "output/log.dat": b"raw"
+        }
+        self.parse_cache = ParseCache(self.byte_arrays)
+
+    def test_parsed_once(self):
+        a1 = DummyAnalyzer(["output/InsetChart.json"])
+        a2 = DummyAnalyzer(["output/InsetChart.json", "output/status.txt"])
+
+        d1 = self.parse_cache.data_for(a1)
+        d2 = self.parse_cache.data_for(a2)
+
+        self.assertIs(d1["output/InsetChart.json"], d2["output/InsetChart.json"])
+        self.assertEqual(self.parse_cache.stats["json"]["count"], 1)
+        self.assertEqual(self.parse_cache.stats["txt"]["count"], 1)
+
+    def test_only_requested_files(self):
+        data = self.parse_cache.data_for(DummyAnalyzer(["output/status.txt"]))
+        self.assertEqual(list(data.keys()), ["output/status.txt"])
+        self.assertEqual(data["output/status.txt"], "Done")
+
+    def test_raw(self):
+        data = self.parse_cache.data_for(DummyAnalyzer(["output/InsetChart.json"], parse=False))
+        self.assertEqual(data["output/InsetChart.json"], self.byte_arrays["output/InsetChart.json"])
+        self.assertNotIn("json", self.parse_cache.stats)
+
+    def test_raw_stream_rewound(self):
+        a = DummyAnalyzer(["output/log.dat"])
+        self.assertEqual(self.parse_cache.data_for(a)["output/log.dat"].read(), b"raw")
+        self.assertEqual(self.parse_cache.data_for(a)["output/log.dat"].read(), b"raw")
+
+    def test_merge_stats(self):
+        self.parse_cache.data_for(DummyAnalyzer(["output/InsetChart.json"]))
+        total = ParseCache.merge_stats({}, self.parse_cache.stats)
+        total = ParseCache.merge_stats(total, self.parse_cache.stats)
+        self.assertEqual(total["json"]["count"], 2)
+        self.assertEqual(total["json"]["bytes"], 2 * len(self.byte_arrays["output/InsetChart.json"]))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,54 @@
+import pickle
+import shutil
+import tempfile
+import unittest
+
+from simtools.Analysis.ResultCache import ResultCache
+
+
+class DummyAnalyzer:
+    def __init__(self, filenames, version=None, parse=True):
+        self.filenames = filenames
+        self.version = version
+        self.parse = parse
+
+
+class TestResultCache(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.result_cache = ResultCache(self.directory)
+
+    def tearDown(self):
+        self.result_cache.close()
+        shutil.rmtree(self.directory)
+
+    def test_roundtrip(self):
+        analyzer = DummyAnalyzer(["output/InsetChart.json"], version=1)
+        self.assertEqual(self.result_cache.get("sim", analyzer), (False, None))
+        self.result_cache.set("sim", analyzer, {"a": 1})
+        self.assertEqual(self.result_cache.get("sim", analyzer), (True, {"a": 1}))
+
+    def test_version_invalidates(self):
+        self.result_cache.set("sim", DummyAnalyzer(["output/InsetChart.json"], version=1), 1)
+        found, _ = self.result_cache.get("sim", DummyAnalyzer(["output/InsetChart.json"], version=2))
+        self.assertFalse(found)
+        found, _ = self.result_cache.get("sim", DummyAnalyzer(["output/ReportEventCounter.json"], version=1))
+        self.assertFalse(found)
+
+    def test_no_version_not_cached(self):
+        analyzer = DummyAnalyzer(["output/InsetChart.json"])
+        self.result_cache.set("sim", analyzer, 1)
+        self.assertEqual(len(self.result_cache), 0)
+        self.assertEqual(self.result_cache.get("sim", analyzer), (False, None))
+
+    def test_pickle(self):
+        analyzer = DummyAnalyzer(["output/InsetChart.json"], version="abc")
+        self.result_cache.set("sim", analyzer, [1, 2])
+        other = pickle.loads(pickle.dumps(self.result_cache))
+        self.assertEqual(other.get("sim", analyzer), (True, [1, 2]))
+        other.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
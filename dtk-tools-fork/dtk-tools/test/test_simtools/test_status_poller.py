@@ -0,0 +1,112 @@
+import datetime
+import unittest
+from unittest import mock
+
+from COMPS.Data.Simulation import SimulationState
+
+from simtools.Monitor import StatusPoller, CompsSimulationMonitor
+
+
+class FakeClock(object):
+
+    def __init__(self):
+        self.now = 1000.
+
+    def time(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+class TestStatusPoller(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.patcher = mock.patch('simtools.Monitor.time', self.clock)
+        self.patcher.start()
+
+    def tearDown(self):
+        self.patcher.stop()
+
+    def test_backoff(self):
+        states = {'sim_%d' % i: SimulationState.Running for i in range(4)}
+        poller = StatusPoller(lambda: dict(states), min_interval=5, max_interval=60)
+
+        self.assertEqual(len(poller.poll()), 4)
+        intervals = []
+        for _ in range(5):
+            poller.poll()
+            intervals.append(poller.interval)
+        self.assertEqual(intervals, [10, 20, 40, 60, 60])
+
+        # A change brings the interval down
+        states['sim_0'] = SimulationState.Succeeded
+        self.clock.sleep(100)
+        self.assertEqual(poller.poll(), {'sim_0': SimulationState.Succeeded})
+        self.assertEqual(poller.interval, 30)
+        self.assertFalse(poller.finished)
+
+    def test_expected_time_left(self):
+        states = {'sim_%d' % i: SimulationState.Running for i in range(3)}
+        poller = StatusPoller(lambda: dict(states), min_interval=1, max_interval=300)
+        poller.interval = 200
+        poller.poll()
+
+        # One simulation finished in 10 seconds: the 2 remaining are expected in 20 seconds
+        self.clock.sleep(10)
+        states['sim_0'] = SimulationState.Succeeded
+        poller.poll()
+        self.assertEqual(poller.interval, 20)
+
+    def test_wait(self):
+        polls = []
+
+        def query():
+            polls.append(self.clock.now)
+            finished = len(polls) >= 4
+            return {'sim_1': SimulationState.Succeeded if finished else SimulationState.Running}
+
+        changes = []
+        poller = StatusPoller(query, min_interval=5, max_interval=60, on_change=changes.append)
+        self.assertEqual(poller.wait(), {'sim_1': SimulationState.Succeeded})
+        # The first poll sees all the states as changed, then the interval doubles
+        self.assertEqual([poll - 1000 for poll in polls], [0, 5, 15, 35])
+        self.assertEqual(changes, [{'sim_1': SimulationState.Running}, {'sim_1': SimulationState.Succeeded}])
+
+        # Nothing to wait for
+        self.assertEqual(StatusPoller(lambda: {}).wait(), {})
+
+
+class TestCompsSimulationMonitor(unittest.TestCase):
+
+    @mock.patch('simtools.Monitor.COMPS_login')
+    @mock.patch('simtools.Monitor.sims_from_experiment_id')
+    def test_incremental(self, sims_from_experiment_id, COMPS_login):
+        first = datetime.datetime(2018, 1, 1, 10, 0)
+        sims_from_experiment_id.side_effect = [
+            [mock.Mock(id='sim_1', state=SimulationState.Running, last_modified=first),
+             mock.Mock(id='sim_2', state=SimulationState.Running, last_modified=first)],
+            [mock.Mock(id='sim_2', state=SimulationState.Succeeded, last_modified=first + datetime.timedelta(1))],
+        ]
+
+        monitor = CompsSimulationMonitor('exp_1', None, 'endpoint')
+        monitor.query()
+        states, msgs = monitor.query()
+        self.assertEqual(states, {'sim_1': SimulationState.Running, 'sim_2': SimulationState.Succeeded})
+        self.assertEqual(sims_from_experiment_id.call_args_list[1][1]['modified_since'], first)
+
+    @mock.patch('simtools.Monitor.COMPS_login')
+    @mock.patch('simtools.Monitor.sims_from_experiment_id')
+    def test_not_incremental(self, sims_from_experiment_id, COMPS_login):
+        sims = [mock.Mock(id='sim_1', state=SimulationState.Running)]
+        sims_from_experiment_id.side_effect = lambda exp_id, **kwargs: self.fail() if kwargs else sims
+
+        monitor = CompsSimulationMonitor('exp_1', None, 'endpoint')
+        states, msgs = monitor.query()
+        self.assertEqual(states, {'sim_1': SimulationState.Running})
+        self.assertFalse(monitor.incremental)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+import time
+import unittest
+from unittest import mock
+
+from COMPS.Data.Simulation import SimulationState
+
+from simtools.DataAccess.StatusWriter import StatusWriter
+
+
+class FakeSimulation(object):
+
+    def __init__(self, sim_id, status, message=None, pid=None):
+        self.id = sim_id
+        self.status = status
+        self.message = message
+        self.pid = pid
+
+
+class TestStatusWriter(unittest.TestCase):
+
+    def setUp(self):
+        self.writer = StatusWriter()
+        self.patcher = mock.patch('simtools.DataAccess.StatusWriter.DataStore')
+        self.data_store = self.patcher.start()
+
+    def tearDown(self):
+        self.patcher.stop()
+        self.writer.manager.shutdown()
+
+    def test_coalesce(self):
+        channel = self.writer.channel
+        channel.put(FakeSimulation('sim_1', SimulationState.Running, pid=42))
+        channel.put(FakeSimulation('sim_1', SimulationState.Running, message='Time: 10', pid=42))
+        channel.put(FakeSimulation('sim_2', SimulationState.Running, pid=43))
+        channel.put(FakeSimulation('sim_1', SimulationState.Succeeded, message='Done'))
+
+        # Let the queue feeder thread deliver the changes
+        time.sleep(0.5)
+        self.writer.flush()
+        self.assertEqual(self.data_store.batch_simulations_update.call_count, 1)
+        batch = sorted(self.data_store.batch_simulations_update.call_args[0][0], key=lambda sim: sim['sid'])
+        self.assertEqual(batch, [{'sid': 'sim_1', 'status': 'Succeeded', 'message': 'Done', 'pid': None},
+                                 {'sid': 'sim_2', 'status': 'Running', 'message': None, 'pid': '43'}])
+
+        # The runners read the states from the channel
+        self.assertEqual(channel.get_status('sim_1'), 'Succeeded')
+        self.assertIsNone(channel.get_status('sim_3'))
+
+        # Nothing left to save
+        self.writer.flush()
+        self.assertEqual(self.data_store.batch_simulations_update.call_count, 1)
+
+    def test_thread(self):
+        self.writer.FLUSH_INTERVAL = 0.1
+        self.writer.start()
+        self.writer.channel.put(FakeSimulation('sim_1', SimulationState.Running, pid=42))
+        self.writer.stop()
+        saved = [sim for call in self.data_store.batch_simulations_update.call_args_list for sim in call[0][0]]
+        self.assertEqual(saved, [{'sid': 'sim_1', 'status': 'Running', 'message': None, 'pid': '42'}])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+import os
+import tempfile
+import time
+import unittest
+from multiprocessing import Process
+
+from sqlalchemy import create_engine
+
+import simtools.DataAccess as DataAccess
+from simtools.DataAccess.LoggingDataStore import LoggingDataStore
+from simtools.DBLogging.Schema import Span
+from simtools.DBLogging.Tracer import Tracer, tracer
+
+
+def traced_work(label, trace_id):
+    with tracer.span(label, trace_id):
+        time.sleep(0.01)
+
+
+class TestTracer(unittest.TestCase):
+
+    def setUp(self):
+        # Work on a temporary logs database
+        self.directory = tempfile.mkdtemp()
+        self.engine = create_engine('sqlite:///%s' % os.path.join(self.directory, 'logs.sqlite'))
+        Span.metadata.create_all(self.engine)
+        DataAccess.Session_logs.configure(bind=self.engine)
+
+    def tearDown(self):
+        DataAccess.Session_logs.configure(bind=DataAccess.engine_logs)
+        self.engine.dispose()
+
+    def test_aggregate(self):
+        t = Tracer()
+        for elapsed in (1, 3, 2):
+            t.add('create.batch', elapsed, 'exp_1')
+        t.add('create.batch', 5, 'exp_2')
+        with t.span('analyze', 'exp_1') as span:
+            span.trace_id = 'exp_3'
+
+        spans = {(span['trace_id'], span['label']): span for span in t.collect()}
+        self.assertEqual(len(spans), 3)
+        batch = spans[('exp_1', 'create.batch')]
+        self.assertEqual((batch['count'], batch['total'], batch['min'], batch['max']), (3, 6, 1, 3))
+        self.assertIn(('exp_3', 'analyze'), spans)
+
+        # Collected spans are not collected again
+        self.assertEqual(t.collect(), [])
+
+    def test_flush_and_report(self):
+        t = Tracer()
+        t.trace_id = 'exp_1'
+        t.add('analyze.parse', 1)
+        t.flush()
+        t.add('analyze.parse', 2)
+        t.add('analyze', 4, start=time.time() - 10)
+        t.flush()
+
+        spans = LoggingDataStore.get_spans('exp_1')
+        self.assertEqual([span[0] for span in spans], ['analyze', 'analyze.parse'])
+        self.assertEqual(spans[1][1:5], (2, 3, 1, 2))
+        self.assertEqual(LoggingDataStore.get_spans('exp_2'), [])
+
+    def test_child_process(self):
+        # The spans of a child process are saved when it exits
+        tracer.add('parent', 1, 'exp_1')
+        process = Process(target=traced_work, args=('child', 'exp_1'))
+        process.start()
+        process.join()
+
+        self.assertEqual([span[0] for span in LoggingDataStore.get_spans('exp_1')], ['child'])
+        tracer.collect()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,115 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+from dtk.tools.climate.BinaryFilesHelpers import extract_data_from_climate_bin_for_node, \
+    extract_data_from_climate_bin_for_nodes
+from dtk.tools.climate.ClimateFileCreator import ClimateFileCreator
+from dtk.tools.climate.WeatherNode import WeatherNode
+
+
+class TestClimateFiles(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        rng = np.random.RandomState(0)
+        series = [rng.uniform(0, 30, 365).tolist() for _ in range(3)]
+        self.nodes = []
+        for i, s in enumerate([0, 1, 0, 2, 1]):
+            node = WeatherNode(forced_id=100 + i)
+            node.air_temperature = node.land_temperature = node.humidity = node.rainfall = series[s]
+            self.nodes.append(node)
+
+        ClimateFileCreator(self.nodes, 'test', 'daily', '2016').generate_climate_files(self.directory)
+        self.rainfall = os.path.join(self.directory, 'test_rainfall_daily.bin')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_deduplicated_series(self):
+        with open(self.rainfall + '.json') as f:
+            meta = json.load(f)
+
+        self.assertEqual(meta['Metadata']['NodeCount'], 3)
+        self.assertEqual(meta['Metadata']['NumberDTKNodes'], 5)
+        self.assertEqual(meta['Metadata']['DatavalueCount'], 365)
+        self.assertEqual(os.path.getsize(self.rainfall), 3 * 365 * 4)
+        offsets = [int(meta['NodeOffsets'][i + 8:i + 16], 16) for i in range(0, len(meta['NodeOffsets']), 16)]
+        self.assertEqual(offsets, [0, 1460, 0, 2920, 1460])
+
+    def test_read_nodes(self):
+        data = extract_data_from_climate_bin_for_nodes([self.nodes[3], 101, self.nodes[0]], self.rainfall)
+        self.assertEqual(data.shape, (3, 365))
+        np.testing.assert_allclose(data[0], self.nodes[3].rainfall, rtol=1e-6)
+        np.testing.assert_allclose(data[1], self.nodes[1].rainfall, rtol=1e-6)
+
+        series = extract_data_from_climate_bin_for_node(self.nodes[4], self.rainfall)
+        np.testing.assert_allclose(series, self.nodes[4].rainfall, rtol=1e-6)
+
+        with self.assertRaises(KeyError):
+            extract_data_from_climate_bin_for_nodes([999], self.rainfall)
+
+    def test_different_lengths(self):
+        self.nodes[1].rainfall = self.nodes[1].rainfall[0:10]
+        with self.assertRaises(ValueError):
+            ClimateFileCreator(self.nodes, 'test', 'daily', '2016').generate_climate_files(self.directory)
+
+
+class TestPrepareData(unittest.TestCase):
+
+    def setUp(self):
+        self.humidity = [np.nan, 5, -3, 10, 200, 20, np.inf]
+
+    def prepare(self, strategy):
+        return ClimateFileCreator.prepare_data(self.humidity, test_function=ClimateFileCreator.valid_humidity,
+                                               strategy=strategy, bounds=ClimateFileCreator.CLIMATE_RANGES['humidity'])
+
+    def test_strategies(self):
+        np.testing.assert_array_equal(self.prepare('zero'), [0, 5, 0, 10, 0, 20, 0])
+        np.testing.assert_array_equal(self.prepare('previous'), [5, 5, 5, 10, 10, 20, 20])
+        np.testing.assert_array_equal(self.prepare('interpolate'), [5, 5, 7.5, 10, 15, 20, 20])
+        np.testing.assert_array_equal(self.prepare('clamp'), [5, 5, 0, 10, 100, 20, 20])
+        with self.assertRaises(ValueError):
+            self.prepare('median')
+
+    def test_rows_are_independent(self):
+        data = np.array([[1, np.nan, 3], [np.nan, 4, np.nan]])
+        np.testing.assert_array_equal(ClimateFileCreator.prepare_data(data, strategy='interpolate'),
+                                      [[1, 2, 3], [4, 4, 4]])
+        np.testing.assert_array_equal(ClimateFileCreator.prepare_data([np.nan, np.nan], strategy='previous'), [0, 0])
+
+    def test_exclusive_bound(self):
+        rainfall = ClimateFileCreator.prepare_data([1, 3000], test_function=ClimateFileCreator.valid_rainfall,
+                                                   strategy='clamp', bounds=ClimateFileCreator.CLIMATE_RANGES['rainfall'])
+        self.assertTrue(ClimateFileCreator.valid_rainfall(rainfall.astype(np.float32)).all())
+
+    def test_handler_and_scalar_test_function(self):
+        cleaned = ClimateFileCreator.prepare_data([1, -5, 2], invalid_handler=lambda value, index, data: -value,
+                                                  test_function=lambda value: 0 < value < 10)
+        np.testing.assert_array_equal(cleaned, [1, 5, 2])
+
+    def test_report(self):
+        nodes = []
+        for i, humidity in enumerate([self.humidity, [50] * 7, [1, 2, -1]]):
+            node = WeatherNode(forced_id=i + 1)
+            node.humidity = humidity
+            nodes.append(node)
+
+        creator = ClimateFileCreator(nodes, 'test', 'daily', '2016')
+        report = creator.prepare_humidity(strategy='previous')
+        self.assertEqual(report['values'], 17)
+        self.assertEqual(report['invalid'], 5)
+        self.assertEqual(report['non_finite'], 2)
+        self.assertEqual(report['nodes'], 2)
+        self.assertEqual((report['min'], report['max']), (-3, 200))
+        self.assertEqual(report['worst_nodes'], {1: 4, 3: 1})
+        self.assertIs(creator.cleaning_report['humidity'], report)
+        np.testing.assert_array_equal(nodes[2].humidity, [1, 2, 2])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from dtk.tools.demographics.DemographicsFile import DemographicsFile, DemographicsIndex
+
+
+class TestDemographicsIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'demographics.json')
+        self.content = {
+            "Metadata": {"IdReference": "Test", "NodeCount": 3},
+            "Defaults": {"NodeAttributes": {"InitialPopulation": 500, "Airport": 1}},
+            "Nodes": [
+                {"NodeID": 11, "NodeAttributes": {"Latitude": 1.5, "Longitude": -75, "InitialPopulation": 1000,
+                                                  "FacilityName": "Cartagena", "LarvalHabitatMultiplier": 2.5}},
+                {"NodeID": 12, "NodeAttributes": {"Latitude": 2, "Longitude": -74.5, "FacilityName": "Mompós"}},
+                {"NodeAttributes": {"Latitude": 3, "Longitude": -74, "InitialPopulation": 20,
+                                    "FacilityName": "Magangué", "Nested": {"List": [1, 2, {"Nodes": []}]}},
+                 "NodeID": 13}
+            ]
+        }
+        self.write()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def write(self):
+        with open(self.path, 'w', encoding='utf-8') as f:
+            json.dump(self.content, f, indent=3, ensure_ascii=False)
+
+    def test_table(self):
+        index = DemographicsFile.index(self.path)
+        self.assertEqual(index.node_ids.tolist(), [11, 12, 13])
+        self.assertEqual(index.latitudes.tolist(), [1.5, 2, 3])
+        self.assertEqual(index.longitudes.tolist(), [-75, -74.5, -74])
+        self.assertEqual(index.populations.tolist(), [1000, 500, 20])
+        self.assertEqual(index.names.tolist(), ['Cartagena', 'Mompós', 'Magangué'])
+        self.assertEqual(index.idref, 'Test')
+        self.assertEqual(index.node_count, 3)
+
+    def test_attributes(self):
+        index = DemographicsFile.index(self.path)
+        self.assertEqual(index.attributes(13), self.content['Nodes'][2]['NodeAttributes'])
+        self.assertEqual(index.get_attribute(11, 'LarvalHabitatMultiplier'), 2.5)
+        self.assertEqual(index.get_attribute(11, 'Airport'), 1)
+        self.assertIsNone(index.get_attribute(11, 'Urban'))
+
+        node = index.get_node(12)
+        self.assertEqual((node.id, node.name, node.pop), (12, 'Mompós', 500))
+        with self.assertRaises(ValueError):
+            index.attributes(99)
+
+    def test_cache(self):
+        DemographicsFile.index(self.path)
+        cache_file = self.path + DemographicsIndex.CACHE_SUFFIX
+        self.assertTrue(os.path.exists(cache_file))
+
+        # The cache is used as long as the file does not change
+        cache_time = os.path.getmtime(cache_file)
+        self.assertEqual(DemographicsFile.index(self.path).node_count, 3)
+        self.assertEqual(os.path.getmtime(cache_file), cache_time)
+
+        # Modified file
+        self.content['Nodes'] = self.content['Nodes'][0:2]
+        self.write()
+        stat = os.stat(self.path)
+        os.utime(self.path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+        self.assertEqual(DemographicsFile.index(self.path).node_ids.tolist(), [11, 12])
+
+    def test_no_cache(self):
+        DemographicsFile.index(self.path, cache=False)
+        self.assertFalse(os.path.exists(self.path + DemographicsIndex.CACHE_SUFFIX))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,99 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+from scipy import sparse
+
+from dtk.tools.loadbalance.GraphLoadBalancer import partition_graph, partition_report
+from dtk.tools.loadbalance.LoadBalanceGenerator import LoadBalanceGenerator
+from dtk.tools.migration.MigrationFile import MigrationFile
+
+
+class TestGraphLoadBalancer(unittest.TestCase):
+
+    def setUp(self):
+        # Two groups of 4 nodes, strongly linked inside each group and weakly between the groups;
+        # the coordinates alone would split the nodes the wrong way
+        self.weights = np.array([10, 10, 10, 10, 10, 10, 10, 10], dtype=float)
+        self.coordinates = np.array([[0, 0], [1, 0], [2, 0], [3, 0], [0, 1], [1, 1], [2, 1], [3, 1]], dtype=float)
+        rates = np.zeros((8, 8))
+        for group in ([0, 1, 4, 5], [2, 3, 6, 7]):
+            for i in group:
+                for j in group:
+                    if i != j:
+                        rates[i, j] = 1
+        rates[1, 2] = rates[2, 1] = 0.1
+        self.adjacency = sparse.csr_matrix(rates)
+
+    def test_partition(self):
+        parts = partition_graph(self.weights, self.adjacency, 2, self.coordinates)
+        self.assertEqual(len(set(parts[[0, 1, 4, 5]])), 1)
+        self.assertEqual(len(set(parts[[2, 3, 6, 7]])), 1)
+        self.assertNotEqual(parts[0], parts[2])
+
+        report = partition_report(self.weights, self.adjacency, parts, 2)
+        self.assertEqual(report['loads'], [40, 40])
+        self.assertAlmostEqual(report['imbalance'], 1)
+        self.assertAlmostEqual(report['cut_volume'], 0.1)
+
+    def test_heavy_node(self):
+        weights = np.array([100, 1, 1, 1, 1, 1, 1, 1], dtype=float)
+        parts = partition_graph(weights, self.adjacency, 4, self.coordinates)
+        self.assertEqual(set(parts.tolist()), {0, 1, 2, 3})
+        # The heaviest node is alone
+        self.assertEqual((parts == parts[0]).sum(), 1)
+
+    def test_more_parts_than_nodes(self):
+        parts = partition_graph(self.weights[0:3], self.adjacency[0:3, 0:3], 4)
+        self.assertEqual(sorted(parts.tolist()), [0, 1, 2])
+
+
+class TestLoadBalanceGenerator(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.demographics = os.path.join(self.directory, 'demographics.json')
+        self.migration = os.path.join(self.directory, 'migration.bin')
+        self.node_ids = list(range(1, 9))
+        populations = [1000, 200, 300, 400, 500, 600, 700, 800]
+
+        with open(self.demographics, 'w') as f:
+            json.dump({"Metadata": {"NodeCount": 8, "IdReference": "Test"},
+                       "Nodes": [{"NodeID": node_id, "NodeAttributes": {"Latitude": i % 2, "Longitude": i // 2,
+                                                                        "InitialPopulation": pop}}
+                                 for i, (node_id, pop) in enumerate(zip(self.node_ids, populations))]}, f)
+
+        rates = np.full((8, 8), 0.01)
+        np.fill_diagonal(rates, 0)
+        MigrationFile('Test', rates, self.node_ids).generate_file(self.migration)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_graph_load_balance(self):
+        lb = LoadBalanceGenerator(4, self.demographics, 'graph', [self.migration])
+        lb.generate_load_balance()
+        lb.load_balance_fig.close()
+
+        self.assertEqual(lb.num_nodes, 8)
+        self.assertEqual(sorted(lb.load_balance_nodes_list), self.node_ids)
+        self.assertEqual(len(lb.load_balance_report['loads']), 4)
+        self.assertGreater(lb.load_balance_report['cut_volume'], 0)
+
+        # Cumulative loads are increasing and each partition maps to its own core
+        cum_loads = np.array(lb.load_balance_cum_loads_list)
+        self.assertTrue((np.diff(cum_loads) >= 0).all())
+        partitions = lb.lb.balance_load()['partitions']
+        cores = (cum_loads * 4).astype(int)
+        self.assertEqual(cores.tolist(), [partitions[node_id] for node_id in lb.load_balance_nodes_list])
+
+        path = os.path.join(self.directory, 'load_balance.bin')
+        lb.save_load_balance_binary_file(path)
+        self.assertEqual(os.path.getsize(path), 4 + 8 * 4 + 8 * 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
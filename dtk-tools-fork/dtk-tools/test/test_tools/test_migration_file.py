@@ -0,0 +1,103 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+from scipy import sparse
+
+from dtk.tools.migration.MigrationFile import MigrationFile
+
+
+class Node:
+    def __init__(self, id):
+        self.id = id
+
+
+class TestMigrationFile(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'migration.bin')
+        self.node_ids = [3, 7, 11, 20]
+        self.rates = np.array([[0, 0.1, 0.3, 0],
+                               [0.2, 0, 0, 0],
+                               [0.05, 0.4, 0, 0.4],
+                               [0, 0, 0, 0]])
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_round_trip(self):
+        MigrationFile('test', self.rates, self.node_ids).generate_file(self.path)
+        migration = MigrationFile.from_file(self.path)
+
+        self.assertEqual(migration.node_ids, self.node_ids)
+        self.assertEqual(migration.headers['Metadata']['NodeCount'], 4)
+        self.assertEqual(migration.headers['Metadata']['DatavalueCount'], 3)
+        self.assertEqual(migration.headers['Metadata']['IdReference'], 'test')
+        np.testing.assert_allclose(migration.matrix.toarray(), self.rates)
+
+        # Same file from a sparse matrix
+        other = os.path.join(self.directory, 'sparse.bin')
+        MigrationFile('test', sparse.csr_matrix(self.rates), self.node_ids).generate_file(other)
+        with open(self.path, 'rb') as f1, open(other, 'rb') as f2:
+            self.assertEqual(f1.read(), f2.read())
+
+    def test_record_layout(self):
+        MigrationFile('test', self.rates, self.node_ids).generate_file(self.path)
+        records = np.fromfile(self.path, dtype=MigrationFile.record_dtype(3))
+
+        # Destinations sorted by decreasing rate, ties by node order, padded with 0
+        self.assertEqual(records['destinations'][0].tolist(), [11, 7, 0])
+        self.assertEqual(records['destinations'][2].tolist(), [7, 20, 3])
+        self.assertEqual(records['rates'][1].tolist(), [0.2, 0, 0])
+        self.assertEqual(records['destinations'][3].tolist(), [0, 0, 0])
+
+        migration = MigrationFile.from_file(self.path)
+        self.assertEqual(migration.headers['NodeOffsets'][0:16], '0000000300000000')
+        self.assertEqual(migration.headers['NodeOffsets'][16:32], '00000007%08x' % records.dtype.itemsize)
+
+    def test_max_destinations(self):
+        MigrationFile('test', self.rates, self.node_ids, max_destinations=1).generate_file(self.path)
+        migration = MigrationFile.from_file(self.path)
+
+        self.assertEqual(migration.headers['Metadata']['DatavalueCount'], 1)
+        expected = np.array([[0, 0, 0.3, 0],
+                             [0.2, 0, 0, 0],
+                             [0, 0.4, 0, 0],
+                             [0, 0, 0, 0]])
+        np.testing.assert_allclose(migration.matrix.toarray(), expected)
+
+    def test_nodes_dict(self):
+        nodes = {node_id: Node(node_id) for node_id in self.node_ids}
+        matrix = {nodes[3]: {nodes[7]: 0.1, nodes[11]: 0.3},
+                  nodes[7]: {nodes[3]: 0.2},
+                  nodes[11]: {nodes[3]: 0.05, nodes[7]: 0.4, nodes[20]: 0.4},
+                  nodes[20]: {}}
+        MigrationFile('test', matrix).generate_file(self.path)
+        migration = MigrationFile.from_file(self.path)
+
+        self.assertEqual(migration.node_ids, self.node_ids)
+        np.testing.assert_allclose(migration.matrix.toarray(), self.rates)
+
+    def test_from_csv(self):
+        csv = os.path.join(self.directory, 'rates.csv')
+        with open(csv, 'w') as f:
+            f.write(','.join('"%d"' % n for n in self.node_ids) + '\n')
+            for row in self.rates:
+                f.write(','.join(str(r) for r in row) + '\n')
+
+        migration = MigrationFile.from_csv('test', csv, max_destinations=2)
+        migration.generate_file(self.path)
+        migration = MigrationFile.from_file(self.path)
+        self.assertEqual(migration.headers['Metadata']['DatavalueCount'], 2)
+        self.assertEqual(migration.matrix[2].nnz, 2)
+
+    def test_array_needs_node_ids(self):
+        with self.assertRaises(ValueError):
+            MigrationFile('test', self.rates)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+import itertools
+import unittest
+
+import numpy as np
+
+from dtk.tools.migration.GeoGraphGenerator import GeoGraphGenerator, haversine_distances, pairs_within_radius
+from dtk.tools.migration.GravityModelRatesGenerator import GravityModelRatesGenerator, gravity_rates_matrix
+
+
+class TestGeoGraphGenerator(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.RandomState(0)
+        n = 200
+        self.lons = rng.uniform(-76, -74, n)
+        self.lats = rng.uniform(5, 7, n)
+        self.node_properties = {i + 1: [self.lons[i], self.lats[i], 1000 + i, 'node_%d' % i] for i in range(n)}
+        self.scalar = GeoGraphGenerator({}, {}).get_haversine_distance
+
+    def test_haversine(self):
+        expected = [self.scalar(self.lons[0], self.lats[0], lon, lat) for lon, lat in zip(self.lons, self.lats)]
+        np.testing.assert_allclose(haversine_distances(self.lons[0], self.lats[0], self.lons, self.lats), expected)
+
+    def test_pairs_within_radius(self):
+        first, second, distances = pairs_within_radius(self.lons, self.lats, 25)
+        found = set(zip(first.tolist(), second.tolist()))
+        expected = {(i, j) for i, j in itertools.combinations(range(len(self.lons)), 2)
+                    if self.scalar(self.lons[i], self.lats[i], self.lons[j], self.lats[j]) < 25}
+        self.assertEqual(found, expected)
+        self.assertTrue((distances < 25).all())
+
+    def test_generate_graph(self):
+        adjacency = {1: {2: 0.5}}
+        G = GeoGraphGenerator(adjacency, self.node_properties, migration_radius=25).generate_graph()
+        self.assertEqual(G.number_of_nodes(), len(self.node_properties))
+        p1, p2 = self.node_properties[1], self.node_properties[2]
+        self.assertAlmostEqual(G[1][2]['weight'], 0.5 * self.scalar(p1[0], p1[1], p2[0], p2[1]))
+
+        # Without radius, all the nodes are linked
+        G = GeoGraphGenerator({}, self.node_properties).generate_graph()
+        n = len(self.node_properties)
+        self.assertEqual(G.number_of_edges(), n * (n - 1) // 2)
+
+    def test_bounded_shortest_paths(self):
+        gt = GeoGraphGenerator({}, self.node_properties, migration_radius=25)
+        gt.generate_graph()
+        full = dict(gt.get_shortest_paths())
+        bounded = dict(gt.get_shortest_paths(cutoff=20))
+        for src, lengths in full.items():
+            self.assertEqual({dest: d for dest, d in lengths.items() if d <= 20}, bounded[src])
+
+
+class TestGravityModelRatesGenerator(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.RandomState(1)
+        n = 300
+        self.node_properties = {i + 1: [rng.uniform(-75, -74), rng.uniform(6, 7), 1000 + 7 * i, 'node_%d' % i]
+                                for i in range(n)}
+        self.gt = GeoGraphGenerator({}, self.node_properties, migration_radius=8)
+        self.graph = self.gt.generate_graph()
+
+    def test_same_rates_as_path_lengths(self):
+        class FewDestinations(GravityModelRatesGenerator):
+            MAX_MIGRATION_DESTS = 5
+
+        expected = FewDestinations(self.gt.get_shortest_paths(cutoff=20), self.graph, coeff=1e-4).generate_migration_links_rates()
+        lrm = FewDestinations(None, self.graph, coeff=1e-4)
+        rates = lrm.generate_migration_links_rates()
+
+        self.assertEqual(set(rates), set(expected))
+        for src in expected:
+            self.assertEqual(set(rates[src]), set(expected[src]))
+            for dest in expected[src]:
+                self.assertAlmostEqual(rates[src][dest], expected[src][dest])
+
+        self.assertEqual(lrm.link_rates_matrix.shape, (300, 300))
+        self.assertEqual(lrm.link_rates_matrix.nnz, sum(len(v) for v in expected.values()))
+
+    def test_parallel_chunks(self):
+        sequential, node_ids = gravity_rates_matrix(self.graph, self.graph.population, coeff=1e-4)
+        parallel, _ = gravity_rates_matrix(self.graph, self.graph.population, coeff=1e-4, processes=2, chunk_size=64)
+        self.assertEqual((sequential != parallel).nnz, 0)
+        self.assertEqual(node_ids, list(self.graph.nodes()))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+from dtk.tools.migration.MigrationFile import MigrationFile
+from dtk.tools.migration.MigrationGenerator import MigrationGenerator
+from dtk.tools.spatialworkflow.SpatialManager import SpatialManager
+
+
+class TestSpatialManagerMigration(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.demographics = {
+            'Metadata': {'IdReference': 'Gridded world grump30arcsec', 'NodeCount': 3},
+            'Defaults': {'NodeAttributes': {}},
+            'Nodes': [{'NodeID': node_id, 'NodeAttributes': {'FacilityName': name, 'Latitude': 4.5 + i,
+                                                             'Longitude': -74 + i, 'InitialPopulation': 1000}}
+                      for i, (node_id, name) in enumerate([(30, 'c'), (10, 'a'), (20, 'b')])]
+        }
+        demographics_path = os.path.join(self.directory, 'demographics.json')
+        with open(demographics_path, 'w') as demographics_file:
+            json.dump(self.demographics, demographics_file)
+
+        # Only the migration part of the workflow is exercised
+        self.manager = SpatialManager.__new__(SpatialManager)
+        self.manager.mg = MigrationGenerator(demographics_path, None, graph_topo_type='custom',
+                                             link_rates_model_type='custom')
+        self.manager.mg.set_link_rates({'a': {'b': 0.1, 'c': 0.3}, 'b': {'a': 0.2}})
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_round_trip(self):
+        path = os.path.join(self.directory, 'migration.bin')
+        self.manager.save_migration_file(self.demographics, path)
+        migration = MigrationFile.from_file(path)
+
+        # The records follow the demographics nodes and agree with the header
+        self.assertEqual(migration.node_ids, [30, 10, 20])
+        self.assertEqual(migration.headers['Metadata']['IdReference'], 'Gridded world grump30arcsec')
+        self.assertEqual(migration.headers['Metadata']['NodeCount'], 3)
+        count = migration.headers['Metadata']['DatavalueCount']
+        self.assertEqual(os.path.getsize(path), 3 * MigrationFile.record_dtype(count).itemsize)
+
+        index = {node_id: i for i, node_id in enumerate(migration.destination_ids)}
+        rates = migration.matrix.toarray()
+        self.assertEqual(rates[0].sum(), 0)
+        self.assertEqual(rates[1, index[20]], 0.1)
+        self.assertEqual(rates[1, index[30]], 0.3)
+        self.assertEqual(rates[2, index[10]], 0.2)
+        self.assertEqual(np.count_nonzero(rates), 3)
+
+    def test_missing_facility_name(self):
+        del self.demographics['Nodes'][1]['NodeAttributes']['FacilityName']
+        demographics_path = os.path.join(self.directory, 'unnamed_demographics.json')
+        with open(demographics_path, 'w') as demographics_file:
+            json.dump(self.demographics, demographics_file)
+
+        with self.assertRaises(KeyError):
+            MigrationGenerator(demographics_path, None, graph_topo_type='custom', link_rates_model_type='custom')
+
+
+if __name__ == '__main__':
+    unittest.main()
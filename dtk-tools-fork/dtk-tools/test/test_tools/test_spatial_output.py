@@ -0,0 +1,79 @@
+import os
+import shutil
+import struct
+import tempfile
+import unittest
+
+import numpy as np
+
+from dtk.tools.output.SpatialOutput import SpatialOutput
+
+
+class TestSpatialOutput(unittest.TestCase):
+
+    def setUp(self):
+        self.nodeids = [12, 3, 7]
+        self.data = np.arange(10 * 3, dtype=np.float32).reshape(10, 3)
+        self.content = struct.pack('ii', 3, 10) + struct.pack('3I', *self.nodeids) + self.data.tobytes()
+        self.filtered_content = struct.pack('iiff', 3, 10, 5, 2) + struct.pack('3I', *self.nodeids) + self.data.tobytes()
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'SpatialReport_New_Infections.bin')
+        with open(self.path, 'wb') as fp:
+            fp.write(self.content)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_from_bytes(self):
+        so = SpatialOutput.from_bytes(self.content)
+        self.assertEqual((so.n_nodes, so.n_tstep), (3, 10))
+        self.assertEqual(so.nodeids.tolist(), self.nodeids)
+        self.assertEqual(so.data.dtype, np.float64)
+        np.testing.assert_array_equal(so.data, self.data)
+
+    def test_filtered(self):
+        so = SpatialOutput.open(self.filtered_content, filtered=True)
+        self.assertEqual((so.start, so.interval), (5, 2))
+        np.testing.assert_array_equal(so.data, self.data)
+
+    def test_open_mmap(self):
+        for mmap in (True, False):
+            so = SpatialOutput.open(self.path, mmap=mmap)
+            self.assertEqual(so.data.dtype, np.float32)
+            np.testing.assert_array_equal(so.data, self.data)
+            del so
+
+    def test_select(self):
+        so = SpatialOutput.open(self.content).select(nodeids=[7, 12], tstart=2, tend=5)
+        self.assertEqual(so.nodeids.tolist(), [7, 12])
+        np.testing.assert_array_equal(so.data, self.data[2:5, [2, 0]])
+        with self.assertRaises(KeyError):
+            SpatialOutput.open(self.content).select(nodeids=[4])
+
+    def test_aggregate(self):
+        so = SpatialOutput.open(self.path)
+        weekly = so.aggregate(period=7, nodeids=[3])
+        np.testing.assert_array_equal(weekly[:, 0], [self.data[:7, 1].sum(), self.data[7:, 1].sum()])
+        means = so.aggregate(period=5, how='mean')
+        np.testing.assert_allclose(means, self.data.reshape(2, 5, 3).mean(axis=1))
+        del so
+
+    def test_parser(self):
+        from simtools.Analysis.OutputParser import SimulationOutputParser
+
+        # Writable float64 arrays by default, float32 views when opted in
+        data = SimulationOutputParser.parse('output/SpatialReport_New_Infections.bin', self.content)['data']
+        self.assertEqual(data.dtype, np.float64)
+        data += 1
+        np.testing.assert_array_equal(data, self.data + 1)
+
+        SimulationOutputParser.zero_copy_spatial = True
+        try:
+            data = SimulationOutputParser.parse('output/SpatialReport_New_Infections.bin', self.content)['data']
+        finally:
+            SimulationOutputParser.zero_copy_spatial = False
+        self.assertEqual(data.dtype, np.float32)
+
+
+if __name__ == '__main__':
+    unittest.main()